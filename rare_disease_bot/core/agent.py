@@ -1,5 +1,6 @@
 """LangChain Agent - 智能爬虫决策引擎"""
 import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.tools import Tool
@@ -17,9 +18,18 @@ from config.settings import (
 from core.browser_tools import BrowserManager
 from core.explorer import WebsiteExplorer
 from core.extractor import ArticleExtractor
+from core.fetcher import TieredFetcher
 from core.markdown_generator import MarkdownGenerator
-from utils.storage import ArticleStorage, BatchArticleSaver
-from utils.wp_api import fetch_wp_posts
+from core.pipeline import CrawlPipeline
+from utils.document import ParsedDocument
+from utils.llm_cache import get_llm_cache
+from utils.llm_gateway import close_llm_gateway, get_llm_gateway
+from utils.checkpoint import CrawlCheckpoint, EXTRACTED
+from utils.html_archive import get_html_archive
+from utils.parse_pool import shutdown_parse_pool
+from utils.translation_memory import get_translation_memory
+from utils.storage import BatchArticleSaver, create_storage
+from utils.wp_api import fetch_wp_posts, WP_DEFAULT_LIMIT
 
 console = Console()
 
@@ -27,49 +37,125 @@ console = Console()
 class NewsCrawlerAgent:
     """智能罕见病新闻爬虫 Agent"""
     
-    def __init__(self, base_url: str, max_articles: Optional[int] = None):
+    def __init__(self, base_url: str, max_articles: Optional[int] = None,
+                 incremental: bool = False,
+                 resume: bool = False,
+                 shared_browser: Optional[BrowserManager] = None,
+                 explorer: Optional[WebsiteExplorer] = None,
+                 extractor: Optional[ArticleExtractor] = None,
+                 md_generator: Optional[MarkdownGenerator] = None):
         """
         初始化 Agent
         
         Args:
             base_url: 起始 URL
             max_articles: 最大文章数量（None 表示不限制）
+            incremental: 增量模式（列表页全部为已抓取文章时停止翻页）
+            resume: 从上次中断处继续（复用检查点中的页面结构、已收集链接和各阶段结果）
+            shared_browser: 多站点共用的浏览器（传入时在其中创建站点会话，不单独启动浏览器）
+            explorer: 共用的结构探索器（默认新建）
+            extractor: 共用的内容提取器（默认新建）
+            md_generator: 共用的 Markdown 生成器（默认新建）
         """
         self.base_url = base_url
         self.max_articles = max_articles
+        self.incremental = incremental
+        self.resume = resume
+        self.shared_browser = shared_browser
         
-        # 初始化组件
+        # 初始化组件（LLM 相关组件多站点时共用）
         self.browser = None
-        self.explorer = WebsiteExplorer()
-        self.extractor = ArticleExtractor()
-        self.md_generator = MarkdownGenerator()
-        self.storage = ArticleStorage(base_url)
-        self.saver = BatchArticleSaver(self.storage, self.md_generator)
+        self.fetcher: Optional[TieredFetcher] = None
+        self.explorer = explorer or WebsiteExplorer()
+        self.extractor = extractor or ArticleExtractor()
+        self.md_generator = md_generator or MarkdownGenerator()
+        self.storage = create_storage(base_url)
+        self.checkpoint = CrawlCheckpoint(self.storage.checkpoint_path(base_url))
+        self.saver = BatchArticleSaver(self.storage, self.md_generator, checkpoint=self.checkpoint)
         
         # 状态
         self.page_structure = None
         self.article_urls = []
         self.wp_posts: List[Dict] = []
         self.current_step = ""
+        self.pipeline: Optional[CrawlPipeline] = None
         
     async def run(self):
         """运行爬虫"""
         pass  # 开始信息在 main.py 已经打印了
         
-        async with BrowserManager() as browser:
-            self.browser = browser
-            
-            # 阶段 1: 探索网站结构
-            await self._explore_phase()
-            
-            # 阶段 2: 收集文章链接
-            await self._collect_links_phase()
-            
-            # 阶段 3: 提取文章内容
-            await self._extract_phase()
-            
-            # 阶段 4: 总结
-            self._summary_phase()
+        # 检查点的读写都在线程中执行：与保存线程的 mark_many 共用一把锁，不能阻塞事件循环
+        resuming = self.resume and await asyncio.to_thread(self.checkpoint.is_resumable, self.base_url)
+        if self.resume and not resuming:
+            console.print("没有可恢复的检查点，重新开始")
+        
+        try:
+            async with self._browser_session() as browser, TieredFetcher(browser) as fetcher:
+                self.browser = browser
+                self.fetcher = fetcher
+                
+                # 阶段 1: 探索网站结构（恢复时使用检查点中的结构，不访问列表页）
+                if resuming:
+                    await self._restore_checkpoint()
+                else:
+                    await asyncio.to_thread(self.checkpoint.reset, self.base_url)
+                    await self._explore_phase()
+                    await asyncio.to_thread(self.checkpoint.set, 'page_structure', self.page_structure)
+                
+                # 启动流水线：收集到的链接立即进入抓取 → 提取 → 翻译 → 保存
+                self.pipeline = CrawlPipeline(
+                    fetcher, self.extractor, self.saver,
+                    checkpoint=self.checkpoint, archive=get_html_archive(),
+                )
+                self.pipeline.start()
+                
+                # 恢复上次未完成的文章（从记录的阶段继续）
+                if resuming:
+                    await self._resume_pending()
+                
+                # 阶段 2: 收集文章链接（边收集边提交给流水线，恢复时从中断的列表页继续）
+                if not await asyncio.to_thread(self.checkpoint.get, 'links_complete', False):
+                    await self._collect_links_phase(resuming)
+                    await asyncio.to_thread(self.checkpoint.set, 'links_complete', True)
+                
+                # 阶段 3: 等待流水线处理完所有文章
+                await self._extract_phase()
+                
+                # 阶段 4: 总结
+                self._summary_phase()
+                await asyncio.to_thread(self.checkpoint.complete)
+        finally:
+            await asyncio.to_thread(self.checkpoint.close)
+            self.storage.close()
+        
+    async def _restore_checkpoint(self):
+        """从检查点恢复页面结构和已收集的链接"""
+        self.page_structure = await asyncio.to_thread(self.checkpoint.get, 'page_structure')
+        self.article_urls = await asyncio.to_thread(self.checkpoint.urls)
+        counts = await asyncio.to_thread(self.checkpoint.counts)
+        console.print(
+            f"从检查点恢复: 已收集 {len(self.article_urls)} 个链接"
+            + "".join(f", {state} {count}" for state, count in sorted(counts.items()))
+        )
+        
+    async def _resume_pending(self):
+        """将检查点中未完成的文章重新提交给流水线"""
+        for url, state in await asyncio.to_thread(self.checkpoint.pending):
+            payload = await asyncio.to_thread(self.checkpoint.payload, url)
+            await self.pipeline.resume(url, state, payload)
+        
+    @asynccontextmanager
+    async def _browser_session(self):
+        """浏览器：多站点时在共用浏览器中创建站点会话，否则单独启动"""
+        if self.shared_browser is None:
+            async with BrowserManager() as browser:
+                yield browser
+            return
+        session = await self.shared_browser.new_session()
+        try:
+            yield session
+        finally:
+            await session.close()
             
     async def _explore_phase(self):
         """阶段 1: 探索网站结构"""
@@ -82,13 +168,29 @@ class NewsCrawlerAgent:
             self.page_structure = {"page_type": "fallback_wp_api"}
             return
             
-        html = await self.browser.get_html(max_length=30000)
-        self.page_structure = self.explorer.analyze_page_structure(
-            self.base_url, html
-        )
+        # 列表页只解析一次，结构校验和回退分析共用
+        doc = ParsedDocument(await self.browser.get_html(), self.base_url)
+        
+        # 优先使用缓存的站点结构（本地校验通过即可跳过 LLM 分析）
+        cached = self.storage.load_site_profile(self.base_url)
+        if cached and await asyncio.to_thread(self.explorer.validate_structure, cached, doc):
+            console.print("使用缓存的页面结构")
+            self.page_structure = cached
+            return
+            
+        # LLM 分析经由网关异步调用（多站点时不阻塞其它站点）
+        self.page_structure = await self.explorer.aanalyze_page_structure(self.base_url, doc)
+        if not self.page_structure.get('fallback'):
+            # LLM 分析失败时的回退结果不缓存，下次运行重新分析
+            self.storage.save_site_profile(self.base_url, self.page_structure)
+        
+    async def _collect_links_phase(self, resuming: bool = False):
+        """
+        阶段 2: 收集文章链接
         
-    async def _collect_links_phase(self):
-        """阶段 2: 收集文章链接"""
+        Args:
+            resuming: 是否从检查点恢复（浏览器尚未打开列表页）
+        """
         console.print("收集链接...")
         
         page_type = self.page_structure.get('page_type')
@@ -96,56 +198,95 @@ class NewsCrawlerAgent:
         if page_type == 'fallback_wp_api':
             await self._collect_via_wp_api()
         elif page_type == 'single_article':
-            self.article_urls = [self.base_url]
+            await self._enqueue_links([self.base_url])
         else:
-            await self._collect_from_list()
+            await self._collect_from_list(resuming)
             
         console.print(f"找到 {len(self.article_urls)} 篇文章\n")
         
-    async def _collect_from_list(self):
+    async def _collect_from_list(self, resuming: bool = False):
         """从列表页收集链接"""
         selectors = self.page_structure.get('selectors', {})
         link_selector = selectors.get('article_links', 'article a')
         
         has_pagination = self.page_structure.get('pagination', {}).get('has_pagination', False)
         
-        if has_pagination and self.max_articles and self.max_articles > 10:
+        # 增量模式下翻页直到遇到已抓取的文章为止
+        if has_pagination and (self.incremental or (self.max_articles and self.max_articles > 10)):
             # 需要访问多页
-            await self._collect_with_pagination(link_selector)
+            await self._collect_with_pagination(link_selector, resuming)
         else:
             # 只从当前页收集
+            if resuming:
+                await self.browser.navigate(self.base_url)
             urls = await self.browser.get_links(link_selector)
-            self.article_urls.extend(urls)
+            await self._enqueue_links(urls)
             
-        # 去重
-        self.article_urls = list(dict.fromkeys(self.article_urls))
-        
-        # 应用数量限制
-        if self.max_articles:
-            self.article_urls = self.article_urls[:self.max_articles]
+    async def _enqueue_links(self, urls: List[str]):
+        """去重并应用数量限制后，将链接提交给流水线"""
+        for url in urls:
+            if url in self.article_urls:
+                continue
+            if self.max_articles and len(self.article_urls) >= self.max_articles:
+                break
+            self.article_urls.append(url)
+            await asyncio.to_thread(self.checkpoint.add_url, url)
+            await self.pipeline.submit_url(url)
     
     async def _collect_via_wp_api(self):
         """通过 WordPress API 获取文章（回退方案）"""
-        per_page = self.max_articles or 20
-        posts = fetch_wp_posts(self.base_url, per_page=per_page)
+        after = None
+        if self.incremental and self.storage.high_water_mark:
+            after = f"{self.storage.high_water_mark['date']}T00:00:00"
+            console.print(f"增量模式: 只获取 {after} 之后的文章")
+        # 未指定数量时只有增量模式（按日期限定范围）才获取全部新文章，否则沿用默认数量，
+        # 避免回退时把整个站点归档送去翻译
+        limit = self.max_articles or (None if after else WP_DEFAULT_LIMIT)
+        posts = await fetch_wp_posts(self.base_url, limit=limit, after=after)
         self.wp_posts = posts
-        self.article_urls = [p.get('url') for p in posts if p.get('url')]
+        
+        # WP 文章已有正文，跳过浏览器直接进入翻译阶段（恢复时跳过检查点中已有的文章）
+        for article in posts:
+            url = article.get('url')
+            if url and url in self.article_urls:
+                continue
+            content = article.get('content', '')
+            article['summary'] = content[:200] + '...' if len(content) > 200 else content
+            if url:
+                self.article_urls.append(url)
+                await asyncio.to_thread(self.checkpoint.add_url, url, EXTRACTED, article)
+            await self.pipeline.submit_article(article)
             
-    async def _collect_with_pagination(self, link_selector: str):
-        """从多页收集链接"""
+    async def _collect_with_pagination(self, link_selector: str, resuming: bool = False):
+        """从多页收集链接（每页收集完记录到检查点，恢复时从下一页继续）"""
         max_pages = 10
         
         if self.max_articles:
             articles_per_page = self.page_structure.get('article_count', 10)
             max_pages = min(max_pages, (self.max_articles // articles_per_page) + 1)
         
-        for page_num in range(1, max_pages + 1):
+        start_page = await asyncio.to_thread(self.checkpoint.get, 'pages_done', 0) + 1 if resuming else 1
+        if resuming:
+            if self.max_articles and len(self.article_urls) >= self.max_articles:
+                return
+            start_url = self.base_url if start_page == 1 else self._construct_next_page_url(start_page)
+            if not start_url or start_page > max_pages:
+                return
+            console.print(f"从第 {start_page} 页继续收集")
+            await self.browser.navigate(start_url)
+        
+        for page_num in range(start_page, max_pages + 1):
             urls = await self.browser.get_links(link_selector)
-            self.article_urls.extend(urls)
+            await self._enqueue_links(urls)
+            await asyncio.to_thread(self.checkpoint.set, 'pages_done', page_num)
             
             if self.max_articles and len(self.article_urls) >= self.max_articles:
                 break
                 
+            if self.incremental and self._reached_known_articles(urls):
+                console.print(f"增量模式: 第 {page_num} 页已到达已抓取的文章，停止翻页")
+                break
+                
             if page_num < max_pages:
                 next_url = self._construct_next_page_url(page_num + 1)
                 if next_url:
@@ -153,6 +294,15 @@ class NewsCrawlerAgent:
                 else:
                     break
                     
+    def _reached_known_articles(self, urls: List[str]) -> bool:
+        """列表页是否已到达已抓取的文章（全部已抓取，或包含高水位文章）"""
+        if not urls:
+            return True
+        hwm_url = (self.storage.high_water_mark or {}).get('url')
+        if hwm_url and hwm_url in urls:
+            return True
+        return all(self.storage.is_scraped(url) for url in urls)
+        
     def _construct_next_page_url(self, page_num: int) -> Optional[str]:
         """构造下一页 URL"""
         # 简单的分页 URL 模式
@@ -173,73 +323,98 @@ class NewsCrawlerAgent:
         return None
         
     async def _extract_phase(self):
-        """阶段 3: 提取文章内容"""
+        """阶段 3: 等待流水线完成提取、翻译和保存"""
         console.print("开始提取...\n")
-        
-        # 回退：如果有 WP posts，直接保存而不使用浏览器
-        if self.wp_posts:
-            total = len(self.wp_posts)
-            for i, article in enumerate(self.wp_posts, 1):
-                # 验证与保存（将摘要加入）
-                content = article.get('content', '')
-                article['summary'] = content[:200] + '...' if len(content) > 200 else content
-                if self.saver.save(article):
-                    title = (article.get('title') or '')[:50]
-                    console.print(f"[{i}/{total}] {title}")
-                else:
-                    console.print(f"[{i}/{total}] 失败: 保存错误")
-            return
-        
-        total = len(self.article_urls)
-        
-        for i, url in enumerate(self.article_urls, 1):
-            if self.storage.is_scraped(url):
-                console.print(f"[{i}/{total}] 跳过（已存在）")
-                continue
-                
-            success = await self.browser.navigate(url)
-            if not success:
-                console.print(f"[{i}/{total}] 失败: 无法访问")
-                continue
-                
-            html = await self.browser.get_html()
-            article = self.extractor.extract_article(url, html)
-            
-            if article:
-                if self.saver.save(article):
-                    title = article['title'][:50]
-                    console.print(f"[{i}/{total}] {title}")
-            else:
-                console.print(f"[{i}/{total}] 失败: 提取错误")
+        await self.pipeline.join()
         
     def _summary_phase(self):
         """阶段 4: 总结"""
         console.print()
         self.saver.print_summary()
+        self.storage.save_high_water_mark()
         
         stats = self.storage.get_stats()
         console.print(f"\n保存位置: {stats['storage_path']}")
         console.print(f"文件大小: {stats['file_size']}")
+        
+        # 多站点时缓存和翻译记忆在合并总结中打印一次
+        if self.shared_browser is None:
+            print_shared_stats()
+            
+    def get_summary(self) -> Dict:
+        """获取本站点的爬取摘要（用于多站点合并总结）"""
+        return {
+            'url': self.base_url,
+            'domain': self.storage.domain,
+            'found': len(self.article_urls),
+            **self.saver.get_summary(),
+            'http': self.fetcher.http_count if self.fetcher else 0,
+            'browser': self.fetcher.browser_count if self.fetcher else 0,
+            'storage_path': str(self.storage.website_dir),
+        }
+
+
+def print_shared_stats():
+    """打印共用组件的统计（LLM 网关、LLM 缓存、翻译记忆、HTML 归档）"""
+    gateway_stats = get_llm_gateway().stats()
+    console.print(
+        f"LLM 调用: {gateway_stats['calls']} 次, 重试 {gateway_stats['retries']} 次, "
+        f"失败 {gateway_stats['failures']} 次, 约 {gateway_stats['tokens']} tokens"
+    )
+    
+    cache = get_llm_cache()
+    if cache:
+        cache_stats = cache.stats()
+        console.print(
+            f"LLM 缓存: 命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']} "
+            f"(命中率 {cache_stats['hit_rate']}, 占用 {cache_stats['size']})"
+        )
+    
+    memory = get_translation_memory()
+    if memory:
+        tm_stats = memory.stats()
+        console.print(
+            f"翻译记忆: 命中 {tm_stats['hits']} / 未命中 {tm_stats['misses']}，参考译文 {tm_stats['fuzzy_hits']} "
+            f"(片段 {tm_stats['segments']}, 术语 {tm_stats['terms']})"
+        )
+    
+    archive = get_html_archive()
+    if archive:
+        archive_stats = archive.stats()
+        console.print(
+            f"HTML 归档: {archive_stats['urls']} 个页面, {archive_stats['snapshots']} 个快照 "
+            f"(占用 {archive_stats['size']}, 压缩比 {archive_stats['ratio']})"
+        )
 
 
-async def run_crawler(url: str, max_articles: Optional[int] = None):
+async def run_crawler(url: str, max_articles: Optional[int] = None, incremental: bool = False,
+                      resume: bool = False):
     """
     运行爬虫（异步）
     
     Args:
         url: 起始 URL
         max_articles: 最大文章数量
+        incremental: 增量模式
+        resume: 从上次中断处继续
     """
-    agent = NewsCrawlerAgent(url, max_articles)
-    await agent.run()
+    agent = NewsCrawlerAgent(url, max_articles, incremental=incremental, resume=resume)
+    try:
+        await agent.run()
+    finally:
+        shutdown_parse_pool()
+        await close_llm_gateway()
 
 
-def run_crawler_sync(url: str, max_articles: Optional[int] = None):
+def run_crawler_sync(url: str, max_articles: Optional[int] = None, incremental: bool = False,
+                     resume: bool = False):
     """
     运行爬虫（同步）
     
     Args:
         url: 起始 URL
         max_articles: 最大文章数量
+        incremental: 增量模式
+        resume: 从上次中断处继续
     """
-    asyncio.run(run_crawler(url, max_articles))
+    asyncio.run(run_crawler(url, max_articles, incremental, resume))
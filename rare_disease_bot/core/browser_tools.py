@@ -1,9 +1,12 @@
 """浏览器工具集 - 支持反 Cloudflare"""
 import asyncio
+import json
 import time
 import random
-from typing import Optional, List
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from contextlib import asynccontextmanager
+from typing import Optional, List, Iterable
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Browser, Page, BrowserContext, Route
 from playwright_stealth import Stealth
 from rich.console import Console
 
@@ -16,20 +19,140 @@ from config.settings import (
     STORAGE_STATE_PATH,
     PERSISTENT_CONTEXT,
     USER_DATA_DIR,
+    BROWSER_POOL_SIZE,
+    BLOCK_RESOURCES,
+    BLOCKED_RESOURCE_TYPES,
+    BLOCKED_DOMAINS,
+    ALLOWED_DOMAINS,
+    READY_TIMEOUT,
+    READY_POLL_INTERVAL,
+    READY_MIN_TEXT_LENGTH,
 )
+from utils.scheduler import HostScheduler, get_scheduler, parse_retry_after
 
 console = Console()
 
 
+# Cloudflare 验证页面的内容特征
+CLOUDFLARE_MARKERS = ['Checking your browser', 'cf-browser-verification', 'cf-chl', 'challenges.cloudflare.com']
+
+# 在页面内检查特征，避免把整页 HTML 传回 Python
+_CLOUDFLARE_PROBE_JS = """
+(markers) => {
+    const html = document.documentElement ? document.documentElement.outerHTML : '';
+    return markers.some((m) => html.includes(m));
+}
+"""
+
+
+def looks_like_cloudflare(title: str, content: str) -> bool:
+    """
+    根据标题和页面内容判断是否是 Cloudflare 验证页面
+    
+    Args:
+        title: 页面标题
+        content: 页面 HTML
+        
+    Returns:
+        bool: 是否是验证页面
+    """
+    # 检查标题
+    title = (title or '').lower()
+    if 'cloudflare' in title or 'just a moment' in title:
+        return True
+        
+    # 检查页面内容（含 Turnstile 相关标识）
+    if any(marker in content for marker in CLOUDFLARE_MARKERS):
+        return True
+        
+    return False
+
+
+class ResourceBlockPolicy:
+    """资源拦截策略 - 屏蔽图片、字体、媒体和第三方追踪脚本"""
+    
+    def __init__(self, blocked_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 blocked_domains: Iterable[str] = BLOCKED_DOMAINS,
+                 allowed_domains: Iterable[str] = ALLOWED_DOMAINS):
+        """
+        Args:
+            blocked_types: 屏蔽的资源类型（Playwright resource_type，如 image/font/media）
+            blocked_domains: 屏蔽的域名（包含子域名）
+            allowed_domains: 始终放行的域名（优先于屏蔽规则）
+        """
+        self.blocked_types = {t.strip() for t in blocked_types if t.strip()}
+        self.blocked_domains = [d.strip().lower() for d in blocked_domains if d.strip()]
+        self.allowed_domains = [d.strip().lower() for d in allowed_domains if d.strip()]
+        self.blocked_count = 0
+        
+    @staticmethod
+    def _match_domain(host: str, domains: List[str]) -> bool:
+        """判断 host 是否属于域名列表（含子域名）"""
+        return any(host == d or host.endswith('.' + d) for d in domains)
+        
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """判断请求是否应被拦截"""
+        host = (urlparse(url).hostname or '').lower()
+        
+        # Cloudflare 验证相关请求始终放行（包括同源的 /cdn-cgi/ 路径）
+        if self._match_domain(host, self.allowed_domains) or '/cdn-cgi/' in url:
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return self._match_domain(host, self.blocked_domains)
+        
+    async def handle(self, route: Route):
+        """Playwright 路由处理函数"""
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked_count += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+
 class BrowserManager:
-    """浏览器管理器 - 处理 Cloudflare 和页面操作"""
+    """
+    浏览器管理器 - 处理 Cloudflare 和页面操作
+    
+    多站点时只启动一个浏览器进程，每个站点通过 new_session() 获得
+    独立的上下文和页面池（Cookie、页面互不影响），调度器和资源拦截策略共用。
+    """
     
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None,
+                 resource_policy: Optional[ResourceBlockPolicy] = None,
+                 scheduler: Optional[HostScheduler] = None,
+                 parent: Optional['BrowserManager'] = None):
+        """
+        初始化浏览器管理器
+        
+        Args:
+            pool_size: 页面池大小（并发提取用），默认使用 BROWSER_POOL_SIZE
+            resource_policy: 资源拦截策略，默认按配置创建（BLOCK_RESOURCES=false 时不拦截）
+            scheduler: 按域名的礼貌调度器，默认使用全局共享实例
+            parent: 所属的浏览器管理器（站点会话复用其浏览器进程，由 new_session() 创建）
+        """
+        self.parent = parent
+        self._owns_context = True
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         
+        # 页面池：与主页面共享同一个上下文（Cookie / 存储状态）
+        self.pool_size = max(1, pool_size or BROWSER_POOL_SIZE)
+        self.pool_pages: List[Page] = []
+        self._idle_pages: Optional[asyncio.Queue] = None
+        # storage state 文件所有会话共用，写入需要串行
+        self._state_lock = parent._state_lock if parent else asyncio.Lock()
+        
+        # 礼貌调度（限速、限并发、Retry-After），与 HTTP 抓取共用
+        self.scheduler = scheduler or get_scheduler()
+        
+        if resource_policy is None and BLOCK_RESOURCES:
+            resource_policy = ResourceBlockPolicy()
+        self.resource_policy = resource_policy
+        
     async def __aenter__(self):
         """异步上下文管理器入口"""
         await self.start()
@@ -40,7 +163,38 @@ class BrowserManager:
         await self.close()
         
     async def start(self):
-        """启动浏览器"""
+        """启动浏览器（站点会话只创建上下文和页面池）"""
+        if self.parent:
+            if self.parent.browser:
+                self.context = await self.parent._new_context()
+            else:
+                # 持久化上下文只能有一个，站点会话共用它，只使用独立的页面池
+                self.context = self.parent.context
+                self._owns_context = False
+        else:
+            await self._launch()
+        
+        # 资源拦截（作用于上下文中的所有页面，包括页面池）
+        if self.resource_policy and self._owns_context:
+            await self.context.route("**/*", self.resource_policy.handle)
+        
+        # 创建主页面（用于探索和列表页）
+        self.page = await self._new_page()
+        
+        # 创建页面池（用于并发提取文章）
+        self._idle_pages = asyncio.Queue()
+        for _ in range(self.pool_size):
+            page = await self._new_page()
+            self.pool_pages.append(page)
+            self._idle_pages.put_nowait(page)
+        
+        if self.parent:
+            console.log(f"[green]✓ 站点会话已创建（页面池: {self.pool_size}）[/green]")
+        else:
+            console.log(f"[green]✓ 浏览器启动成功（页面池: {self.pool_size}）[/green]")
+        
+    async def _launch(self):
+        """启动浏览器进程并创建默认上下文"""
         console.log("[cyan]🚀 启动浏览器...[/cyan]")
         
         self.playwright = await async_playwright().start()
@@ -71,54 +225,114 @@ class BrowserManager:
                 ],
                 proxy={ 'server': PROXY_SERVER } if PROXY_SERVER else None,
             )
+            self.context = await self._new_context()
             
-            # 创建上下文（自定义 User-Agent），尝试加载持久化的 storage state
-            storage_state = str(STORAGE_STATE_PATH) if STORAGE_STATE_PATH.exists() else None
-            self.context = await self.browser.new_context(
-                user_agent=USER_AGENT,
-                viewport={'width': 1280, 'height': 800},
-                locale='en-US',
-                timezone_id='America/New_York',
-                extra_http_headers={
-                    'Accept-Language': 'en-US,en;q=0.9',
-                },
-                storage_state=storage_state,
-            )
+    async def _new_context(self) -> BrowserContext:
+        """创建上下文（自定义 User-Agent），尝试加载持久化的 storage state"""
+        storage_state = str(STORAGE_STATE_PATH) if STORAGE_STATE_PATH.exists() else None
+        return await self.browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={'width': 1280, 'height': 800},
+            locale='en-US',
+            timezone_id='America/New_York',
+            extra_http_headers={
+                'Accept-Language': 'en-US,en;q=0.9',
+            },
+            storage_state=storage_state,
+        )
         
-        # 创建页面
-        self.page = await self.context.new_page()
+    async def new_session(self, pool_size: Optional[int] = None) -> 'BrowserManager':
+        """
+        为一个站点创建会话（共用浏览器进程、调度器和资源拦截策略）
         
-        # 应用反检测
+        Args:
+            pool_size: 会话的页面池大小，默认与当前管理器相同
+            
+        Returns:
+            BrowserManager: 已启动的站点会话，用完后调用 close()（不会关闭浏览器进程）
+        """
+        if self.parent:
+            return await self.parent.new_session(pool_size)
+        if not self.context:
+            raise RuntimeError("浏览器未启动")
+        session = BrowserManager(
+            pool_size=pool_size or self.pool_size,
+            resource_policy=self.resource_policy,
+            scheduler=self.scheduler,
+            parent=self,
+        )
+        await session.start()
+        return session
+        
+    async def _new_page(self) -> Page:
+        """在共享上下文中创建页面并应用反检测"""
+        page = await self.context.new_page()
         stealth_config = Stealth()
-        await stealth_config.apply_stealth_async(self.page)
+        await stealth_config.apply_stealth_async(page)
+        return page
         
-        console.log("[green]✓ 浏览器启动成功[/green]")
+    @asynccontextmanager
+    async def acquire_page(self, url: str):
+        """
+        从页面池借用一个页面（受单域名并发限制）
+        
+        Args:
+            url: 将要访问的 URL（用于确定域名）
+            
+        Yields:
+            Page: 空闲页面，退出时自动归还
+        """
+        if self._idle_pages is None:
+            raise RuntimeError("浏览器未启动")
+            
+        async with self.scheduler.concurrency(url):
+            page = await self._idle_pages.get()
+            try:
+                yield page
+            finally:
+                self._idle_pages.put_nowait(page)
         
     async def close(self):
-        """关闭浏览器"""
+        """关闭浏览器（站点会话只关闭自己的页面和上下文）"""
+        if self.resource_policy and not self.parent:
+            console.log(f"[cyan]已拦截 {self.resource_policy.blocked_count} 个资源请求[/cyan]")
+        for page in self.pool_pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self.pool_pages = []
         if self.page:
             await self.page.close()
-        if self.context:
+            self.page = None
+        if self.context and self._owns_context:
             await self.context.close()
+        self.context = None
         if self.browser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
             
-        console.log("[yellow]✓ 浏览器已关闭[/yellow]")
+        if not self.parent:
+            console.log("[yellow]✓ 浏览器已关闭[/yellow]")
         
-    async def navigate(self, url: str, wait_time: Optional[int] = None) -> bool:
+    async def navigate(self, url: str, wait_time: Optional[int] = None,
+                       page: Optional[Page] = None,
+                       ready_selector: Optional[str] = None) -> bool:
         """
         导航到 URL
         
         Args:
             url: 目标 URL
-            wait_time: 等待时间（秒），默认使用 DEFAULT_WAIT_TIME
+            wait_time: Cloudflare 验证等待时间（秒），默认使用 DEFAULT_WAIT_TIME
+            page: 使用的页面（默认主页面，并发时传入页面池中的页面）
+            ready_selector: 内容选择器，出现即认为页面就绪；不传则等待 DOM 稳定
             
         Returns:
             bool: 是否成功
         """
-        if not self.page:
+        page = page or self.page
+        if not page:
             raise RuntimeError("浏览器未启动")
             
         wait_time = wait_time or DEFAULT_WAIT_TIME
@@ -131,17 +345,25 @@ class BrowserManager:
             base_wait = wait_time
 
             while retries <= MAX_RETRIES:
+                # 等待该域名的请求配额（礼貌调度，与页面就绪检测分开）
+                await self.scheduler.wait_turn(url)
+                
                 # 导航到页面
-                await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
-                # 等待网络空闲，提高稳定性
-                try:
-                    await self.page.wait_for_load_state('networkidle', timeout=15000)
-                except Exception:
-                    # 某些站点不会进入 networkidle，忽略
-                    pass
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                
+                # 限流响应：按 Retry-After 暂停该域名后重试
+                if response and response.status in (429, 503):
+                    retry_after = parse_retry_after(response.headers.get('retry-after'))
+                    if response.status == 429 or retry_after:
+                        retries += 1
+                        if retries > MAX_RETRIES:
+                            console.log(f"[red]✗ 被限流（HTTP {response.status}），已达到最大重试次数[/red]")
+                            return False
+                        self.scheduler.defer(url, retry_after or DEFAULT_WAIT_TIME * retries)
+                        continue
 
                 # 检测 Cloudflare 验证页面
-                is_cloudflare = await self._detect_cloudflare()
+                is_cloudflare = await self._detect_cloudflare(page)
 
                 if is_cloudflare:
                     # 动态等待时间，加入随机抖动
@@ -150,26 +372,32 @@ class BrowserManager:
                     console.log(f"[yellow]⚠️  检测到 Cloudflare 验证，等待 {wait_sec} 秒...[/yellow]")
                     await asyncio.sleep(wait_sec)
 
+                    try:
+                        await page.wait_for_load_state('networkidle', timeout=15000)
+                    except Exception:
+                        # 某些站点不会进入 networkidle，忽略
+                        pass
+
                     # 等待挑战 iframe（Turnstile）出现并运行
                     try:
-                        await self.page.wait_for_selector('iframe[src*="challenges.cloudflare.com"]', timeout=10000)
+                        await page.wait_for_selector('iframe[src*="challenges.cloudflare.com"]', timeout=10000)
                         # 给挑战执行时间
                         await asyncio.sleep(random.uniform(5, 10))
                     except Exception:
                         pass
 
                     # 模拟人类行为：轻微鼠标移动与滚动
-                    await self._mimic_human_activity()
+                    await self._mimic_human_activity(page)
 
                     # 提示人工介入（在有界面模式下）
                     console.log("[yellow]🖐️ 请在浏览器窗口完成 Cloudflare 验证（最多 60 秒）[/yellow]")
                     for _ in range(30):
                         await asyncio.sleep(2)
-                        if not await self._detect_cloudflare():
+                        if not await self._detect_cloudflare(page):
                             break
 
                     # 再次检测
-                    is_cloudflare = await self._detect_cloudflare()
+                    is_cloudflare = await self._detect_cloudflare(page)
                     if is_cloudflare:
                         retries += 1
                         if retries > MAX_RETRIES:
@@ -178,9 +406,9 @@ class BrowserManager:
                         console.log(f"[yellow]↻ 重试第 {retries} 次，尝试刷新页面[/yellow]")
                         # 刷新并继续循环
                         try:
-                            await self.page.reload(wait_until='domcontentloaded')
+                            await page.reload(wait_until='domcontentloaded')
                             try:
-                                await self.page.wait_for_load_state('networkidle', timeout=10000)
+                                await page.wait_for_load_state('networkidle', timeout=10000)
                             except Exception:
                                 pass
                         except Exception:
@@ -190,16 +418,13 @@ class BrowserManager:
                         await asyncio.sleep(2)
                         continue
                 else:
-                    # 正常页面也等待一下，加入轻微抖动
-                    jitter = random.uniform(0.1, 0.3)
-                    wait_sec = int((base_wait or DEFAULT_WAIT_TIME) * (1 + jitter))
-                    console.log(f"[cyan]⏳ 等待 {wait_sec} 秒...[/cyan]")
-                    await asyncio.sleep(wait_sec)
+                    # 正常页面：内容出现或 DOM 稳定后立即返回
+                    await self._wait_until_ready(page, ready_selector)
 
                 console.log("[green]✓ 页面加载完成[/green]")
                 # 通过后保存 storage state（包含 Cookie）供下次复用
                 try:
-                    await self.context.storage_state(path=str(STORAGE_STATE_PATH))
+                    await self._save_storage_state()
                 except Exception:
                     pass
                 return True
@@ -211,57 +436,118 @@ class BrowserManager:
             console.log(f"[red]✗ 导航失败: {e}[/red]")
             return False
             
-    async def _detect_cloudflare(self) -> bool:
-        """检测是否是 Cloudflare 验证页面"""
-        try:
-            # 检查标题
-            title = await self.page.title()
-            if 'cloudflare' in title.lower() or 'just a moment' in title.lower():
+    async def _save_storage_state(self):
+        """
+        保存 storage state
+        
+        多个页面并发导航时串行写入，避免文件损坏；
+        与文件中已有的状态合并，多站点会话各自的 Cookie 不会互相覆盖。
+        """
+        async with self._state_lock:
+            state = await self.context.storage_state()
+            if self.parent and STORAGE_STATE_PATH.exists():
+                with open(STORAGE_STATE_PATH, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                cookies = {(c['name'], c.get('domain'), c.get('path')): c for c in saved.get('cookies', [])}
+                cookies.update({(c['name'], c.get('domain'), c.get('path')): c for c in state['cookies']})
+                origins = {o['origin']: o for o in saved.get('origins', [])}
+                origins.update({o['origin']: o for o in state.get('origins', [])})
+                state = {'cookies': list(cookies.values()), 'origins': list(origins.values())}
+            STORAGE_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = STORAGE_STATE_PATH.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            tmp_path.replace(STORAGE_STATE_PATH)
+            
+    async def _wait_until_ready(self, page: Page, ready_selector: Optional[str] = None,
+                                timeout: float = READY_TIMEOUT,
+                                min_length: int = READY_MIN_TEXT_LENGTH) -> bool:
+        """
+        等待页面就绪
+
+        有内容选择器时等待任一匹配的容器包含至少 min_length 个字符；
+        否则轮询 DOM 大小，连续两次不变即认为稳定。
+
+        Returns:
+            bool: 是否在超时前就绪
+        """
+        if ready_selector:
+            try:
+                await page.wait_for_function(
+                    "([selector, minLength]) => Array.from(document.querySelectorAll(selector))"
+                    ".some(el => (el.textContent || '').trim().length >= minLength)",
+                    arg=[ready_selector, min_length],
+                    timeout=timeout * 1000,
+                )
                 return True
+            except Exception:
+                console.log(f"[yellow]⚠️  等待内容超时: {ready_selector[:60]}[/yellow]")
+                return False
                 
-            # 检查页面内容
-            content = await self.page.content()
-            if 'Checking your browser' in content or 'cf-browser-verification' in content:
-                return True
-            # Turnstile 相关标识
-            if 'cf-chl' in content or 'challenges.cloudflare.com' in content:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        last_size = -1
+        stable_checks = 0
+        while loop.time() < deadline:
+            try:
+                size = await page.evaluate('document.body ? document.body.innerHTML.length : 0')
+            except Exception:
+                size = -1
+            if size > 0 and size == last_size:
+                stable_checks += 1
+                if stable_checks >= 2:
+                    return True
+            else:
+                stable_checks = 0
+            last_size = size
+            await asyncio.sleep(READY_POLL_INTERVAL)
+        return False
+            
+    async def _detect_cloudflare(self, page: Optional[Page] = None) -> bool:
+        """检测是否是 Cloudflare 验证页面"""
+        page = page or self.page
+        try:
+            title = await page.title()
+            if looks_like_cloudflare(title, ''):
                 return True
-                
-            return False
+            return bool(await page.evaluate(_CLOUDFLARE_PROBE_JS, CLOUDFLARE_MARKERS))
         except:
             return False
 
-    async def _mimic_human_activity(self):
+    async def _mimic_human_activity(self, page: Optional[Page] = None):
         """模拟人类行为以降低风控：鼠标移动与轻微滚动"""
+        page = page or self.page
         try:
             # 随机鼠标移动
             for _ in range(5):
                 x = random.randint(50, 1200)
                 y = random.randint(50, 700)
-                await self.page.mouse.move(x, y, steps=random.randint(5, 15))
+                await page.mouse.move(x, y, steps=random.randint(5, 15))
                 await asyncio.sleep(random.uniform(0.05, 0.2))
 
             # 轻微滚动
             for _ in range(3):
-                await self.page.evaluate('window.scrollBy(0, Math.random()*200)')
+                await page.evaluate('window.scrollBy(0, Math.random()*200)')
                 await asyncio.sleep(random.uniform(0.2, 0.6))
         except Exception:
             pass
             
-    async def get_html(self, max_length: Optional[int] = None) -> str:
+    async def get_html(self, max_length: Optional[int] = None, page: Optional[Page] = None) -> str:
         """
         获取页面 HTML
         
         Args:
             max_length: 最大长度（用于大模型分析）
+            page: 页面（默认主页面）
             
         Returns:
             str: HTML 内容
         """
-        if not self.page:
+        page = page or self.page
+        if not page:
             raise RuntimeError("浏览器未启动")
             
-        html = await self.page.content()
+        html = await page.content()
         
         if max_length and len(html) > max_length:
             html = html[:max_length]
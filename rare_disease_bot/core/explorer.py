@@ -1,33 +1,31 @@
 """网站结构探索器 - 使用 Qwen3-max 分析页面结构"""
 import json
-from typing import Dict, Optional
-from langchain_openai import ChatOpenAI
+from typing import Dict, Optional, Union
 from langchain.prompts import ChatPromptTemplate
 from rich.console import Console
 
 from config.settings import (
-    OPENAI_API_BASE,
-    OPENAI_API_KEY,
-    MODEL_NAME,
-    LLM_TEMPERATURE
+    SITE_PROFILE_MIN_LINKS,
+    SITE_PROFILE_MAX_LINKS,
 )
+from utils.document import ParsedDocument, get_text
 from utils.helpers import clean_html, truncate_text
+from utils.parse_pool import get_parse_pool
+from utils.llm_gateway import get_llm_gateway
 
 console = Console()
 
+# 提示词版本（修改提示词后递增，使 LLM 缓存失效）
+PROMPT_VERSION = "1"
+
 
 class WebsiteExplorer:
     """网站结构探索器"""
     
     def __init__(self):
         """初始化探索器"""
-        # 初始化 LLM
-        self.llm = ChatOpenAI(
-            model=MODEL_NAME,
-            openai_api_base=OPENAI_API_BASE,
-            openai_api_key=OPENAI_API_KEY,
-            temperature=LLM_TEMPERATURE
-        )
+        # LLM（经由共享网关，带持久化缓存）
+        self.llm = get_llm_gateway().chat_model("explorer", PROMPT_VERSION)
         
         # 分析提示词
         self.analysis_prompt = ChatPromptTemplate.from_messages([
@@ -84,135 +82,215 @@ class WebsiteExplorer:
             ("user", "URL: {url}\n\nHTML（前30000字符）:\n{html}")
         ])
         
-    def analyze_page_structure(self, url: str, html: str) -> Dict:
+    def analyze_page_structure(self, url: str, html: Union[str, ParsedDocument]) -> Dict:
         """
         分析页面结构
         
         Args:
             url: 页面 URL
-            html: HTML 内容
+            html: HTML 内容或已解析的文档
             
         Returns:
             Dict: 页面结构信息
         """
         console.log("[cyan]🔍 分析页面结构...[/cyan]")
+        doc = ParsedDocument.ensure(html, url)
         
         try:
-            # 截断 HTML（避免超过 token 限制）
-            html_truncated = truncate_text(html, 30000)
-            
-            # 调用 LLM 分析
-            messages = self.analysis_prompt.format_messages(
-                url=url,
-                html=html_truncated
-            )
-            
-            response = self.llm.invoke(messages)
-            content = response.content.strip()
-            
-            # 提取 JSON
-            # 有时 LLM 会用 ```json 包裹，需要清理
-            if '```json' in content:
-                content = content.split('```json')[1].split('```')[0].strip()
-            elif '```' in content:
-                content = content.split('```')[1].split('```')[0].strip()
-                
-            # 解析 JSON
-            result = json.loads(content)
+            response = self.llm.invoke(self._analysis_messages(url, doc))
+            return self._parse_analysis(response.content)
+        except json.JSONDecodeError:
+            return self._fallback_analysis(doc)
+        except Exception as e:
+            console.log(f"[red]✗ 分析失败: {e}[/red]")
+            return self._fallback_analysis(doc)
             
-            console.log(f"[green]✓ 页面类型: {result.get('page_type')}[/green]")
-            console.log(f"[green]✓ 文章数量: {result.get('article_count')}[/green]")
+    async def aanalyze_page_structure(self, url: str, html: Union[str, ParsedDocument]) -> Dict:
+        """
+        分析页面结构（异步，经由 LLM 网关调用，回退分析在解析进程池中执行）
+        
+        Args:
+            url: 页面 URL
+            html: HTML 内容或已解析的文档
             
-            if result.get('pagination', {}).get('has_pagination'):
-                total = result['pagination'].get('total_pages', '未知')
-                console.log(f"[green]✓ 分页: 是 (共 {total} 页)[/green]")
+        Returns:
+            Dict: 页面结构信息
+        """
+        console.log("[cyan]🔍 分析页面结构...[/cyan]")
+        doc = ParsedDocument.ensure(html, url)
+        
+        try:
+            response = await self.llm.ainvoke(self._analysis_messages(url, doc))
+            return self._parse_analysis(response.content)
+        except json.JSONDecodeError:
+            return await self._afallback_analysis(doc)
+        except Exception as e:
+            console.log(f"[red]✗ 分析失败: {e}[/red]")
+            return await self._afallback_analysis(doc)
             
-            return result
+    def _analysis_messages(self, url: str, doc: ParsedDocument):
+        """构造分析提示词（截断 HTML，避免超过 token 限制）"""
+        return self.analysis_prompt.format_messages(
+            url=url,
+            html=truncate_text(doc.html, 30000)
+        )
+        
+    def _parse_analysis(self, content: str) -> Dict:
+        """解析 LLM 返回的页面结构（JSON 无效时抛出 json.JSONDecodeError）"""
+        content = content.strip()
+        
+        # 提取 JSON
+        # 有时 LLM 会用 ```json 包裹，需要清理
+        if '```json' in content:
+            content = content.split('```json')[1].split('```')[0].strip()
+        elif '```' in content:
+            content = content.split('```')[1].split('```')[0].strip()
             
+        try:
+            result = json.loads(content)
         except json.JSONDecodeError as e:
             console.log(f"[red]✗ JSON 解析失败: {e}[/red]")
             console.log(f"[yellow]原始响应: {content[:500]}[/yellow]")
-            return self._fallback_analysis(html)
-            
-        except Exception as e:
-            console.log(f"[red]✗ 分析失败: {e}[/red]")
-            return self._fallback_analysis(html)
+            raise
             
-    def _fallback_analysis(self, html: str) -> Dict:
-        """回退分析（简单规则）"""
-        console.log("[yellow]⚠️  使用回退分析策略[/yellow]")
-        
-        # 简单的启发式分析
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'lxml')
+        console.log(f"[green]✓ 页面类型: {result.get('page_type')}[/green]")
+        console.log(f"[green]✓ 文章数量: {result.get('article_count')}[/green]")
         
-        # 查找常见的文章链接
-        article_links = []
+        if result.get('pagination', {}).get('has_pagination'):
+            total = result['pagination'].get('total_pages', '未知')
+            console.log(f"[green]✓ 分页: 是 (共 {total} 页)[/green]")
         
-        # 尝试多种选择器（按优先级排序）
-        selectors = [
-            'article h4 a',  # rarediseases.org 使用这个
-            'h4 a',
-            'article h3 a',
-            'h3 a',
-            'article h2 a',
-            'h2 a',
-            '.post-title a',
-            '.entry-title a',
-            'article a',
-            '.post a',
-            '.news-item a',
-            '.article-title a'
-        ]
+        return result
+            
+    def validate_structure(self, structure: Dict, html: Union[str, ParsedDocument]) -> bool:
+        """
+        校验缓存的页面结构是否仍然适用于当前页面
         
-        best_selector = None
-        max_links = 0
-        best_links = []
+        列表页：文章链接选择器匹配的链接数量需在合理范围内；
+        单篇文章页直接视为有效。
         
+        Args:
+            structure: 缓存的页面结构
+            html: 当前页面 HTML 或已解析的文档
+            
+        Returns:
+            bool: 是否有效
+        """
+        page_type = structure.get('page_type')
+        if page_type == 'single_article':
+            return True
+        if page_type == 'fallback_wp_api' or structure.get('fallback'):
+            # 旧版本可能缓存了回退分析的结果
+            return False
+            
+        selector = structure.get('selectors', {}).get('article_links')
+        if not selector:
+            return False
+            
+        doc = ParsedDocument.ensure(html)
+        try:
+            links = [link for link in doc.select(selector) if link.get('href')]
+        except Exception:
+            return False
+            
+        valid = SITE_PROFILE_MIN_LINKS <= len(links) <= SITE_PROFILE_MAX_LINKS
+        if not valid:
+            console.log(f"[yellow]⚠️  缓存的选择器 '{selector}' 匹配 {len(links)} 个链接，重新分析[/yellow]")
+        return valid
+            
+    def _fallback_analysis(self, html: Union[str, ParsedDocument]) -> Dict:
+        """回退分析（简单规则，在解析进程池中执行；结果标记 fallback，不写入站点结构缓存）"""
+        console.log("[yellow]⚠️  使用回退分析策略[/yellow]")
+        doc = ParsedDocument.ensure(html)
+        return {**get_parse_pool().call(fallback_analysis, doc.html.encode('utf-8')), 'fallback': True}
+
+    async def _afallback_analysis(self, html: Union[str, ParsedDocument]) -> Dict:
+        """回退分析（异步，不阻塞事件循环）"""
+        console.log("[yellow]⚠️  使用回退分析策略[/yellow]")
+        doc = ParsedDocument.ensure(html)
+        return {**await get_parse_pool().run(fallback_analysis, doc.html.encode('utf-8')), 'fallback': True}
+
+
+def fallback_analysis(html: Union[str, bytes, ParsedDocument]) -> Dict:
+    """
+    回退分析（简单规则，不调用 LLM，可在解析进程池中执行）
+
+    Args:
+        html: 列表页 HTML（字节串、字符串或已解析的文档）
+
+    Returns:
+        Dict: 页面结构信息
+    """
+    # 简单的启发式分析
+    doc = ParsedDocument.ensure(html)
+
+    # 查找常见的文章链接
+    article_links = []
+
+    # 尝试多种选择器（按优先级排序）
+    selectors = [
+        'article h4 a',  # rarediseases.org 使用这个
+        'h4 a',
+        'article h3 a',
+        'h3 a',
+        'article h2 a',
+        'h2 a',
+        '.post-title a',
+        '.entry-title a',
+        'article a',
+        '.post a',
+        '.news-item a',
+        '.article-title a'
+    ]
+
+    best_selector = None
+    max_links = 0
+    best_links = []
+
+    for selector in selectors:
+        try:
+            links = doc.select(selector)
+            # 过滤掉导航链接等，只保留真正的文章链接
+            valid_links = [
+                link for link in links 
+                if link.get('href') and 
+                ('http' in link.get('href') or link.get('href').startswith('/')) and
+                get_text(link).strip()  # 必须有文本
+            ]
+
+            # 选择数量合理的选择器（通常文章列表有5-20篇）
+            if 5 <= len(valid_links) <= 50 and len(valid_links) > max_links:
+                max_links = len(valid_links)
+                best_selector = selector
+                best_links = valid_links
+        except:
+            pass
+
+    # 如果没找到合适的，放宽条件
+    if not best_selector:
         for selector in selectors:
             try:
-                links = soup.select(selector)
-                # 过滤掉导航链接等，只保留真正的文章链接
-                valid_links = [
-                    link for link in links 
-                    if link.get('href') and 
-                    ('http' in link.get('href') or link.get('href').startswith('/')) and
-                    link.text.strip()  # 必须有文本
-                ]
-                
-                # 选择数量合理的选择器（通常文章列表有5-20篇）
-                if 5 <= len(valid_links) <= 50 and len(valid_links) > max_links:
-                    max_links = len(valid_links)
+                links = doc.select(selector)
+                if len(links) > max_links:
+                    max_links = len(links)
                     best_selector = selector
-                    best_links = valid_links
             except:
                 pass
-        
-        # 如果没找到合适的，放宽条件
-        if not best_selector:
-            for selector in selectors:
-                try:
-                    links = soup.select(selector)
-                    if len(links) > max_links:
-                        max_links = len(links)
-                        best_selector = selector
-                except:
-                    pass
-                
-        # 检测分页
-        has_pagination = bool(soup.select('.pagination, .pager, .page-numbers'))
-        
-        console.log(f"[cyan]回退分析: 选择器='{best_selector}', 链接数={max_links}[/cyan]")
-        
-        return {
-            'page_type': 'article_list' if max_links > 3 else 'single_article',
-            'article_count': max_links,
-            'selectors': {
-                'article_links': best_selector or 'a'
-            },
-            'pagination': {
-                'has_pagination': has_pagination,
-                'total_pages': None
-            },
-            'notes': '使用回退分析'
-        }
+
+    # 检测分页
+    has_pagination = bool(doc.select('.pagination, .pager, .page-numbers'))
+
+    console.log(f"[cyan]回退分析: 选择器='{best_selector}', 链接数={max_links}[/cyan]")
+
+    return {
+        'page_type': 'article_list' if max_links > 3 else 'single_article',
+        'article_count': max_links,
+        'selectors': {
+            'article_links': best_selector or 'a'
+        },
+        'pagination': {
+            'has_pagination': has_pagination,
+            'total_pages': None
+        },
+        'notes': '使用回退分析'
+    }
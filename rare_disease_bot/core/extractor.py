@@ -1,34 +1,191 @@
-"""内容提取器 - 混合策略：BeautifulSoup 提取正文 + LLM 提取元数据"""
+"""内容提取器 - 混合策略：lxml 提取正文 + 规则/LLM 提取元数据"""
 import json
-from typing import Dict, Optional
-from langchain_openai import ChatOpenAI
+import re
+from typing import Dict, List, Optional, Union
 from langchain.prompts import ChatPromptTemplate
 from rich.console import Console
-from bs4 import BeautifulSoup
 
-from config.settings import (
-    OPENAI_API_BASE,
-    OPENAI_API_KEY,
-    MODEL_NAME,
-    LLM_TEMPERATURE
-)
+from core.metadata import extract_metadata
+from core.readability import exclusion_check, find_content_node, split_selector
+from utils.document import ParsedDocument, get_text
 from utils.helpers import truncate_text, validate_article
+from utils.llm_gateway import get_llm_gateway
+from utils.parse_pool import get_parse_pool
 
 console = Console()
 
+# 提示词版本（修改提示词后递增，使 LLM 缓存失效）
+PROMPT_VERSION = "1"
+
+# 正文选择器（按优先级）
+CONTENT_SELECTORS = [
+    'article .entry-content',
+    '.entry-content',
+    'article .post-content',
+    '.post-content',
+    'article .article-content',
+    '.article-content',
+    'article',  # article 标签本身通常就是正文
+    '.content',
+    'main article',
+    'main',
+]
+
+# 页面就绪检测用的组合选择器：只包含特定的正文容器，
+# article / main / .content 这类通用标签在页面外壳中就存在，不能说明正文已加载
+CONTENT_READY_SELECTOR = '.entry-content, .post-content, .article-content'
+
+# 查找正文之前排除的区域
+EXCLUDED_SELECTOR = 'script, style, nav, header, footer, aside, iframe, noscript, .sidebar, .navigation, .menu, .comments'
+
+# 正文容器内部需要移除的区域
+UNWANTED_SELECTOR = '.related, .share, .social, .advertisement, .ad, .author-box, .tags'
+
+# 按段落提取的标签
+PARAGRAPH_TAGS = ('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li')
+
+# 短段落中出现这些文本时视为导航
+NAV_TEXT_RE = re.compile(r'click here|read more|learn more|subscribe|follow us', re.IGNORECASE)
+
+
+# _clean_copy 默认移除的标签和 class（评分路径遍历时据此跳过段落）
+_CLEAN_FILTER = tuple(
+    a | b for a, b in zip(split_selector(EXCLUDED_SELECTOR), split_selector(UNWANTED_SELECTOR))
+)
+
+
+def _clean_copy(doc: ParsedDocument, elem, selector: str = f"{EXCLUDED_SELECTOR}, {UNWANTED_SELECTOR}"):
+    """复制元素并移除其中不需要的节点（不影响共享的文档树）"""
+    elem = doc.copy_element(elem)
+    for unwanted in doc.select(selector, elem):
+        if unwanted is not elem:
+            unwanted.drop_tree()
+    return elem
+
+
+def _collect_paragraphs(elem, is_excluded=None) -> List[str]:
+    """按文档顺序收集段落文本（过滤太短的内容和导航文本，跳过排除区域内的段落）"""
+    paragraphs = []
+    for tag in elem.iterdescendants(*PARAGRAPH_TAGS):
+        if is_excluded and is_excluded(tag):
+            continue
+        text = get_text(tag, strip=True)
+        # 过滤太短的内容，以及短的导航文本（如 "Read more"）
+        if len(text) <= 15 or (len(text) < 50 and NAV_TEXT_RE.search(text)):
+            continue
+        paragraphs.append(text)
+    return paragraphs
+
+
+def _score_content_paragraphs(doc: ParsedDocument) -> Optional[List[str]]:
+    """
+    使用 Readability 风格评分定位正文容器，并直接在共享树上收集段落
+
+    不复制容器、不执行清理选择器：需要移除的区域在遍历段落时按祖先链跳过
+    （结果按节点缓存），正文长度由收集到的段落计算，不再对整个容器取一次文本。
+    """
+    node = find_content_node(doc)
+    if node is None:
+        return None
+    paragraphs = _collect_paragraphs(node, exclusion_check(*_CLEAN_FILTER))
+    length = len('\n\n'.join(paragraphs))
+    if length <= 200:
+        return None
+    console.log(f"[cyan]    评分定位正文: <{node.tag} class=\"{node.get('class') or ''}\">, 长度: {length}[/cyan]")
+    return paragraphs
+
+
+def _select_content_element(doc: ParsedDocument):
+    """按 CONTENT_SELECTORS 优先级定位正文容器"""
+    # 排除导航、页眉页脚等区域（以及其中的所有子元素）
+    excluded = set(doc.select(EXCLUDED_SELECTOR))
+
+    def is_visible(elem) -> bool:
+        return elem not in excluded and not any(a in excluded for a in elem.iterancestors())
+
+    for selector in CONTENT_SELECTORS:
+        try:
+            elem = next((e for e in doc.select(selector) if is_visible(e)), None)
+            if elem is not None:
+                # 复制选中的元素，再移除不需要的标签
+                elem = _clean_copy(doc, elem)
+
+                # 检查内容长度是否合理
+                text = get_text(elem, separator='\n', strip=True)
+                if len(text) > 200:  # 至少200字符才认为是正文
+                    console.log(f"[cyan]    使用选择器: {selector}, 长度: {len(text)}[/cyan]")
+                    return elem
+        except Exception as e:
+            console.log(f"[yellow]    选择器 {selector} 错误: {e}[/yellow]")
+            continue
+    return None
+
+
+def extract_content(doc: ParsedDocument, use_scorer: bool = True) -> str:
+    """
+    提取正文内容
+
+    先用评分定位正文容器（一次遍历，不依赖站点的 class 命名），直接在共享树上收集段落；
+    失败时按选择器查找，最后回退到 body。选择器路径只复制选中的容器再删除其中不需要的节点，
+    不影响后续元数据提取使用同一棵树。
+
+    Args:
+        doc: 已解析的文档
+        use_scorer: 是否使用评分定位（False 时只使用选择器）
+
+    Returns:
+        str: 正文内容
+    """
+    if use_scorer and (paragraphs := _score_content_paragraphs(doc)):
+        result = '\n\n'.join(paragraphs)
+        console.log(f"[green]    提取了 {len(paragraphs)} 个段落，总长度: {len(result)} 字符[/green]")
+        return result
+
+    content_elem = _select_content_element(doc)
+
+    # 如果找不到，回退到 body
+    if content_elem is None:
+        console.log("[yellow]    未找到合适的内容元素，使用 body[/yellow]")
+        content_elem = _clean_copy(doc, doc.body, EXCLUDED_SELECTOR)
+
+    # 提取文本，保留段落结构（优先提取 p, h1-h6, li 标签的内容）
+    paragraphs = _collect_paragraphs(content_elem)
+
+    # 如果没找到段落，直接获取所有文本
+    if not paragraphs or len('\n\n'.join(paragraphs)) < 100:
+        console.log("[yellow]    段落提取失败，使用整体文本[/yellow]")
+        return get_text(content_elem, separator='\n\n', strip=True)
+
+    result = '\n\n'.join(paragraphs)
+    console.log(f"[green]    提取了 {len(paragraphs)} 个段落，总长度: {len(result)} 字符[/green]")
+    return result
+
+
+def parse_article(html: Union[str, bytes, ParsedDocument], url: str = '') -> Dict:
+    """
+    解析文章页面（不调用 LLM，可在解析进程池中执行）
+
+    Args:
+        html: HTML 内容（字节串、字符串或已解析的文档）
+        url: 文章 URL
+
+    Returns:
+        Dict: {'content': 正文, 'metadata': 规则提取的元数据}
+    """
+    doc = ParsedDocument.ensure(html, url)
+    return {
+        'content': extract_content(doc),
+        'metadata': extract_metadata(doc),
+    }
+
 
 class ArticleExtractor:
     """文章内容提取器"""
     
     def __init__(self):
         """初始化提取器"""
-        # 初始化 LLM
-        self.llm = ChatOpenAI(
-            model=MODEL_NAME,
-            openai_api_base=OPENAI_API_BASE,
-            openai_api_key=OPENAI_API_KEY,
-            temperature=LLM_TEMPERATURE
-        )
+        # LLM（经由共享网关，带持久化缓存）
+        self.llm = get_llm_gateway().chat_model("extractor", PROMPT_VERSION)
         
         # 元数据提取提示词（只提取元数据，不提取正文）
         self.metadata_extraction_prompt = ChatPromptTemplate.from_messages([
@@ -62,160 +219,174 @@ class ArticleExtractor:
             ("user", "URL: {url}\n\nHTML（前30000字符）:\n{html}")
         ])
         
-    def _extract_content_with_beautifulsoup(self, html: str) -> str:
+    def _extract_metadata_with_llm(self, url: str, html: str) -> Dict:
         """
-        使用 BeautifulSoup 提取正文内容
+        使用 LLM 提取元数据（规则提取失败时的回退）
         
         Args:
+            url: 文章 URL
             html: HTML 内容
             
         Returns:
-            str: 正文内容
+            Dict: 元数据，失败时返回空字典
         """
-        soup = BeautifulSoup(html, 'lxml')
-        
-        # 移除不需要的标签（在查找正文之前）
-        for tag in soup.select('script, style, nav, header, footer, aside, iframe, noscript, .sidebar, .navigation, .menu, .comments'):
-            tag.decompose()
-        
-        # 按优先级尝试不同的选择器
-        content_selectors = [
-            'article .entry-content',
-            '.entry-content',
-            'article .post-content',
-            '.post-content',
-            'article .article-content',
-            '.article-content',
-            'article',  # article 标签本身通常就是正文
-            '.content',
-            'main article',
-            'main',
-        ]
-        
-        content_elem = None
-        for selector in content_selectors:
-            try:
-                elem = soup.select_one(selector)
-                if elem:
-                    # 在选中的元素内再次移除不需要的标签
-                    for unwanted in elem.select('.related, .share, .social, .advertisement, .ad, .author-box, .tags'):
-                        unwanted.decompose()
-                    
-                    # 检查内容长度是否合理
-                    text = elem.get_text(strip=True, separator='\n')
-                    if len(text) > 200:  # 至少200字符才认为是正文
-                        content_elem = elem
-                        console.log(f"[cyan]    使用选择器: {selector}, 长度: {len(text)}[/cyan]")
-                        break
-            except Exception as e:
-                console.log(f"[yellow]    选择器 {selector} 错误: {e}[/yellow]")
-                continue
-        
-        # 如果找不到，回退到 body
-        if not content_elem:
-            console.log("[yellow]    未找到合适的内容元素，使用 body[/yellow]")
-            content_elem = soup.find('body') or soup
-        
-        # 提取文本，保留段落结构
-        paragraphs = []
-        
-        # 优先提取 p, h1-h6, li 标签的内容
-        for tag in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']):
-            text = tag.get_text(strip=True)
-            # 过滤太短的内容和常见的导航文本
-            if text and len(text) > 15:
-                # 跳过明显的导航或菜单项
-                lower_text = text.lower()
-                if any(skip in lower_text for skip in ['click here', 'read more', 'learn more', 'subscribe', 'follow us']):
-                    if len(text) < 50:  # 短的导航文本直接跳过
-                        continue
-                paragraphs.append(text)
-        
-        # 如果没找到段落，直接获取所有文本
-        if not paragraphs or len('\n\n'.join(paragraphs)) < 100:
-            console.log("[yellow]    段落提取失败，使用整体文本[/yellow]")
-            return content_elem.get_text(strip=True, separator='\n\n')
-        
-        result = '\n\n'.join(paragraphs)
-        console.log(f"[green]    提取了 {len(paragraphs)} 个段落，总长度: {len(result)} 字符[/green]")
-        return result
-    
-    def extract_article(self, url: str, html: str) -> Optional[Dict]:
+        try:
+            response = self.llm.invoke(self._metadata_messages(url, html))
+            return self._parse_metadata(response.content)
+        except Exception as e:
+            console.log(f"[red]✗ LLM 元数据提取失败: {e}[/red]")
+            return {}
+            
+    async def _aextract_metadata_with_llm(self, url: str, html: str) -> Dict:
         """
-        提取文章内容（混合策略）
+        使用 LLM 提取元数据（异步，经由 LLM 网关调用）
         
         Args:
             url: 文章 URL
             html: HTML 内容
             
         Returns:
-            Dict: 文章数据，如果失败返回 None
+            Dict: 元数据，失败时返回空字典
         """
-        console.log(f"[cyan]📄 提取文章: {url}[/cyan]")
-        
         try:
-            # 步骤 1: 使用 BeautifulSoup 提取正文
-            console.log("[cyan]  1/2 使用 BeautifulSoup 提取正文...[/cyan]")
-            content = self._extract_content_with_beautifulsoup(html)
-            
-            if len(content) < 100:
-                console.log("[yellow]⚠️  提取的正文太短，可能失败[/yellow]")
-            
-            # 步骤 2: 使用 LLM 提取元数据
-            console.log("[cyan]  2/2 使用 LLM 提取元数据...[/cyan]")
-            html_truncated = truncate_text(html, 30000)
-            
-            messages = self.metadata_extraction_prompt.format_messages(
-                url=url,
-                html=html_truncated
-            )
-            
-            response = self.llm.invoke(messages)
-            response_content = response.content.strip()
-            
-            # 提取 JSON
-            if '```json' in response_content:
-                response_content = response_content.split('```json')[1].split('```')[0].strip()
-            elif '```' in response_content:
-                response_content = response_content.split('```')[1].split('```')[0].strip()
-                
-            # 解析 JSON
-            metadata = json.loads(response_content)
-            
-            # 组合数据
-            article = {
-                'title': metadata.get('title', ''),
-                'date': metadata.get('date'),
-                'author': metadata.get('author'),
-                'categories': metadata.get('categories', []),
-                'content': content,  # 使用 BeautifulSoup 提取的原始正文
-                'url': url
-            }
-            
-            # 生成摘要（取正文前200字符）
-            article['summary'] = content[:200] + '...' if len(content) > 200 else content
-            
-            # 验证数据质量
-            if not validate_article(article):
-                console.log("[red]✗ 文章数据不完整或质量不佳[/red]")
-                return None
-                
-            content_length = len(article.get('content', ''))
-            console.log(f"[green]✓ 提取成功: {article['title'][:50]}... ({content_length} 字符)[/green]")
+            response = await self.llm.ainvoke(self._metadata_messages(url, html))
+            return self._parse_metadata(response.content)
+        except Exception as e:
+            console.log(f"[red]✗ LLM 元数据提取失败: {e}[/red]")
+            return {}
             
-            return article
+    def _metadata_messages(self, url: str, html: str):
+        """构造元数据提取提示词（截断 HTML，避免超过 token 限制）"""
+        return self.metadata_extraction_prompt.format_messages(
+            url=url,
+            html=truncate_text(html, 30000)
+        )
+        
+    @staticmethod
+    def _parse_metadata(content: str) -> Dict:
+        """解析 LLM 返回的元数据 JSON（解析失败时返回空字典）"""
+        content = content.strip()
+        
+        # 提取 JSON
+        if '```json' in content:
+            content = content.split('```json')[1].split('```')[0].strip()
+        elif '```' in content:
+            content = content.split('```')[1].split('```')[0].strip()
             
+        try:
+            return json.loads(content)
         except json.JSONDecodeError as e:
             console.log(f"[red]✗ JSON 解析失败: {e}[/red]")
-            console.log(f"[yellow]原始响应: {response_content[:500] if 'response_content' in locals() else 'N/A'}[/yellow]")
+            console.log(f"[yellow]原始响应: {content[:500]}[/yellow]")
+            return {}
+    
+    def extract_article(self, url: str, html: Union[str, ParsedDocument]) -> Optional[Dict]:
+        """
+        提取文章内容（混合策略，在当前线程中解析）
+        
+        页面只解析一次，正文提取和规则元数据提取共用同一个 ParsedDocument。
+        
+        Args:
+            url: 文章 URL
+            html: HTML 内容或已解析的文档
+            
+        Returns:
+            Dict: 文章数据，如果失败返回 None
+        """
+        console.log(f"[cyan]📄 提取文章: {url}[/cyan]")
+        
+        try:
+            doc = ParsedDocument.ensure(html, url)
+            parsed = parse_article(doc, url)
+            llm_metadata = self._extract_metadata_with_llm(url, doc.html) if self._needs_llm(parsed) else {}
+            return self._build_article(url, parsed, llm_metadata)
+        except Exception as e:
+            console.log(f"[red]✗ 提取失败: {e}[/red]")
+            import traceback
+            console.log(f"[red]{traceback.format_exc()}[/red]")
             return None
             
+    async def aextract_article(self, url: str, html: Union[str, ParsedDocument]) -> Optional[Dict]:
+        """
+        提取文章内容（异步，解析在解析进程池中执行，LLM 回退经由网关异步调用）
+        
+        抓取层已解析过的文档（doc.parsed）直接使用其结果，不再提交解析任务。
+        
+        Args:
+            url: 文章 URL
+            html: HTML 内容或已解析的文档
+            
+        Returns:
+            Dict: 文章数据，如果失败返回 None
+        """
+        console.log(f"[cyan]📄 提取文章: {url}[/cyan]")
+        
+        try:
+            doc = ParsedDocument.ensure(html, url)
+            parsed = doc.parsed or await get_parse_pool().run(parse_article, doc.html.encode('utf-8'), url)
+            llm_metadata = await self._aextract_metadata_with_llm(url, doc.html) if self._needs_llm(parsed) else {}
+            return self._build_article(url, parsed, llm_metadata)
         except Exception as e:
             console.log(f"[red]✗ 提取失败: {e}[/red]")
             import traceback
             console.log(f"[red]{traceback.format_exc()}[/red]")
             return None
             
+    @staticmethod
+    def _needs_llm(parsed: Dict) -> bool:
+        """规则是否未能提取全部元数据（需要 LLM 补全）"""
+        missing = parsed['metadata']['missing']
+        if missing:
+            console.log(f"[cyan]    规则未能提取 {', '.join(missing)}，使用 LLM 提取元数据[/cyan]")
+        else:
+            console.log("[green]    规则提取元数据成功，跳过 LLM[/green]")
+        return bool(missing)
+            
+    def _build_article(self, url: str, parsed: Dict, llm_metadata: Dict) -> Optional[Dict]:
+        """
+        根据解析结果组装文章（规则未能提取的元数据使用 LLM 结果补全）
+        
+        Args:
+            url: 文章 URL
+            parsed: parse_article 的结果
+            llm_metadata: LLM 提取的元数据（未调用时为空字典）
+            
+        Returns:
+            Dict: 文章数据，质量不合格时返回 None
+        """
+        content = parsed['content']
+        if len(content) < 100:
+            console.log("[yellow]⚠️  提取的正文太短，可能失败[/yellow]")
+        
+        # 规则提取元数据（JSON-LD / OpenGraph / meta），只补全规则未能提取的字段
+        metadata = parsed['metadata']
+        for field in ('title', 'date', 'author', 'categories'):
+            if not metadata.get(field) and llm_metadata.get(field):
+                metadata[field] = llm_metadata[field]
+        
+        # 组合数据
+        article = {
+            'title': metadata.get('title', ''),
+            'date': metadata.get('date'),
+            'author': metadata.get('author'),
+            'categories': metadata.get('categories') or [],
+            'content': content,  # 规则提取的原始正文
+            'url': url
+        }
+        
+        # 生成摘要（取正文前200字符）
+        article['summary'] = content[:200] + '...' if len(content) > 200 else content
+        
+        # 验证数据质量
+        if not validate_article(article):
+            console.log("[red]✗ 文章数据不完整或质量不佳[/red]")
+            return None
+            
+        content_length = len(article.get('content', ''))
+        console.log(f"[green]✓ 提取成功: {article['title'][:50]}... ({content_length} 字符)[/green]")
+        
+        return article
+            
     def extract_batch(self, urls_and_htmls: list) -> list:
         """
         批量提取文章
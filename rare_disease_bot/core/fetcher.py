@@ -0,0 +1,213 @@
+"""分层抓取器 - 优先使用 HTTP 请求，必要时升级到浏览器"""
+import json
+import re
+from typing import Dict, Optional, Union
+
+import httpx
+from rich.console import Console
+
+from config.settings import (
+    USER_AGENT,
+    PROXY_SERVER,
+    STORAGE_STATE_PATH,
+    HTTP_FETCH_ENABLED,
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    READY_MIN_TEXT_LENGTH,
+)
+from core.browser_tools import BrowserManager, looks_like_cloudflare
+from core.extractor import CONTENT_READY_SELECTOR, parse_article
+from utils.document import ParsedDocument, get_text
+from utils.parse_pool import get_parse_pool
+from utils.scheduler import parse_retry_after
+
+console = Console()
+
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+
+def has_content(html: Union[bytes, str, ParsedDocument], selector: str = CONTENT_READY_SELECTOR,
+                min_length: int = READY_MIN_TEXT_LENGTH) -> bool:
+    """检查 HTML 中是否存在包含足够文本的正文容器（可在解析进程池中执行）"""
+    doc = ParsedDocument.ensure(html)
+    return any(len(get_text(elem, strip=True)) >= min_length for elem in doc.select(selector))
+
+
+def parse_if_content(html: bytes, url: str, selector: str = CONTENT_READY_SELECTOR) -> Optional[Dict]:
+    """
+    检查正文容器，存在时直接解析文章（在解析进程池中执行）
+
+    检查和解析共用同一棵树，HTML 只传入进程池一次、只解析一次。
+
+    Returns:
+        Dict: parse_article 的结果；缺少正文时返回 None
+    """
+    doc = ParsedDocument(html, url)
+    if not has_content(doc, selector):
+        return None
+    return parse_article(doc, url)
+
+
+class TieredFetcher:
+    """
+    分层抓取器
+
+    第一层：连接池复用的异步 HTTP 客户端，携带浏览器保存的 Cookie（STORAGE_STATE_PATH）；
+    第二层：响应是 Cloudflare 验证页、非 200 或缺少正文容器时，升级到浏览器页面池。
+    两层都经过同一个按域名的礼貌调度器。
+    """
+
+    def __init__(self, browser: BrowserManager, ready_selector: str = CONTENT_READY_SELECTOR,
+                 http_enabled: bool = HTTP_FETCH_ENABLED):
+        """
+        Args:
+            browser: 浏览器管理器（用于升级抓取）
+            ready_selector: 正文容器选择器（HTTP 响应中缺少时升级到浏览器）
+            http_enabled: 是否启用 HTTP 层
+        """
+        self.browser = browser
+        self.scheduler = browser.scheduler
+        self.ready_selector = ready_selector
+        self.http_enabled = http_enabled
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cookies_mtime: Optional[float] = None
+
+        # 统计
+        self.http_count = 0
+        self.browser_count = 0
+
+    @property
+    def concurrency(self) -> int:
+        """建议的抓取 worker 数量"""
+        return self.browser.pool_size
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """关闭 HTTP 客户端"""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+        if self.http_count or self.browser_count:
+            console.log(f"[cyan]抓取统计: HTTP {self.http_count} 篇，浏览器 {self.browser_count} 篇[/cyan]")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取（必要时创建）HTTP 客户端，并在浏览器更新 Cookie 后重新加载"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={
+                    'User-Agent': USER_AGENT,
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                },
+                follow_redirects=True,
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                ),
+                proxy=PROXY_SERVER,
+            )
+
+        try:
+            mtime = STORAGE_STATE_PATH.stat().st_mtime if STORAGE_STATE_PATH.exists() else None
+        except OSError:
+            mtime = None
+        if mtime and mtime != self._cookies_mtime:
+            self._load_cookies(self._client)
+            self._cookies_mtime = mtime
+        return self._client
+
+    def _load_cookies(self, client: httpx.AsyncClient):
+        """从 Playwright storage state 加载 Cookie（如 cf_clearance）"""
+        try:
+            with open(STORAGE_STATE_PATH, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            for cookie in state.get('cookies', []):
+                client.cookies.set(
+                    cookie['name'],
+                    cookie['value'],
+                    domain=cookie.get('domain', ''),
+                    path=cookie.get('path', '/'),
+                )
+        except Exception as e:
+            console.log(f"[yellow]⚠️  加载浏览器 Cookie 失败: {e}[/yellow]")
+
+    async def fetch_http(self, url: str) -> Optional[ParsedDocument]:
+        """
+        使用 HTTP 抓取页面
+
+        Returns:
+            ParsedDocument: 文档（正文检查和文章解析在解析进程池的同一个任务中完成，
+                结果保存在 doc.parsed 中供提取阶段直接使用）；需要升级到浏览器时返回 None
+        """
+        client = self._get_client()
+        try:
+            async with self.scheduler.slot(url):
+                response = await client.get(url)
+        except httpx.HTTPError as e:
+            console.log(f"[yellow]⚠️  HTTP 抓取失败，使用浏览器: {e}[/yellow]")
+            return None
+
+        if response.status_code in (429, 503):
+            retry_after = parse_retry_after(response.headers.get('retry-after'))
+            if retry_after:
+                self.scheduler.defer(url, retry_after)
+        if response.status_code != 200:
+            return None
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            return None
+
+        html = response.text
+        match = _TITLE_RE.search(html)
+        title = match.group(1).strip() if match else ''
+        if looks_like_cloudflare(title, html):
+            console.log("[yellow]⚠️  HTTP 响应是 Cloudflare 验证页，使用浏览器[/yellow]")
+            return None
+        try:
+            parsed = await get_parse_pool().run(parse_if_content, html.encode('utf-8'), url, self.ready_selector)
+        except Exception as e:
+            # 无法解析的响应同样交给浏览器处理
+            console.log(f"[yellow]⚠️  HTTP 响应解析失败，使用浏览器: {e}[/yellow]")
+            return None
+        if parsed is None:
+            console.log("[yellow]⚠️  HTTP 响应缺少正文，使用浏览器[/yellow]")
+            return None
+        doc = ParsedDocument(html, url)
+        doc.parsed = parsed
+        return doc
+
+    async def fetch_browser(self, url: str) -> Optional[ParsedDocument]:
+        """使用浏览器页面池抓取页面"""
+        async with self.browser.acquire_page(url) as page:
+            success = await self.browser.navigate(url, page=page, ready_selector=self.ready_selector)
+            if not success:
+                return None
+            return ParsedDocument(await self.browser.get_html(page=page), url)
+
+    async def fetch(self, url: str) -> Optional[ParsedDocument]:
+        """
+        抓取页面（HTTP 优先，必要时升级到浏览器）
+
+        Args:
+            url: 页面 URL
+
+        Returns:
+            ParsedDocument: 已解析的文档（按需解析），失败时返回 None
+        """
+        if self.http_enabled:
+            doc = await self.fetch_http(url)
+            if doc:
+                self.http_count += 1
+                console.log(f"[green]✓ HTTP 抓取: {url}[/green]")
+                return doc
+
+        doc = await self.fetch_browser(url)
+        if doc:
+            self.browser_count += 1
+        return doc
@@ -1,32 +1,104 @@
 """Markdown 文档生成器 - 生成原文版和小白版"""
+import asyncio
 import json
-from typing import Dict, Optional
-from langchain_openai import ChatOpenAI
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from langchain.prompts import ChatPromptTemplate
 from rich.console import Console
 
 from config.settings import (
-    OPENAI_API_BASE,
-    OPENAI_API_KEY,
-    MODEL_NAME,
-    LLM_TEMPERATURE
+    TRANSLATION_CHUNK_CHARS,
+    TRANSLATION_CONCURRENCY,
 )
+from utils.helpers import truncate_text
+from utils.llm_gateway import get_llm_gateway
+from utils.translation_memory import get_translation_memory
 
 console = Console()
 
+# 提示词版本（修改提示词后递增，使 LLM 缓存失效）
+PROMPT_VERSION = "1"
+
+# 术语表提取时最多发送的原文长度
+GLOSSARY_SOURCE_CHARS = 12000
+
+
+def _pack(units: List[str], max_chars: int, sep: str) -> List[str]:
+    """将相邻片段合并为不超过 max_chars 的分段"""
+    packed: List[str] = []
+    for unit in units:
+        if packed and len(packed[-1]) + len(sep) + len(unit) <= max_chars:
+            packed[-1] = f"{packed[-1]}{sep}{unit}"
+        else:
+            packed.append(unit)
+    return packed
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """切分超长段落：依次按行、句子、单词切分"""
+    pieces: List[str] = []
+    for line in (l.strip() for l in text.split('\n')):
+        if len(line) <= max_chars:
+            if line:
+                pieces.append(line)
+            continue
+        for sentence in re.split(r'(?<=[.!?])\s+', line):
+            if len(sentence) <= max_chars:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_pack(sentence.split(), max_chars, ' '))
+    return pieces
+
+
+def split_into_chunks(content: str, max_chars: int = TRANSLATION_CHUNK_CHARS) -> List[str]:
+    """
+    按段落切分长文（在空行处切分，单个段落过长时再按行、句子切分）
+
+    Args:
+        content: 正文（段落之间以空行分隔）
+        max_chars: 每段最大字符数
+
+    Returns:
+        List[str]: 按原文顺序排列的分段
+    """
+    pieces: List[str] = []
+    for paragraph in (p.strip() for p in content.split('\n\n')):
+        if len(paragraph) <= max_chars:
+            if paragraph:
+                pieces.append(paragraph)
+        else:
+            pieces.extend(_split_long(paragraph, max_chars))
+
+    # 合并相邻段落，直到接近上限
+    return _pack(pieces, max_chars, '\n\n') or [content]
+
 
 class MarkdownGenerator:
     """Markdown 文档生成器"""
     
     def __init__(self):
         """初始化生成器"""
-        # 初始化 LLM
-        self.llm = ChatOpenAI(
-            model=MODEL_NAME,
-            openai_api_base=OPENAI_API_BASE,
-            openai_api_key=OPENAI_API_KEY,
-            temperature=LLM_TEMPERATURE
-        )
+        # LLM（经由共享网关，带持久化缓存）
+        self.llm = get_llm_gateway().chat_model("markdown", PROMPT_VERSION)
+        
+        # 翻译记忆库（术语译名与重复段落复用）
+        self.memory = get_translation_memory()
+        
+        # 分段翻译的并发上限（所有文章共享）
+        self._chunk_semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+        
+        # 术语表提示词（分段翻译时保证各段术语一致）
+        self.glossary_prompt = ChatPromptTemplate.from_messages([
+            ("system", """你是一个专业的医学翻译专家。请从以下英文文章中找出需要统一翻译的关键术语，
+包括疾病名称、药物名称、基因、机构名称和专有名词，最多 30 个。
+
+以 JSON 对象返回，键为英文术语，值为中文译名，例如：
+{{"Orphan Drug Act": "孤儿药法案", "FDA": "美国食品药品监督管理局"}}
+
+只返回 JSON，不要添加任何解释。"""),
+            ("user", "{content}")
+        ])
         
         # 标题翻译提示词
         self.title_translation_prompt = ChatPromptTemplate.from_messages([
@@ -118,61 +190,320 @@ class MarkdownGenerator:
         return header
         
     def translate_title(self, title: str) -> Optional[str]:
-        """翻译标题"""
+        """翻译标题（优先使用翻译记忆库）"""
+        if self.memory and (cached := self.memory.lookup(title, 'title')):
+            return cached
         try:
-            messages = self.title_translation_prompt.format_messages(title=title)
+            messages = self.title_translation_prompt.format_messages(
+                title=self._with_glossary(title, self._memory_terms(title))
+            )
             response = self.llm.invoke(messages)
-            return response.content.strip()
+            translated = response.content.strip()
+            if self.memory:
+                self.memory.store(title, translated, 'title')
+            return translated
         except Exception as e:
             return title
         
-    def translate_content(self, content: str) -> Optional[str]:
-        """翻译内容（保持专业性）"""
+    def translate_content(self, content: str,
+                          glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """翻译内容（保持专业性，长文分段并行翻译）"""
+        return self._translate_segments(self.translation_prompt, 'professional', content, glossary)
+            
+    def simplify_and_translate_content(self, content: str,
+                                       glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """翻译并简化内容（小白版，长文分段并行翻译）"""
+        return self._translate_segments(self.simplification_prompt, 'simplified', content, glossary)
+        
+    def extract_glossary(self, content: str) -> Dict[str, str]:
+        """提取术语表（失败时返回空表）"""
         try:
-            messages = self.translation_prompt.format_messages(content=content)
-            response = self.llm.invoke(messages)
-            return response.content.strip()
+            messages = self.glossary_prompt.format_messages(
+                content=truncate_text(content, GLOSSARY_SOURCE_CHARS)
+            )
+            return self._parse_glossary(self.llm.invoke(messages).content)
+        except Exception as e:
+            console.log(f"[yellow]⚠️  术语表提取失败: {e}[/yellow]")
+            return {}
+            
+    async def aextract_glossary(self, content: str) -> Dict[str, str]:
+        """提取术语表（异步，失败时返回空表）"""
+        try:
+            messages = self.glossary_prompt.format_messages(
+                content=truncate_text(content, GLOSSARY_SOURCE_CHARS)
+            )
+            return self._parse_glossary((await self.llm.ainvoke(messages)).content)
+        except Exception as e:
+            console.log(f"[yellow]⚠️  术语表提取失败: {e}[/yellow]")
+            return {}
+            
+    @staticmethod
+    def _parse_glossary(text: str) -> Dict[str, str]:
+        """解析 LLM 返回的术语表 JSON"""
+        text = text.strip()
+        if text.startswith('```'):
+            text = text.split('```')[1]
+            if text.startswith('json'):
+                text = text[4:]
+        data = json.loads(text.strip())
+        if not isinstance(data, dict):
+            return {}
+        return {str(k): str(v) for k, v in data.items() if k and v}
+        
+    def _memory_terms(self, text: str) -> Dict[str, str]:
+        """翻译记忆库中出现在文本里的术语"""
+        return self.memory.match_terms(text) if self.memory else {}
+        
+    def _merge_glossary(self, content: str, extracted: Dict[str, str]) -> Dict[str, str]:
+        """合并本文提取的术语与记忆库术语（已有译名优先，新术语写入记忆库）"""
+        if not self.memory:
+            return extracted
+        self.memory.add_terms(extracted)
+        return {**extracted, **self._memory_terms(content)}
+        
+    def build_glossary(self, content: str) -> Dict[str, str]:
+        """构建共享术语表（长文才调用 LLM 提取）"""
+        extracted = self.extract_glossary(content) if len(split_into_chunks(content)) > 1 else {}
+        return self._merge_glossary(content, extracted)
+        
+    async def abuild_glossary(self, content: str) -> Dict[str, str]:
+        """构建共享术语表（异步，长文才调用 LLM 提取）"""
+        extracted = await self.aextract_glossary(content) if len(split_into_chunks(content)) > 1 else {}
+        return self._merge_glossary(content, extracted)
+        
+    @staticmethod
+    def _with_glossary(chunk: str, glossary: Dict[str, str],
+                       reference: Optional[Tuple[str, str]] = None) -> str:
+        """在分段前附加术语表和参考译文（相似段落的已有译文）"""
+        sections = []
+        if glossary:
+            terms = '\n'.join(f"- {en}: {zh}" for en, zh in glossary.items())
+            sections.append(f"【术语表（请统一使用以下译名，不要翻译本术语表）】\n{terms}")
+        if reference:
+            source, target = reference
+            sections.append(
+                "【参考译文（相似段落的已有译文，可沿用其措辞，但必须按正文翻译，不要输出本参考）】\n"
+                f"原文：{source}\n译文：{target}"
+            )
+        if not sections:
+            return chunk
+        return '\n\n'.join(sections) + f"\n\n【正文】\n{chunk}"
+        
+    def _plan_segments(self, content: str, mode: str) -> Optional[List[Tuple[str, str, Optional[Tuple[str, str]]]]]:
+        """
+        按翻译记忆库规划段落
+        
+        Returns:
+            [(类型, 文本, 参考译文), ...]：'memory' 为记忆库中完全一致段落的译文；
+            'reference' 为与记忆库段落相似的段落，连同相似段落的译文交给 LLM 翻译；
+            'boilerplate' 为需单独翻译并记忆的样板段落；'text' 为其余连续段落。
+            没有可复用段落时返回 None（整篇正常翻译）
+        """
+        if not self.memory:
+            return None
+        
+        article_key = self.memory.article_key(content)
+        plan: List[Tuple[str, str, Optional[Tuple[str, str]]]] = []
+        reused = False
+        for paragraph in (p.strip() for p in content.split('\n\n')):
+            if not paragraph:
+                continue
+            if len(paragraph) >= self.memory.min_paragraph_chars:
+                if cached := self.memory.lookup(paragraph, mode):
+                    plan.append(('memory', cached, None))
+                    reused = True
+                    continue
+                if reference := self.memory.reference(paragraph, mode):
+                    plan.append(('reference', paragraph, reference))
+                    reused = True
+                    continue
+                if self.memory.is_boilerplate(paragraph, article_key):
+                    plan.append(('boilerplate', paragraph, None))
+                    reused = True
+                    continue
+            if plan and plan[-1][0] == 'text':
+                plan[-1] = ('text', f"{plan[-1][1]}\n\n{paragraph}", None)
+            else:
+                plan.append(('text', paragraph, None))
+        return plan if reused else None
+        
+    def _translate_chunk(self, prompt: ChatPromptTemplate, chunk: str) -> str:
+        """翻译单个分段"""
+        response = self.llm.invoke(prompt.format_messages(content=chunk))
+        return response.content.strip()
+        
+    def _translate_chunks(self, prompt: ChatPromptTemplate, content: str,
+                          glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        分段翻译（线程池并行，按原顺序拼接）
+        
+        短文只有一段且没有术语时直接翻译；否则每段附加共享术语表（未传入时先构建）。
+        任一分段失败时返回 None。
+        """
+        chunks = split_into_chunks(content)
+        try:
+            if glossary is None:
+                glossary = self.build_glossary(content)
+            if len(chunks) == 1 and not glossary:
+                return self._translate_chunk(prompt, content)
+            inputs = [self._with_glossary(chunk, glossary) for chunk in chunks]
+            with ThreadPoolExecutor(max_workers=TRANSLATION_CONCURRENCY) as executor:
+                results = list(executor.map(lambda c: self._translate_chunk(prompt, c), inputs))
+            return '\n\n'.join(results)
         except Exception as e:
             return None
             
-    def simplify_and_translate_content(self, content: str) -> Optional[str]:
-        """翻译并简化内容（小白版）"""
+    def _translate_segments(self, prompt: ChatPromptTemplate, mode: str, content: str,
+                            glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """翻译正文：记忆库中已有的段落直接复用，相似段落附带参考译文翻译，样板段落单独翻译后写入记忆库"""
+        plan = self._plan_segments(content, mode)
+        if plan is None:
+            return self._translate_chunks(prompt, content, glossary)
+        
+        if glossary is None:
+            glossary = self.build_glossary(content)
+        results = []
+        for kind, text, reference in plan:
+            if kind == 'memory':
+                results.append(text)
+            elif kind in ('reference', 'boilerplate'):
+                translated = self._translate_single(prompt, text, reference)
+                if translated:
+                    self.memory.store(text, translated, mode)
+                results.append(translated)
+            else:
+                results.append(self._translate_chunks(prompt, text, glossary))
+        return None if None in results else '\n\n'.join(results)
+        
+    def _translate_single(self, prompt: ChatPromptTemplate, paragraph: str,
+                          reference: Optional[Tuple[str, str]]) -> Optional[str]:
+        """单独翻译一个可记忆的段落（附加记忆库术语和参考译文，失败时返回 None）"""
+        if reference is None:
+            return self._translate_chunks(prompt, paragraph, self._memory_terms(paragraph))
         try:
-            messages = self.simplification_prompt.format_messages(content=content)
-            response = self.llm.invoke(messages)
-            return response.content.strip()
+            return self._translate_chunk(
+                prompt, self._with_glossary(paragraph, self._memory_terms(paragraph), reference)
+            )
         except Exception as e:
             return None
             
-    def generate_professional_markdown(self, article: Dict) -> Optional[str]:
-        """生成专业版 Markdown"""
-        title = article.get('title', '无标题')
-        translated_title = self.translate_title(title)
-        header = self.generate_markdown_header(article, translated_title)
+    async def atranslate_title(self, title: str) -> Optional[str]:
+        """翻译标题（异步，优先使用翻译记忆库）"""
+        if self.memory and (cached := self.memory.lookup(title, 'title')):
+            return cached
+        try:
+            messages = self.title_translation_prompt.format_messages(
+                title=self._with_glossary(title, self._memory_terms(title))
+            )
+            response = await self.llm.ainvoke(messages)
+            translated = response.content.strip()
+            if self.memory:
+                self.memory.store(title, translated, 'title')
+            return translated
+        except Exception as e:
+            return title
         
-        content = article.get('content', '')
-        translated_content = self.translate_content(content)
+    async def atranslate_content(self, content: str,
+                                 glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """翻译内容（保持专业性，异步，长文分段并发翻译）"""
+        return await self._atranslate_segments(self.translation_prompt, 'professional', content, glossary)
+            
+    async def asimplify_and_translate_content(self, content: str,
+                                              glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """翻译并简化内容（小白版，异步，长文分段并发翻译）"""
+        return await self._atranslate_segments(self.simplification_prompt, 'simplified', content, glossary)
         
-        if not translated_content:
+    async def _atranslate_chunk(self, prompt: ChatPromptTemplate, chunk: str) -> str:
+        """翻译单个分段（异步，受并发上限约束）"""
+        async with self._chunk_semaphore:
+            response = await self.llm.ainvoke(prompt.format_messages(content=chunk))
+        return response.content.strip()
+        
+    async def _atranslate_chunks(self, prompt: ChatPromptTemplate, content: str,
+                                 glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """分段翻译（异步并发，按原顺序拼接；任一分段失败时返回 None）"""
+        chunks = split_into_chunks(content)
+        try:
+            if glossary is None:
+                glossary = await self.abuild_glossary(content)
+            if len(chunks) == 1 and not glossary:
+                return await self._atranslate_chunk(prompt, content)
+            results = await asyncio.gather(*(
+                self._atranslate_chunk(prompt, self._with_glossary(chunk, glossary))
+                for chunk in chunks
+            ))
+            return '\n\n'.join(results)
+        except Exception as e:
             return None
+            
+    async def _atranslate_segments(self, prompt: ChatPromptTemplate, mode: str, content: str,
+                                   glossary: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """翻译正文（异步）：记忆库中已有的段落直接复用，相似段落附带参考译文翻译，样板段落单独翻译后写入记忆库"""
+        plan = self._plan_segments(content, mode)
+        if plan is None:
+            return await self._atranslate_chunks(prompt, content, glossary)
         
-        formatted_content = self._format_content(translated_content)
-        return header + formatted_content
+        if glossary is None:
+            glossary = await self.abuild_glossary(content)
+            
+        async def translate(kind: str, text: str, reference: Optional[Tuple[str, str]]) -> Optional[str]:
+            if kind == 'memory':
+                return text
+            if kind in ('reference', 'boilerplate'):
+                translated = await self._atranslate_single(prompt, text, reference)
+                if translated:
+                    self.memory.store(text, translated, mode)
+                return translated
+            return await self._atranslate_chunks(prompt, text, glossary)
         
-    def generate_simplified_markdown(self, article: Dict) -> Optional[str]:
-        """生成小白版 Markdown"""
-        title = article.get('title', '无标题')
-        translated_title = self.translate_title(title)
-        header = self.generate_markdown_header(article, translated_title)
+        results = await asyncio.gather(*(translate(*item) for item in plan))
+        return None if None in results else '\n\n'.join(results)
+        
+    async def _atranslate_single(self, prompt: ChatPromptTemplate, paragraph: str,
+                                 reference: Optional[Tuple[str, str]]) -> Optional[str]:
+        """单独翻译一个可记忆的段落（异步，附加记忆库术语和参考译文，失败时返回 None）"""
+        if reference is None:
+            return await self._atranslate_chunks(prompt, paragraph, self._memory_terms(paragraph))
+        try:
+            return await self._atranslate_chunk(
+                prompt, self._with_glossary(paragraph, self._memory_terms(paragraph), reference)
+            )
+        except Exception as e:
+            return None
+            
+    def _record_paragraphs(self, content: str):
+        """记录本文段落，用于识别跨文章重复出现的样板段落（两个版本都生成成功后调用）"""
+        if self.memory:
+            self.memory.record_paragraphs(self.memory.article_key(content), content.split('\n\n'))
+            
+    def generate_professional_markdown(self, article: Dict,
+                                       translated_title: Optional[str] = None) -> Optional[str]:
+        """生成专业版 Markdown（可传入已翻译的标题，避免重复翻译）"""
+        if translated_title is None:
+            translated_title = self.translate_title(article.get('title', '无标题'))
+        
+        content = article.get('content', '')
+        translated_content = self.translate_content(content)
+        return self._build_markdown(article, translated_title, translated_content)
+        
+    def generate_simplified_markdown(self, article: Dict,
+                                     translated_title: Optional[str] = None) -> Optional[str]:
+        """生成小白版 Markdown（可传入已翻译的标题，避免重复翻译）"""
+        if translated_title is None:
+            translated_title = self.translate_title(article.get('title', '无标题'))
         
         content = article.get('content', '')
         simplified_content = self.simplify_and_translate_content(content)
+        return self._build_markdown(article, translated_title, simplified_content)
         
-        if not simplified_content:
+    def _build_markdown(self, article: Dict, translated_title: str,
+                        body: Optional[str]) -> Optional[str]:
+        """组合头部和正文（正文生成失败时返回 None）"""
+        if not body:
             return None
         
-        formatted_content = self._format_content(simplified_content)
-        return header + formatted_content
+        header = self.generate_markdown_header(article, translated_title)
+        return header + self._format_content(body)
     
     def _format_content(self, content: str) -> str:
         """格式化内容，确保段落分明"""
@@ -181,7 +512,37 @@ class MarkdownGenerator:
         return '\n\n'.join(cleaned)
         
     def generate_both_markdowns(self, article: Dict) -> tuple[Optional[str], Optional[str]]:
-        """生成两个版本的 Markdown"""
-        professional_md = self.generate_professional_markdown(article)
-        simplified_md = self.generate_simplified_markdown(article)
+        """生成两个版本的 Markdown（标题和术语表只生成一次）"""
+        content = article.get('content', '')
+        translated_title = self.translate_title(article.get('title', '无标题'))
+        glossary = self.build_glossary(content)
+        professional_md = self._build_markdown(
+            article, translated_title, self.translate_content(content, glossary)
+        )
+        simplified_md = self._build_markdown(
+            article, translated_title, self.simplify_and_translate_content(content, glossary)
+        )
+        if professional_md and simplified_md:
+            self._record_paragraphs(content)
+        return professional_md, simplified_md
+        
+    async def agenerate_both_markdowns(self, article: Dict) -> tuple[Optional[str], Optional[str]]:
+        """
+        生成两个版本的 Markdown（异步）
+        
+        标题只翻译一次，标题、专业版、小白版并发执行；
+        长文按段落切分后并发翻译，两个版本共享同一份术语表。
+        """
+        content = article.get('content', '')
+        title_task = asyncio.create_task(self.atranslate_title(article.get('title', '无标题')))
+        glossary = await self.abuild_glossary(content)
+        translated_title, translated_content, simplified_content = await asyncio.gather(
+            title_task,
+            self.atranslate_content(content, glossary),
+            self.asimplify_and_translate_content(content, glossary),
+        )
+        professional_md = self._build_markdown(article, translated_title, translated_content)
+        simplified_md = self._build_markdown(article, translated_title, simplified_content)
+        if professional_md and simplified_md:
+            self._record_paragraphs(content)
         return professional_md, simplified_md
@@ -0,0 +1,165 @@
+"""规则元数据提取 - 从 JSON-LD / OpenGraph / meta 标签 / <time> 中提取文章元数据"""
+import re
+from typing import Dict, List, Optional, Union
+
+from utils.document import ParsedDocument, get_text
+from utils.helpers import parse_date
+
+# 必须可靠提取的字段，缺失时才需要 LLM 回退
+REQUIRED_FIELDS = ('title', 'date')
+
+# JSON-LD 中表示文章的类型
+ARTICLE_TYPES = {'Article', 'NewsArticle', 'BlogPosting', 'Report', 'ScholarlyArticle', 'WebPage'}
+
+_ISO_DATE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+
+
+def _normalize_date(value: Optional[str]) -> Optional[str]:
+    """将日期规范为 YYYY-MM-DD，无法识别时返回 None"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    if match := _ISO_DATE_RE.match(value):
+        return match.group(1)
+    parsed = parse_date(value)
+    if parsed and _ISO_DATE_RE.match(parsed):
+        return parsed
+    return None
+
+
+def _as_list(value) -> List:
+    """将单值或列表统一为列表"""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _first_string(value) -> Optional[str]:
+    """取第一个非空字符串（JSON-LD 字段可能是列表、对象或数字），没有时返回 None"""
+    for item in _as_list(value):
+        if isinstance(item, str) and item.strip():
+            return item.strip()
+    return None
+
+
+def _types(node: Dict) -> set:
+    """节点的 @type 集合（忽略非字符串值）"""
+    return {t for t in _as_list(node.get('@type')) if isinstance(t, str)}
+
+
+def _iter_jsonld_nodes(doc: ParsedDocument):
+    """遍历页面中所有 JSON-LD 节点（展开 @graph 和列表）"""
+    for data in doc.jsonld:
+        stack = _as_list(data)
+        while stack:
+            node = stack.pop(0)
+            if not isinstance(node, dict):
+                continue
+            if '@graph' in node:
+                stack.extend(_as_list(node['@graph']))
+            yield node
+
+
+def _extract_from_jsonld(doc: ParsedDocument) -> Dict:
+    """从 JSON-LD 提取元数据"""
+    nodes = list(_iter_jsonld_nodes(doc))
+    by_id = {node['@id']: node for node in nodes if isinstance(node.get('@id'), str)}
+
+    # 优先具体的文章类型，其次 WebPage
+    articles = [n for n in nodes if _types(n) & ARTICLE_TYPES]
+    articles.sort(key=lambda n: 'WebPage' in _types(n))
+    if not articles:
+        return {}
+
+    result: Dict = {}
+    for node in articles:
+        if not result.get('title'):
+            result['title'] = _first_string(node.get('headline')) or _first_string(node.get('name'))
+        if not result.get('date'):
+            result['date'] = _normalize_date(_first_string(node.get('datePublished')))
+        if not result.get('author'):
+            names = []
+            for author in _as_list(node.get('author')):
+                if isinstance(author, dict):
+                    # Yoast 等插件使用 @id 引用 @graph 中的 Person
+                    ref = author.get('@id')
+                    author = by_id.get(ref, author) if isinstance(ref, str) else author
+                    name = _first_string(author.get('name'))
+                else:
+                    name = _first_string(author)
+                if name:
+                    names.append(name)
+            result['author'] = ', '.join(names) or None
+        if not result.get('categories'):
+            sections = [s for s in _as_list(node.get('articleSection')) if isinstance(s, str)]
+            result['categories'] = sections
+    return result
+
+
+def _strip_site_name(title: str, site_name: Optional[str]) -> str:
+    """去除标题中的网站名后缀，例如 "标题 - NORD" """
+    title = title.strip()
+    if site_name:
+        for sep in (' - ', ' | ', ' – ', ' — '):
+            suffix = f"{sep}{site_name}"
+            if title.endswith(suffix):
+                return title[:-len(suffix)].strip()
+    return title
+
+
+def extract_metadata(html: Union[str, ParsedDocument]) -> Dict:
+    """
+    使用规则提取文章元数据
+
+    Args:
+        html: HTML 内容或已解析的文档
+
+    Returns:
+        Dict: title / date / author / categories，以及无法可靠提取的字段列表 missing
+    """
+    doc = ParsedDocument.ensure(html)
+    jsonld = _extract_from_jsonld(doc)
+    site_name = next(iter(doc.meta_content('og:site_name')), None)
+
+    # 标题：JSON-LD → og:title → h1
+    title = jsonld.get('title') or next(iter(doc.meta_content('og:title', 'twitter:title')), None)
+    if not title:
+        h1 = doc.select_one('h1')
+        title = get_text(h1, strip=True) if h1 is not None else None
+    if title:
+        title = _strip_site_name(title, site_name) or None
+
+    # 日期：JSON-LD → article:published_time → <time datetime>
+    date = jsonld.get('date')
+    if not date:
+        for value in doc.meta_content('article:published_time', 'datePublished', 'date', 'pubdate'):
+            if date := _normalize_date(value):
+                break
+    if not date:
+        for time_tag in doc.select('time'):
+            if date := _normalize_date(time_tag.get('datetime') or get_text(time_tag, strip=True)):
+                break
+
+    # 作者：JSON-LD → meta author → rel=author
+    author = jsonld.get('author') or next(iter(doc.meta_content('author', 'article:author')), None)
+    if author and author.startswith('http'):
+        author = None
+    if not author:
+        link = doc.select_one('a[rel~="author"]')
+        author = get_text(link, strip=True) if link is not None else None
+
+    # 分类：JSON-LD articleSection → article:section/tag → rel=category 链接
+    categories = list(jsonld.get('categories') or [])
+    categories += doc.meta_content('article:section', 'article:tag')
+    if not categories:
+        categories = [get_text(a, strip=True) for a in doc.select('a[rel~="category"]')]
+    categories = list(dict.fromkeys(c for c in categories if c))
+
+    metadata = {
+        'title': title,
+        'date': date,
+        'author': author or None,
+        'categories': categories,
+    }
+    metadata['missing'] = [field for field in REQUIRED_FIELDS if not metadata.get(field)]
+    return metadata
@@ -0,0 +1,200 @@
+"""多站点爬取 - 共用一个浏览器进程和 LLM 组件，每个站点独立会话、独立存储"""
+import asyncio
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from config.settings import SITE_CONCURRENCY
+from core.agent import NewsCrawlerAgent, print_shared_stats
+from core.browser_tools import BrowserManager
+from core.explorer import WebsiteExplorer
+from core.extractor import ArticleExtractor
+from core.markdown_generator import MarkdownGenerator
+from utils.helpers import extract_domain
+from utils.llm_gateway import close_llm_gateway
+from utils.parse_pool import shutdown_parse_pool
+
+console = Console()
+
+_URL_RE = re.compile(r'https?://[^\s,;，；]+')
+
+
+def load_sites(path: str) -> List[str]:
+    """
+    读取站点列表
+
+    每行取第一个 http(s) URL，没有 URL 的行（表头、空行、# 注释）被忽略，
+    因此既支持每行一个 URL 的纯文本，也支持 rare_info_list.txt 这样的制表符表格。
+
+    Args:
+        path: 站点列表文件路径
+
+    Returns:
+        List[str]: 去重后的站点 URL（保持文件顺序）
+    """
+    urls: List[str] = []
+    with open(Path(path), 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            match = _URL_RE.search(line)
+            if match and match.group(0) not in urls:
+                urls.append(match.group(0))
+    return urls
+
+
+class MultiSiteCrawler:
+    """
+    多站点爬虫
+
+    - 只启动一个浏览器进程，每个站点在其中创建独立的上下文和页面池
+    - 结构探索、内容提取、Markdown 生成组件（LLM 客户端）所有站点共用
+    - 全局调度器限制所有站点合计的并发，同一域名的多个入口按顺序爬取
+    - 每个站点仍使用自己的存储目录，结束后打印合并总结
+    """
+
+    def __init__(self, urls: List[str], max_articles: Optional[int] = None,
+                 incremental: bool = False, resume: bool = False,
+                 site_concurrency: int = SITE_CONCURRENCY):
+        """
+        Args:
+            urls: 站点起始 URL 列表
+            max_articles: 每个站点的最大文章数量（None 表示不限制）
+            incremental: 增量模式
+            resume: 从各站点上次中断处继续
+            site_concurrency: 同时爬取的站点数量
+        """
+        self.urls = urls
+        self.max_articles = max_articles
+        self.incremental = incremental
+        self.resume = resume
+        self.site_concurrency = max(1, site_concurrency)
+
+        # 共用组件
+        self.explorer = WebsiteExplorer()
+        self.extractor = ArticleExtractor()
+        self.md_generator = MarkdownGenerator()
+
+        self.results: List[Dict] = []
+        self._domain_locks: Dict[str, asyncio.Lock] = {}
+
+    async def run(self):
+        """爬取所有站点"""
+        semaphore = asyncio.Semaphore(self.site_concurrency)
+
+        # 根浏览器只提供进程和默认上下文，站点使用各自的会话
+        async with BrowserManager(pool_size=1) as browser:
+            await asyncio.gather(*(
+                self._run_site(browser, url, semaphore) for url in self.urls
+            ))
+
+        self._print_summary()
+
+    async def _run_site(self, browser: BrowserManager, url: str, semaphore: asyncio.Semaphore):
+        """爬取单个站点（失败不影响其它站点）"""
+        # 同一域名共用存储目录，不能同时爬取
+        lock = self._domain_locks.setdefault(extract_domain(url), asyncio.Lock())
+        async with lock, semaphore:
+            console.print(f"\n[bold cyan]🌐 开始爬取站点: {url}[/bold cyan]")
+            started = time.monotonic()
+            agent = None
+            try:
+                agent = NewsCrawlerAgent(
+                    url,
+                    self.max_articles,
+                    incremental=self.incremental,
+                    resume=self.resume,
+                    shared_browser=browser,
+                    explorer=self.explorer,
+                    extractor=self.extractor,
+                    md_generator=self.md_generator,
+                )
+                await agent.run()
+                result = agent.get_summary()
+            except Exception as e:
+                console.print(f"[red]✗ 站点爬取失败 {url}: {e}[/red]")
+                result = agent.get_summary() if agent else {'url': url, 'domain': extract_domain(url)}
+                result['error'] = str(e)
+            result['elapsed'] = time.monotonic() - started
+            self.results.append(result)
+
+    def _print_summary(self):
+        """打印所有站点的合并总结"""
+        table = Table(title=f"📊 多站点爬取总结（{len(self.results)} 个站点）")
+        table.add_column("站点")
+        table.add_column("链接", justify="right")
+        table.add_column("成功", justify="right", style="green")
+        table.add_column("失败", justify="right", style="red")
+        table.add_column("跳过", justify="right", style="yellow")
+        table.add_column("重复", justify="right", style="yellow")
+        table.add_column("HTTP/浏览器", justify="right")
+        table.add_column("用时", justify="right")
+        table.add_column("状态")
+
+        keys = ('found', 'success', 'failed', 'skipped', 'duplicates', 'http', 'browser')
+        totals = dict.fromkeys(keys, 0)
+        order = {url: i for i, url in enumerate(self.urls)}
+        for result in sorted(self.results, key=lambda r: order.get(r['url'], 0)):
+            for key in keys:
+                totals[key] += result.get(key, 0)
+            table.add_row(
+                result['url'],
+                str(result.get('found', 0)),
+                str(result.get('success', 0)),
+                str(result.get('failed', 0)),
+                str(result.get('skipped', 0)),
+                str(result.get('duplicates', 0)),
+                f"{result.get('http', 0)}/{result.get('browser', 0)}",
+                f"{result['elapsed']:.0f}s",
+                f"[red]失败: {result['error'][:40]}[/red]" if result.get('error') else "[green]完成[/green]",
+            )
+        table.add_section()
+        table.add_row(
+            "合计",
+            *(str(totals[key]) for key in ('found', 'success', 'failed', 'skipped', 'duplicates')),
+            f"{totals['http']}/{totals['browser']}",
+            "",
+            "",
+        )
+
+        console.print()
+        console.print(table)
+        print_shared_stats()
+
+
+async def run_sites(urls: List[str], max_articles: Optional[int] = None, incremental: bool = False,
+                    resume: bool = False):
+    """
+    运行多站点爬虫（异步）
+
+    Args:
+        urls: 站点起始 URL 列表
+        max_articles: 每个站点的最大文章数量
+        incremental: 增量模式
+        resume: 从各站点上次中断处继续
+    """
+    crawler = MultiSiteCrawler(urls, max_articles, incremental=incremental, resume=resume)
+    try:
+        await crawler.run()
+    finally:
+        shutdown_parse_pool()
+        await close_llm_gateway()
+
+
+def run_sites_sync(urls: List[str], max_articles: Optional[int] = None, incremental: bool = False,
+                   resume: bool = False):
+    """
+    运行多站点爬虫（同步）
+
+    Args:
+        urls: 站点起始 URL 列表
+        max_articles: 每个站点的最大文章数量
+        incremental: 增量模式
+        resume: 从各站点上次中断处继续
+    """
+    asyncio.run(run_sites(urls, max_articles, incremental, resume))
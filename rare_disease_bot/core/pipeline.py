@@ -0,0 +1,248 @@
+"""抓取流水线 - 抓取 → 提取 → 翻译 → 保存 四个阶段并行运行"""
+import asyncio
+from typing import Callable, Dict, List, Optional
+from rich.console import Console
+
+from config.settings import (
+    PIPELINE_EXTRACT_WORKERS,
+    PIPELINE_MARKDOWN_WORKERS,
+    PIPELINE_SAVE_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+)
+from utils.checkpoint import QUEUED, FETCHED, EXTRACTED, TRANSLATED, SAVED, SKIPPED, FAILED
+from utils.document import ParsedDocument
+
+console = Console()
+
+# 队列结束标记
+_STOP = object()
+
+
+class CrawlPipeline:
+    """
+    基于 asyncio 队列的流式抓取流水线
+
+    每个阶段有独立的 worker 池，阶段之间使用有界队列连接：
+    下游繁忙时上游会在 put 处等待（背压），
+    因此浏览器可以在 LLM 翻译期间继续抓取，反之亦然。
+    """
+
+    def __init__(self, fetcher, extractor, saver, checkpoint=None, archive=None):
+        """
+        初始化流水线
+
+        Args:
+            fetcher: TieredFetcher（HTTP 优先，必要时使用浏览器页面池）
+            extractor: ArticleExtractor
+            saver: BatchArticleSaver（生成 Markdown 并保存）
+            checkpoint: 爬取检查点（记录每个 URL 完成的阶段及其结果，可选）
+            archive: HTML 归档（保存抓取到的页面，可选）
+        """
+        self.fetcher = fetcher
+        self.extractor = extractor
+        self.saver = saver
+        self.checkpoint = checkpoint
+        self.archive = archive
+
+        self.fetch_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.extract_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.markdown_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        self.save_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+        # 各阶段: (名称, 输入队列, 处理函数, 输出队列, worker 数量)
+        self._stages = [
+            ("fetch", self.fetch_queue, self._fetch, self.extract_queue, fetcher.concurrency),
+            ("extract", self.extract_queue, self._extract, self.markdown_queue, PIPELINE_EXTRACT_WORKERS),
+            ("markdown", self.markdown_queue, self._render, self.save_queue, PIPELINE_MARKDOWN_WORKERS),
+            ("save", self.save_queue, self._persist, None, PIPELINE_SAVE_WORKERS),
+        ]
+        self._workers: Dict[str, List[asyncio.Task]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # 进度
+        self.submitted = 0
+        self.finished = 0
+
+    def start(self):
+        """启动所有阶段的 worker"""
+        for name, queue, handler, next_queue, count in self._stages:
+            self._workers[name] = [
+                asyncio.create_task(self._worker(name, queue, handler, next_queue))
+                for _ in range(max(1, count))
+            ]
+        self._flush_task = asyncio.create_task(self._flush_ticker())
+
+    async def submit_url(self, url: str):
+        """提交待抓取的 URL（队列已满时等待）"""
+        self.submitted += 1
+        await self.fetch_queue.put(url)
+
+    async def submit_article(self, article: Dict):
+        """提交已有内容的文章（如 WordPress API 结果），直接进入翻译阶段"""
+        self.submitted += 1
+        await self.markdown_queue.put(article)
+
+    async def resume(self, url: str, state: str, payload):
+        """
+        从检查点恢复未完成的任务：按记录的状态直接进入下一阶段
+
+        Args:
+            url: 文章 URL
+            state: 检查点中记录的状态
+            payload: 该状态保存的结果（HTML、文章或 Markdown）
+        """
+        if self.saver.is_scraped(url):
+            # 上次中断于整批提交之后、记录检查点之前
+            await self._mark(url, SAVED)
+            return
+        if state == FETCHED and payload is not None:
+            # HTML 保存在检查点中，或只记录了归档摘要
+            html = payload.get('html') or await self._load_archived(payload.get('digest'))
+            payload = {'html': html} if html is not None else None
+        if state == QUEUED or payload is None:
+            await self.submit_url(url)
+            return
+        self.submitted += 1
+        if state == FETCHED:
+            await self.extract_queue.put((url, ParsedDocument(payload['html'], url)))
+        elif state == EXTRACTED:
+            await self.markdown_queue.put(payload)
+        elif state == TRANSLATED:
+            await self.save_queue.put((payload['article'], payload['professional_md'], payload['simplified_md']))
+
+    async def join(self):
+        """不再提交新任务，等待所有阶段按顺序处理完毕"""
+        for name, queue, _, _, _ in self._stages:
+            workers = self._workers.get(name, [])
+            for _ in workers:
+                await queue.put(_STOP)
+            await asyncio.gather(*workers)
+
+        # 写入缓冲区中剩余的文章
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await asyncio.to_thread(self.saver.flush)
+
+    async def _flush_ticker(self):
+        """定期检查写入缓冲区，避免低吞吐时文章长时间停留在内存中"""
+        interval = max(0.5, self.saver.batch_interval / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.saver.flush_if_due)
+            except Exception as e:
+                console.log(f"[red]✗ 批量写入出错: {e}[/red]")
+
+    async def _worker(self, name: str, queue: asyncio.Queue, handler: Callable,
+                      next_queue: Optional[asyncio.Queue]):
+        """通用 worker：从输入队列取任务，处理后放入下一阶段"""
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                break
+
+            try:
+                result = await handler(item)
+            except Exception as e:
+                console.log(f"[red]✗ 流水线阶段 {name} 出错: {e}[/red]")
+                # 记录失败，否则检查点中该 URL 一直处于未完成状态，每次恢复都会重试
+                await self._mark(self._item_url(item), FAILED)
+                result = None
+
+            if result is None or next_queue is None:
+                # 该任务在本阶段结束（完成、跳过或失败）
+                self.finished += 1
+            else:
+                await next_queue.put(result)
+
+    @staticmethod
+    def _item_url(item) -> Optional[str]:
+        """从阶段输入中取出 URL（URL、(URL, 文档)、文章或 (文章, Markdown, Markdown)）"""
+        if isinstance(item, str):
+            return item
+        if isinstance(item, tuple) and item:
+            item = item[0]
+            if isinstance(item, str):
+                return item
+        return item.get('url') if isinstance(item, dict) else None
+
+    async def _load_archived(self, digest: Optional[str]):
+        """从归档读取 HTML（未启用归档或内容缺失时返回 None）"""
+        if not self.archive or not digest:
+            return None
+        return await asyncio.to_thread(self.archive.load, digest)
+
+    async def _mark(self, url: str, state: str, payload=None):
+        """记录 URL 的处理阶段（未启用检查点时忽略；压缩和 SQLite 提交在线程中执行，不阻塞事件循环）"""
+        if self.checkpoint and url:
+            await asyncio.to_thread(self.checkpoint.mark, url, state, payload)
+
+    def _progress(self) -> str:
+        """进度前缀"""
+        return f"[{self.finished + 1}/{self.submitted}]"
+
+    async def _fetch(self, url: str):
+        """阶段 1: 抓取 HTML（HTTP 优先，必要时使用浏览器）"""
+        if self.saver.is_scraped(url):
+            console.print(f"{self._progress()} 跳过（已存在）")
+            await self._mark(url, SAVED)
+            return None
+
+        doc = await self.fetcher.fetch(url)
+        if not doc:
+            console.print(f"{self._progress()} 失败: 无法访问")
+            await self._mark(url, FAILED)
+            return None
+        # 已归档时检查点只记录摘要，恢复时从归档读取 HTML
+        if self.archive:
+            digest = await asyncio.to_thread(self.archive.put, url, doc.html)
+            await self._mark(url, FETCHED, {'digest': digest})
+        else:
+            await self._mark(url, FETCHED, {'html': doc.html})
+        return url, doc
+
+    async def _extract(self, item):
+        """阶段 2: 提取正文和元数据"""
+        url, doc = item
+        # 解析在解析进程池中执行，LLM 回退经由网关异步调用，都不阻塞事件循环
+        article = await self.extractor.aextract_article(url, doc)
+        if not article:
+            console.print(f"{self._progress()} 失败: 提取错误")
+            await self._mark(url, FAILED)
+            return None
+        await self._mark(url, EXTRACTED, article)
+        return article
+
+    async def _render(self, article: Dict):
+        """阶段 3: 翻译并生成 Markdown"""
+        if self.saver.should_skip(article):
+            await self._mark(article.get('url'), SKIPPED)
+            return None
+        professional_md, simplified_md = await self.saver.arender(article)
+        await self._mark(article.get('url'), TRANSLATED, {
+            'article': article,
+            'professional_md': professional_md,
+            'simplified_md': simplified_md,
+        })
+        return article, professional_md, simplified_md
+
+    async def _persist(self, item):
+        """阶段 4: 放入写入缓冲区（按批次保存文章和 Markdown，整批提交后才输出结果）"""
+        article, professional_md, simplified_md = item
+        progress = self._progress()
+        title = (article.get('title') or '')[:50]
+        
+        def on_commit(success: bool):
+            if success:
+                console.print(f"{progress} {title}")
+            else:
+                console.print(f"{progress} 失败: 写入错误")
+                
+        accepted = await asyncio.to_thread(
+            self.saver.persist, article, professional_md, simplified_md, on_commit
+        )
+        if not accepted:
+            console.print(f"{progress} 失败: 重复或缺少 URL")
+            await self._mark(article.get('url'), FAILED)
+        return None
@@ -0,0 +1,142 @@
+"""正文定位 - Readability 风格的评分：遍历一次段落节点，按文本密度和链接密度选出正文容器"""
+import re
+from typing import Callable, Dict, Iterable, Tuple
+
+from lxml import etree
+
+from utils.document import ParsedDocument, NON_TEXT_TAGS
+
+# 计分的段落标签（段落分数累加到父节点和祖父节点）
+SCORED_TAGS = {'p', 'pre', 'blockquote'}
+
+# 不参与统计的区域
+EXCLUDED_TAGS = NON_TEXT_TAGS | {'nav', 'header', 'footer', 'aside', 'iframe', 'form', 'button', 'svg'}
+EXCLUDED_CLASSES = {'sidebar', 'navigation', 'menu', 'comments'}
+
+# class / id 中的正负面特征
+POSITIVE_RE = re.compile(r'article|body|content|entry|main|page|post|text|blog|story', re.IGNORECASE)
+NEGATIVE_RE = re.compile(
+    r'comment|sidebar|widget|related|share|social|sponsor|advert|\bad\b|promo|menu|nav|'
+    r'footer|header|breadcrumb|author-box|tags|meta|popup|cookie|newsletter|subscribe',
+    re.IGNORECASE,
+)
+
+# 段落最短长度（更短的段落不计分）
+MIN_PARAGRAPH_CHARS = 25
+
+# 低于该分数时认为没有可靠的正文节点
+MIN_CANDIDATE_SCORE = 20
+
+
+def split_selector(selector: str) -> Tuple[set, set]:
+    """将只包含标签和 .class 的组合选择器拆分为 (标签集合, class 集合)"""
+    parts = [part.strip() for part in selector.split(',') if part.strip()]
+    return {p for p in parts if not p.startswith('.')}, {p[1:] for p in parts if p.startswith('.')}
+
+
+def exclusion_check(tags: Iterable[str], classes: Iterable[str]) -> Callable:
+    """
+    创建"是否位于排除区域内"的检查函数
+
+    沿祖先链向上查找匹配标签或 class 的节点，结果按节点缓存，
+    同一文档中的后续检查通常只需一次字典查找，不需要对整棵树执行选择器。
+    """
+    tags, classes = frozenset(tags), frozenset(classes)
+    cache: Dict = {}
+
+    def matches(node) -> bool:
+        tag = node.tag
+        if not isinstance(tag, str):
+            return False
+        if tag.lower() in tags:
+            return True
+        cls = node.get('class')
+        return bool(cls) and not classes.isdisjoint(cls.split())
+
+    def is_excluded(element) -> bool:
+        path = []
+        node, result = element, False
+        while node is not None:
+            if node in cache:
+                result = cache[node]
+                break
+            path.append(node)
+            if matches(node):
+                result = True
+                break
+            node = node.getparent()
+        for visited in path:
+            cache[visited] = result
+        return result
+
+    return is_excluded
+
+
+def _class_weight(element) -> int:
+    """根据 class 和 id 计算权重"""
+    weight = 0
+    for attr in (element.get('class'), element.get('id')):
+        if not attr:
+            continue
+        if NEGATIVE_RE.search(attr):
+            weight -= 25
+        if POSITIVE_RE.search(attr):
+            weight += 25
+    if element.tag in ('article', 'main'):
+        weight += 10
+    return weight
+
+
+def _text(element) -> str:
+    """元素文本（lxml 在 C 层拼接，不含 tail）"""
+    return etree.tostring(element, method='text', encoding=str, with_tail=False).strip()
+
+
+def find_content_node(doc: ParsedDocument, min_score: float = MIN_CANDIDATE_SCORE):
+    """
+    查找正文节点
+
+    只遍历段落标签（lxml 在 C 层过滤，不经过其它节点）：
+    每个段落按 1 + 逗号数 + 长度奖励计分，分数全部加给父节点、一半加给祖父节点；
+    导航、页眉页脚等区域内的段落不计分。
+    候选节点最终得分 = (段落分 + class/id 权重) × (1 - 链接密度)。
+
+    Args:
+        doc: 已解析的文档
+        min_score: 最低得分，低于该值时返回 None
+
+    Returns:
+        lxml 元素（共享文档树中的节点，调用方修改前需复制），找不到时返回 None
+    """
+    is_excluded = exclusion_check(EXCLUDED_TAGS, EXCLUDED_CLASSES)
+    scores: Dict = {}
+
+    for paragraph in doc.body.iter(*SCORED_TAGS):
+        if is_excluded(paragraph):
+            continue
+        text = _text(paragraph)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        parent = paragraph.getparent()
+        if parent is not None:
+            scores[parent] = scores.get(parent, 0) + score
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0) + score / 2
+
+    best, best_score = None, min_score
+    for node, score in scores.items():
+        if is_excluded(node):
+            continue
+        weighted = score + _class_weight(node)
+        if weighted <= best_score:
+            continue
+        # 链接密度只对候选节点计算
+        length = len(_text(node))
+        links = sum(len(_text(a)) for a in node.iter('a'))
+        final = weighted * (1 - links / length) if length else 0
+        if final > best_score:
+            best, best_score = node, final
+    return best
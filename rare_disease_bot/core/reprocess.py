@@ -0,0 +1,112 @@
+"""离线重新处理 - 从 HTML 归档重新提取正文并生成 Markdown，不访问目标网站"""
+import asyncio
+from typing import List, Optional
+
+from rich.console import Console
+
+from config.settings import PIPELINE_EXTRACT_WORKERS
+from core.agent import print_shared_stats
+from core.extractor import ArticleExtractor
+from core.markdown_generator import MarkdownGenerator
+from core.pipeline import CrawlPipeline
+from utils.document import ParsedDocument
+from utils.helpers import extract_domain
+from utils.html_archive import HTMLArchive, get_html_archive
+from utils.llm_gateway import close_llm_gateway
+from utils.parse_pool import shutdown_parse_pool
+from utils.storage import BatchArticleSaver, create_storage
+
+console = Console()
+
+
+class ArchiveFetcher:
+    """从 HTML 归档读取页面（接口与 TieredFetcher 一致，供流水线的抓取阶段使用）"""
+
+    def __init__(self, archive: HTMLArchive):
+        """
+        Args:
+            archive: HTML 归档
+        """
+        self.archive = archive
+
+    @property
+    def concurrency(self) -> int:
+        """读取并发数（本地解压，与提取 worker 数量一致即可）"""
+        return max(1, PIPELINE_EXTRACT_WORKERS)
+
+    async def fetch(self, url: str) -> Optional[ParsedDocument]:
+        """读取 URL 最新快照（没有快照时返回 None）"""
+        html = await asyncio.to_thread(self.archive.load_latest, url)
+        return ParsedDocument(html, url) if html is not None else None
+
+
+async def reprocess_site(url: str, archive: HTMLArchive, extractor: ArticleExtractor,
+                         md_generator: MarkdownGenerator, max_articles: Optional[int] = None):
+    """
+    重新处理单个站点的归档页面（提取 → 翻译 → 保存，结果写入站点存储目录）
+    
+    不检查历史和近似重复：已保存的文章重新提取后覆盖原有记录和 Markdown。
+
+    Args:
+        url: 站点起始 URL（按域名查找归档）
+        archive: HTML 归档
+        extractor: 内容提取器
+        md_generator: Markdown 生成器
+        max_articles: 最大文章数量
+    """
+    urls = archive.urls(extract_domain(url))
+    if max_articles:
+        urls = urls[:max_articles]
+    if not urls:
+        console.print(f"[yellow]归档中没有 {extract_domain(url)} 的页面[/yellow]")
+        return
+
+    console.print(f"\n[bold cyan]♻️  重新处理 {extract_domain(url)}: {len(urls)} 个归档页面[/bold cyan]")
+    storage = create_storage(url)
+    saver = BatchArticleSaver(storage, md_generator, overwrite=True)
+    # 不传入归档：读取的快照不会被再次写入
+    pipeline = CrawlPipeline(ArchiveFetcher(archive), extractor, saver)
+    pipeline.start()
+    try:
+        for article_url in urls:
+            await pipeline.submit_url(article_url)
+        await pipeline.join()
+    finally:
+        storage.close()
+    saver.print_summary()
+
+
+async def run_reprocess(urls: List[str], max_articles: Optional[int] = None):
+    """
+    从 HTML 归档重新处理站点（异步）
+
+    Args:
+        urls: 站点起始 URL 列表（同一域名只处理一次）
+        max_articles: 每个站点的最大文章数量
+    """
+    archive = get_html_archive() or HTMLArchive()
+    extractor = ArticleExtractor()
+    md_generator = MarkdownGenerator()
+
+    sites = {}
+    for url in urls:
+        sites.setdefault(extract_domain(url), url)
+    try:
+        for url in sites.values():
+            await reprocess_site(url, archive, extractor, md_generator, max_articles)
+        console.print()
+        print_shared_stats()
+    finally:
+        shutdown_parse_pool()
+        await close_llm_gateway()
+
+
+def run_reprocess_sync(urls: List[str], max_articles: Optional[int] = None):
+    """
+    从 HTML 归档重新处理站点（同步）
+
+    Args:
+        urls: 站点起始 URL 列表
+        max_articles: 每个站点的最大文章数量
+    """
+    asyncio.run(run_reprocess(urls, max_articles))
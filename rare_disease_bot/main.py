@@ -9,6 +9,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from rich.console import Console
 from core.agent import run_crawler_sync
+from core.orchestrator import load_sites, run_sites_sync
+from core.reprocess import run_reprocess_sync
 from utils.exporter import export_articles_to_server
 
 console = Console()
@@ -29,21 +31,57 @@ def main():
   
   # 详细模式
   python main.py --url https://rarediseases.org/news/ --verbose
+  
+  # 增量模式（适合每日定时任务，遇到已抓取的文章即停止翻页）
+  python main.py --url https://rarediseases.org/news/ --incremental
+  
+  # 中断后从断点继续（复用已分析的结构、已收集的链接和各阶段结果）
+  python main.py --url https://rarediseases.org/news/ --max-articles 50 --resume
+  
+  # 多站点模式（共用一个浏览器，每行取第一个 URL）
+  python main.py --sites rare_info_list.txt --max-articles 10
+  
+  # 修改提取规则或提示词后，从 HTML 归档重新处理（不访问目标网站）
+  python main.py --url https://rarediseases.org/news/ --reprocess
         """
     )
     
-    parser.add_argument(
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument(
         '--url',
         type=str,
-        required=True,
         help='目标网站 URL（列表页或文章页）'
     )
     
+    target.add_argument(
+        '--sites',
+        type=str,
+        help='站点列表文件（每行一个 URL，或含网址列的表格）'
+    )
+    
     parser.add_argument(
         '--max-articles',
         type=int,
         default=None,
-        help='最大文章数量（默认不限制）'
+        help='最大文章数量（多站点模式下为每个站点的数量，默认不限制）'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='增量模式：翻页直到遇到已抓取的文章为止'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从上次中断处继续（没有未完成的检查点时重新开始）'
+    )
+    
+    parser.add_argument(
+        '--reprocess',
+        action='store_true',
+        help='从 HTML 归档重新提取并生成 Markdown（不访问目标网站）'
     )
     
     parser.add_argument(
@@ -53,18 +91,52 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.reprocess and (args.resume or args.incremental):
+        # 重新处理只读取归档并覆盖已有记录，与检查点和增量翻页无关
+        parser.error("--reprocess 不能与 --resume 或 --incremental 同时使用")
+    
+    sites = None
+    if args.sites:
+        try:
+            sites = load_sites(args.sites)
+        except OSError as e:
+            console.print(f"\n错误: 无法读取站点列表: {e}")
+            sys.exit(1)
+        if not sites:
+            console.print(f"\n错误: 站点列表中没有 URL: {args.sites}")
+            sys.exit(1)
     
     # 简单打印开始信息
-    console.print(f"\n开始爬取: {args.url}")
+    if args.reprocess:
+        console.print(f"\n从 HTML 归档重新处理: {args.sites or args.url}")
+    elif sites:
+        console.print(f"\n开始爬取 {len(sites)} 个站点: {args.sites}")
+    else:
+        console.print(f"\n开始爬取: {args.url}")
     if args.max_articles:
         console.print(f"限制数量: {args.max_articles} 篇\n")
     
     try:
         # 运行爬虫
-        run_crawler_sync(
-            url=args.url,
-            max_articles=args.max_articles
-        )
+        if args.reprocess:
+            run_reprocess_sync(
+                urls=sites or [args.url],
+                max_articles=args.max_articles
+            )
+        elif sites:
+            run_sites_sync(
+                urls=sites,
+                max_articles=args.max_articles,
+                incremental=args.incremental,
+                resume=args.resume
+            )
+        else:
+            run_crawler_sync(
+                url=args.url,
+                max_articles=args.max_articles,
+                incremental=args.incremental,
+                resume=args.resume
+            )
         
         # 导出到 server/articles/<timestamp>
         console.print("\n导出文章到 server 目录...")
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+正文提取基准测试 - 对比三种正文定位方式的速度和召回率
+
+- 基线：改造前的 BeautifulSoup select_one 选择器循环（需要 beautifulsoup4，未安装时跳过）
+- 选择器：当前 lxml 实现的选择器循环（extract_content(use_scorer=False)）
+- 评分：当前默认的文本/链接密度评分（extract_content）
+
+每种方式都从 HTML 字符串开始计时（包括解析），结果可以直接比较。
+
+注意：仓库中没有样本页面的 HTML（example/articles 只保存了提取后的正文），
+下面的四种页面结构是为本脚本编写的合成模板：用已保存的正文拼接导航、侧栏、
+相关文章、推广、页脚等噪声。只有 wordpress 能被选择器直接命中，其余三种刻意
+构造为选择器回退到 body/main 或命中外层容器，因此合成页面上的召回率和噪声
+主要反映这些构造，不代表真实站点的效果。
+
+HTML 归档（HTML_ARCHIVE_ENABLED 时爬取写入）中有样本文章的快照时，
+另外对真实页面做同样的对比（以已保存的正文为参照）；没有快照时只有合成页面的结果。
+
+用法:
+  python scripts/benchmark_extraction.py
+  python scripts/benchmark_extraction.py --repeat 5 --limit 10
+  python scripts/benchmark_extraction.py --archive-dir data/html_archive
+"""
+import argparse
+import html
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 添加项目根目录到 Python 路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from rich.console import Console
+from rich.table import Table
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # 可选依赖，未安装时不测试基线
+    BeautifulSoup = None
+
+import core.extractor as extractor_module
+from config.settings import HTML_ARCHIVE_DIR
+from core.extractor import NAV_TEXT_RE, extract_content
+from utils.document import ParsedDocument
+from utils.html_archive import HTMLArchive
+
+console = Console()
+
+# 样本文章目录
+SAMPLE_DIRS = [
+    PROJECT_ROOT / 'example' / 'articles',
+    PROJECT_ROOT.parent / 'server' / 'articles',
+]
+
+NAV = '''<header class="site-header"><a href="/">Home</a><nav class="menu"><ul>
+<li><a href="/news/">News</a></li><li><a href="/about/">About us and our mission</a></li>
+<li><a href="/donate/">Donate to support rare disease patients</a></li></ul></nav></header>'''
+
+FOOTER_TEXT = ('We are a patient advocacy organization dedicated to individuals with rare diseases, '
+               'their families, and the organizations that serve them. Copyright, all rights reserved.')
+
+RELATED = ''.join(
+    f'<li><a href="/news/{i}/">Related story number {i}: new research on a rare condition</a></li>'
+    for i in range(6)
+)
+
+
+class _SilentConsole:
+    """不输出任何内容的控制台（rich 在 quiet 模式下仍会渲染日志）"""
+
+    def log(self, *args, **kwargs):
+        pass
+
+
+# 基线实现的选择器（与改造前的 _extract_content_with_beautifulsoup 相同）
+BASELINE_SELECTORS = [
+    'article .entry-content', '.entry-content',
+    'article .post-content', '.post-content',
+    'article .article-content', '.article-content',
+    'article', '.content', 'main article', 'main',
+]
+
+BASELINE_SKIP = ['click here', 'read more', 'learn more', 'subscribe', 'follow us']
+
+
+def baseline_extract(html_text: str) -> str:
+    """改造前的正文提取（BeautifulSoup select_one 循环，去掉了日志）"""
+    soup = BeautifulSoup(html_text, 'lxml')
+    for tag in soup.select('script, style, nav, header, footer, aside, iframe, noscript, '
+                           '.sidebar, .navigation, .menu, .comments'):
+        tag.decompose()
+
+    content_elem = None
+    for selector in BASELINE_SELECTORS:
+        elem = soup.select_one(selector)
+        if elem:
+            for unwanted in elem.select('.related, .share, .social, .advertisement, .ad, .author-box, .tags'):
+                unwanted.decompose()
+            if len(elem.get_text(strip=True, separator='\n')) > 200:
+                content_elem = elem
+                break
+    if not content_elem:
+        content_elem = soup.find('body') or soup
+
+    paragraphs = []
+    for tag in content_elem.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']):
+        text = tag.get_text(strip=True)
+        if text and len(text) > 15:
+            if any(skip in text.lower() for skip in BASELINE_SKIP) and len(text) < 50:
+                continue
+            paragraphs.append(text)
+
+    if not paragraphs or len('\n\n'.join(paragraphs)) < 100:
+        return content_elem.get_text(strip=True, separator='\n\n')
+    return '\n\n'.join(paragraphs)
+
+
+def _paragraphs_html(paragraphs: List[str]) -> str:
+    return ''.join(f'<p>{html.escape(p)}</p>' for p in paragraphs)
+
+
+def _page(title: str, body: str) -> str:
+    return f'<html><head><title>{html.escape(title)}</title></head><body>{body}</body></html>'
+
+
+def wordpress(title: str, paragraphs: List[str]) -> str:
+    """标准 WordPress 主题（合成，选择器可以直接命中）"""
+    return _page(title, f'''{NAV}<main><article class="post">
+<h1 class="entry-title">{html.escape(title)}</h1>
+<div class="entry-content">{_paragraphs_html(paragraphs)}
+<div class="share"><a href="#">Share on Facebook</a><a href="#">Share on X</a></div></div>
+<div class="related"><ul>{RELATED}</ul></div></article></main>
+<aside class="sidebar"><p>{FOOTER_TEXT}</p></aside><footer><p>{FOOTER_TEXT}</p></footer>''')
+
+
+def custom_theme(title: str, paragraphs: List[str]) -> str:
+    """自定义主题（合成，class 命名不在选择器列表中，选择器回退到 body）"""
+    return _page(title, f'''<div class="site-top"><a href="/">Home</a> <a href="/news/">News</a></div>
+<div class="layout"><div class="col-main"><h1>{html.escape(title)}</h1>
+<div class="story-body">{_paragraphs_html(paragraphs)}</div></div>
+<div class="col-rail"><h3>Most popular</h3><ul>{RELATED}</ul>
+<p>Sign up for our newsletter to receive the latest rare disease news in your inbox every week.</p></div></div>
+<div class="site-bottom"><p>{FOOTER_TEXT}</p></div>''')
+
+
+def content_wrapper(title: str, paragraphs: List[str]) -> str:
+    """外层 .content 包裹推广区块（合成，选择器命中外层容器，带入噪声）"""
+    return _page(title, f'''{NAV}<div class="content">
+<div class="promo-banner"><p>Join thousands of patients and caregivers at our annual summit this fall, register today.</p></div>
+<h1>{html.escape(title)}</h1><div class="post-body">{_paragraphs_html(paragraphs)}</div>
+<div class="newsletter-signup"><p>Stay informed about research, advocacy and policy updates from our community.</p></div>
+<ul class="cards">{RELATED}</ul></div><footer><p>{FOOTER_TEXT}</p></footer>''')
+
+
+def landing_main(title: str, paragraphs: List[str]) -> str:
+    """<main> 中混排卡片列表（合成，选择器回退到 main）"""
+    return _page(title, f'''{NAV}<main><section class="hero"><h1>{html.escape(title)}</h1></section>
+<div class="rich-text">{_paragraphs_html(paragraphs)}</div>
+<section class="cards"><h2>More from our newsroom</h2><ul>{RELATED}</ul></section></main>
+<footer><p>{FOOTER_TEXT}</p></footer>''')
+
+
+TEMPLATES: Dict[str, Callable[[str, List[str]], str]] = {
+    'wordpress': wordpress,
+    'custom-theme': custom_theme,
+    'content-wrapper': content_wrapper,
+    'landing-main': landing_main,
+}
+
+
+def load_samples(limit: int) -> List[Dict]:
+    """加载样本文章"""
+    articles = []
+    for directory in SAMPLE_DIRS:
+        for path in sorted(directory.glob('**/articles.jsonl')):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        article = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if article.get('content'):
+                        articles.append(article)
+    return articles[:limit] if limit else articles
+
+
+def expected_paragraphs(content: str) -> List[str]:
+    """正文中应当被提取的段落（与提取器的过滤规则一致）"""
+    return [
+        p.strip() for p in content.split('\n\n')
+        if len(p.strip()) > 15 and not (len(p.strip()) < 50 and NAV_TEXT_RE.search(p))
+    ]
+
+
+def load_archived(samples: List[Dict], archive_dir: Path) -> List:
+    """从 HTML 归档读取样本文章的真实页面（没有归档或快照时返回空列表）"""
+    if not (Path(archive_dir) / 'index.sqlite3').exists():
+        return []
+    archive = HTMLArchive(archive_dir)
+    try:
+        pages = []
+        for article in samples:
+            html_text = archive.load_latest(article.get('url', ''))
+            if html_text is not None:
+                pages.append((html_text, expected_paragraphs(article['content'])))
+        return pages
+    finally:
+        archive.close()
+
+
+def evaluate(extract: Callable[[str], str], pages: List, repeat: int) -> Dict:
+    """运行提取（从 HTML 字符串开始，包括解析）并统计耗时、召回率和噪声比例"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract(html_text) for html_text, _ in pages]
+    elapsed = (time.perf_counter() - started) / repeat
+
+    found = expected_total = noise = extracted_total = 0
+    for result, (_, expected) in zip(results, pages):
+        extracted = [p.strip() for p in result.split('\n\n') if p.strip()]
+        expected_set = set(expected)
+        found += len(expected_set.intersection(extracted))
+        expected_total += len(expected_set)
+        noise += sum(1 for p in extracted if p not in expected_set)
+        extracted_total += len(extracted)
+    return {
+        'time': elapsed,
+        'recall': found / expected_total if expected_total else 0.0,
+        'noise': noise / extracted_total if extracted_total else 0.0,
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='正文提取基准测试（基线 BeautifulSoup vs lxml 选择器 vs 评分）')
+    parser.add_argument('--repeat', type=int, default=3, help='每种方式重复运行的次数（默认: 3）')
+    parser.add_argument('--limit', type=int, default=0, help='最多使用的样本文章数（默认: 全部）')
+    parser.add_argument('--archive-dir', type=Path, default=HTML_ARCHIVE_DIR,
+                        help='HTML 归档目录（默认: HTML_ARCHIVE_DIR）')
+    args = parser.parse_args()
+
+    samples = load_samples(args.limit)
+    if not samples:
+        console.print("[red]❌ 未找到样本文章[/red]")
+        return 1
+
+    # 关闭提取器的逐页日志，避免日志渲染耗时干扰计时
+    extractor_console = extractor_module.console
+    extractor_module.console = _SilentConsole()
+
+    methods = {
+        'selectors': lambda h: extract_content(ParsedDocument(h), use_scorer=False),
+        'scorer': lambda h: extract_content(ParsedDocument(h)),
+    }
+    labels = {'baseline': '基线 BS4', 'selectors': 'lxml 选择器', 'scorer': '评分'}
+    if BeautifulSoup is not None:
+        methods = {'baseline': baseline_extract, **methods}
+
+    table = Table(title=f"正文提取基准（{len(samples)} 篇文章 × {args.repeat} 次，含解析）")
+    table.add_column("页面结构")
+    for key in methods:
+        table.add_column(f"{labels[key]} 耗时", justify="right")
+    for key in methods:
+        table.add_column(f"{labels[key]} 召回/噪声", justify="right")
+
+    suites = []
+    for name, template in TEMPLATES.items():
+        pages = []
+        for article in samples:
+            expected = expected_paragraphs(article['content'])
+            pages.append((template(article.get('title', ''), expected), expected))
+        suites.append((f"{name}（合成）", pages))
+    archived = load_archived(samples, args.archive_dir)
+    if archived:
+        suites.append((f"真实页面（归档 {len(archived)} 篇）", archived))
+
+    totals = {key: 0.0 for key in methods}
+    for name, pages in suites:
+        results = {key: evaluate(extract, pages, args.repeat) for key, extract in methods.items()}
+        for key, result in results.items():
+            totals[key] += result['time']
+        table.add_row(
+            name,
+            *(f"{result['time'] * 1000:.1f} ms" for result in results.values()),
+            *(f"{result['recall']:.1%} / {result['noise']:.1%}" for result in results.values()),
+        )
+
+    extractor_module.console = extractor_console
+    console.print(table)
+    console.print("[bold]合计: " + ", ".join(
+        f"{labels[key]} {total * 1000:.1f} ms"
+        + (f"（评分的 {total / totals['scorer']:.2f}x）" if key != 'scorer' else '')
+        for key, total in totals.items()
+    ) + "[/bold]")
+    if BeautifulSoup is None:
+        console.print("[yellow]未安装 beautifulsoup4，跳过基线（改造前的 BeautifulSoup 实现）[/yellow]")
+    if not archived:
+        console.print(f"[yellow]HTML 归档中没有样本文章的快照（{args.archive_dir}），"
+                      f"只测试了合成页面，结果不代表真实站点[/yellow]")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
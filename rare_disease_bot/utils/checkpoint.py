@@ -0,0 +1,170 @@
+"""爬取检查点 - 记录待抓取链接、每个 URL 的处理阶段和页面结构，中断后可从断点继续"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# URL 状态（按处理顺序）
+QUEUED = "queued"            # 已收集，等待抓取
+FETCHED = "fetched"          # 已抓取，负载为 HTML
+EXTRACTED = "extracted"      # 已提取，负载为文章数据
+TRANSLATED = "translated"    # 已翻译，负载为文章和两版 Markdown
+SAVED = "saved"              # 已写入存储
+SKIPPED = "skipped"          # 重复文章，未翻译
+FAILED = "failed"            # 抓取、提取或保存失败
+
+# 恢复时需要继续处理的状态
+PENDING_STATES = (QUEUED, FETCHED, EXTRACTED, TRANSLATED)
+
+
+class CrawlCheckpoint:
+    """
+    爬取检查点（SQLite，位于 CHECKPOINT_DIR/<域名>/，不随导出移走）
+
+    - meta: 起始 URL、页面结构、已收集的列表页数、链接是否收集完毕、本次爬取是否完成
+    - urls: 待抓取链接（按收集顺序）及其当前状态；
+      未完成阶段的中间结果（HTML、文章、Markdown）压缩后保存在 payload 中，
+      进入终态（saved / skipped / failed）后清空
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: SQLite 数据库路径
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 流水线（事件循环）和批量写入（工作线程）共用同一连接
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                state TEXT NOT NULL,
+                payload BLOB,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    # ---------- 运行信息 ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取运行信息"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any):
+        """写入运行信息"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, ensure_ascii=False))
+            )
+            self._conn.commit()
+
+    def reset(self, base_url: str):
+        """清空上次的检查点，开始新的爬取"""
+        with self._lock:
+            self._conn.execute("DELETE FROM meta")
+            self._conn.execute("DELETE FROM urls")
+            self._conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [('base_url', json.dumps(base_url)), ('started_at', json.dumps(time.time()))]
+            )
+            self._conn.commit()
+
+    def is_resumable(self, base_url: str) -> bool:
+        """是否存在同一起始 URL、已完成结构分析但尚未完成的爬取"""
+        return (
+            self.get('base_url') == base_url
+            and self.get('page_structure') is not None
+            and not self.get('completed', False)
+        )
+
+    def complete(self):
+        """标记本次爬取已完成（之后 --resume 不再恢复）"""
+        self.set('completed', True)
+
+    # ---------- URL 状态 ----------
+
+    @staticmethod
+    def _encode(payload: Any) -> Optional[bytes]:
+        """压缩负载（JSON + zlib）"""
+        if payload is None:
+            return None
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8'), 3)
+
+    def add_url(self, url: str, state: str = QUEUED, payload: Any = None) -> bool:
+        """
+        登记收集到的链接
+
+        Returns:
+            bool: 是否为新链接（已登记的链接保持原状态）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO urls (url, state, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (url, state, self._encode(payload), time.time())
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def mark(self, url: str, state: str, payload: Any = None):
+        """更新 URL 状态（payload 为该阶段的结果，终态时为空）"""
+        self.mark_many([url], state, payload)
+
+    def mark_many(self, urls: Iterable[str], state: str, payload: Any = None):
+        """批量更新 URL 状态"""
+        encoded = self._encode(payload)
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE urls SET state = ?, payload = ?, updated_at = ? WHERE url = ?",
+                [(state, encoded, now, url) for url in urls]
+            )
+            self._conn.commit()
+
+    def urls(self) -> List[str]:
+        """所有已收集的链接（按收集顺序）"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM urls ORDER BY seq")]
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """尚未完成的链接及其状态（按收集顺序，负载通过 payload() 按需读取）"""
+        placeholders = ', '.join('?' * len(PENDING_STATES))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT url, state FROM urls WHERE state IN ({placeholders}) ORDER BY seq",
+                PENDING_STATES
+            ).fetchall()
+
+    def payload(self, url: str) -> Any:
+        """读取 URL 当前阶段的结果"""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM urls WHERE url = ?", (url,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的链接数量"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,160 @@
+"""解析后的 HTML 文档 - 每个页面只用 lxml 解析一次，提取、元数据和清理共用同一棵树"""
+import copy
+import json
+from functools import cached_property, lru_cache
+from typing import Dict, Iterator, List, Optional, Union
+
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+# 没有任何元素的 HTML（空白、只有注释）解析失败时使用的空文档
+EMPTY_DOCUMENT = '<html><body></body></html>'
+
+# 文本提取时跳过的标签
+NON_TEXT_TAGS = {'script', 'style', 'meta', 'link', 'noscript', 'template'}
+
+
+@lru_cache(maxsize=256)
+def compile_selector(css: str) -> CSSSelector:
+    """编译 CSS 选择器（缓存，相同选择器只编译一次）"""
+    return CSSSelector(css)
+
+
+def iter_text(element, skip_tags=NON_TEXT_TAGS) -> Iterator[str]:
+    """按文档顺序遍历元素内的文本节点（跳过脚本、样式和注释）"""
+    tag = element.tag
+    if isinstance(tag, str) and tag.lower() not in skip_tags:
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from iter_text(child, skip_tags)
+            if child.tail:
+                yield child.tail
+    # 注释、处理指令和被跳过的标签只保留其后的 tail（由父元素输出）
+
+
+def get_text(element, separator: str = '', strip: bool = False) -> str:
+    """
+    获取元素文本（与 BeautifulSoup.get_text 语义一致）
+
+    Args:
+        element: lxml 元素
+        separator: 文本节点之间的分隔符
+        strip: 是否去除每个文本节点两端空白并丢弃空节点
+    """
+    texts = iter_text(element)
+    if strip:
+        texts = (t.strip() for t in texts)
+        texts = (t for t in texts if t)
+    return separator.join(texts)
+
+
+class ParsedDocument:
+    """
+    解析后的 HTML 文档
+
+    首次访问 tree 时用 lxml 解析（抓取层创建对象几乎没有开销），
+    标题、meta、JSON-LD 和清理后的文本按需计算并缓存。
+    树是共享的，调用方需要修改时应先 copy_element()。
+    """
+
+    def __init__(self, html: Union[str, bytes], url: str = ''):
+        """
+        Args:
+            html: HTML 内容
+            url: 页面 URL
+        """
+        self.html = html.decode('utf-8', errors='replace') if isinstance(html, bytes) else html
+        self.url = url
+        # 解析进程池中已得到的文章解析结果（抓取层顺带解析时设置，提取阶段不再重复解析）
+        self.parsed: Optional[Dict] = None
+
+    @classmethod
+    def ensure(cls, html: Union[str, 'ParsedDocument'], url: str = '') -> 'ParsedDocument':
+        """将 HTML 字符串转换为 ParsedDocument（已是文档时直接返回）"""
+        return html if isinstance(html, ParsedDocument) else cls(html, url)
+
+    def __len__(self) -> int:
+        return len(self.html)
+
+    @cached_property
+    def tree(self):
+        """lxml 文档树（内容为空白或只有注释时为空文档）"""
+        html = self.html if self.html and self.html.strip() else EMPTY_DOCUMENT
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # 带编码声明的字符串需要按字节解析
+            try:
+                return lxml.html.document_fromstring(
+                    html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8')
+                )
+            except etree.ParserError:
+                return lxml.html.document_fromstring(EMPTY_DOCUMENT)
+        except etree.ParserError:
+            # 没有任何元素（如只有注释）
+            return lxml.html.document_fromstring(EMPTY_DOCUMENT)
+
+    def select(self, css: str, root=None) -> List:
+        """CSS 选择（返回全部匹配元素）"""
+        return compile_selector(css)(self.tree if root is None else root)
+
+    def select_one(self, css: str, root=None):
+        """CSS 选择（返回第一个匹配元素，没有时返回 None）"""
+        matches = self.select(css, root)
+        return matches[0] if matches else None
+
+    @staticmethod
+    def copy_element(element):
+        """复制子树（需要删除节点时使用，不影响共享的文档树）"""
+        return copy.deepcopy(element)
+
+    @cached_property
+    def title(self) -> str:
+        """<title> 文本"""
+        elem = self.select_one('title')
+        return get_text(elem).strip() if elem is not None else ''
+
+    @cached_property
+    def body(self):
+        """<body> 元素（没有时为根元素）"""
+        body = self.tree.find('body')
+        return body if body is not None else self.tree
+
+    @cached_property
+    def meta(self) -> Dict[str, List[str]]:
+        """meta 标签内容：{property 或 name: [content, ...]}（保持文档顺序）"""
+        values: Dict[str, List[str]] = {}
+        for tag in self.select('meta'):
+            content = (tag.get('content') or '').strip()
+            if not content:
+                continue
+            for attr in ('property', 'name'):
+                key = tag.get(attr)
+                if key:
+                    values.setdefault(key, []).append(content)
+        return values
+
+    def meta_content(self, *keys: str) -> List[str]:
+        """按顺序获取多个 meta 键的内容"""
+        return [value for key in keys for value in self.meta.get(key, [])]
+
+    @cached_property
+    def jsonld(self) -> List:
+        """页面中所有 JSON-LD 数据（解析失败的块被忽略）"""
+        blocks = []
+        for script in self.select('script[type="application/ld+json"]'):
+            try:
+                blocks.append(json.loads(script.text or ''))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        return blocks
+
+    @cached_property
+    def text(self) -> str:
+        """清理后的页面文本（去除脚本和样式，每行一个片段）"""
+        raw = get_text(self.tree)
+        lines = (line.strip() for line in raw.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return '\n'.join(chunk for chunk in chunks if chunk)
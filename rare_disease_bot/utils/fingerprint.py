@@ -0,0 +1,217 @@
+"""内容指纹 - URL 规范化与 SimHash 近似重复检测"""
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from config.settings import SIMHASH_MAX_DISTANCE, SIMHASH_MIN_WORDS
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = {'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', '_ga', '_hsenc', '_hsmi'}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化 URL：去除跟踪参数、锚点、www. 前缀和末尾斜杠，参数排序
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        str: 规范化后的 URL
+    """
+    parsed = urlparse(url.strip())
+    netloc = parsed.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    path = parsed.path.rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunparse(('https', netloc, path, '', urlencode(query), ''))
+
+
+def _tokens(text: str) -> List[str]:
+    """分词（小写）"""
+    return _WORD_RE.findall(text.lower())
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """
+    计算 64 位 SimHash（基于连续 shingle 个词）
+
+    Args:
+        text: 正文
+        shingle: 每个特征包含的词数
+
+    Returns:
+        int: 64 位指纹
+    """
+    words = _tokens(text)
+    features = [' '.join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+class FingerprintIndex:
+    """
+    站点内容指纹索引
+
+    - 规范化 URL 精确匹配（跟踪参数、锚点等不同的同一页面）
+    - SimHash 分段索引查找近似重复正文：指纹切成 max_distance + 1 段，
+      距离不超过 max_distance 的两个指纹至少有一段完全相同（鸽巢原理）
+    记录以 JSONL 追加保存（fingerprints.jsonl），包括文档指纹和重复 URL 的别名。
+    """
+
+    def __init__(self, path: Path, max_distance: int = SIMHASH_MAX_DISTANCE,
+                 min_words: int = SIMHASH_MIN_WORDS):
+        """
+        Args:
+            path: 索引文件路径
+            max_distance: 视为近似重复的最大汉明距离
+            min_words: 正文少于该词数时只按 URL 判断（短文本指纹不可靠）
+        """
+        self.path = Path(path)
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self._bands = max_distance + 1
+        self._band_bits = 64 // self._bands
+
+        self._lock = threading.Lock()
+        self._urls: Dict[str, str] = {}          # 规范化 URL → 原始 URL
+        self._hashes: Dict[str, int] = {}        # 原始 URL → 指纹
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+        self.aliases: Dict[str, str] = {}        # 重复 URL → 原始 URL
+
+        self._load()
+
+    @property
+    def exists(self) -> bool:
+        """索引文件是否存在"""
+        return self.path.exists()
+
+    def _load(self):
+        """加载索引文件"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'alias_of' in record:
+                    self._register_alias(record['url'], record['alias_of'])
+                else:
+                    self._register(record['url'], record.get('simhash'))
+
+    def _band_keys(self, value: int) -> List[Tuple[int, int]]:
+        """指纹的分段键"""
+        mask = (1 << self._band_bits) - 1
+        return [(band, value >> (band * self._band_bits) & mask) for band in range(self._bands)]
+
+    def _fingerprint(self, text: str) -> Optional[int]:
+        """计算正文指纹（正文过短时返回 None）"""
+        if len(_tokens(text or '')) < self.min_words:
+            return None
+        return simhash(text)
+
+    def _register(self, url: str, value: Optional[int]):
+        """登记文档（调用方需持有锁或处于初始化阶段）"""
+        self._urls[canonicalize_url(url)] = url
+        if value is None:
+            return
+        self._hashes[url] = value
+        for key in self._band_keys(value):
+            self._buckets.setdefault(key, []).append(url)
+
+    def _register_alias(self, url: str, original: str):
+        """登记别名"""
+        self.aliases[url] = original
+        self._urls.setdefault(canonicalize_url(url), original)
+
+    def _append(self, records: Iterable[Dict]):
+        """追加记录到索引文件"""
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        if lines:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+    def is_known(self, url: str) -> bool:
+        """规范化后的 URL 是否已登记（包括别名）"""
+        return canonicalize_url(url) in self._urls
+
+    def find_duplicate(self, url: str, text: str) -> Optional[str]:
+        """
+        查找重复文章
+
+        Args:
+            url: 文章 URL
+            text: 正文
+
+        Returns:
+            str: 已登记的重复文章 URL，未找到时返回 None
+        """
+        with self._lock:
+            existing = self._urls.get(canonicalize_url(url))
+            if existing and existing != url:
+                return existing
+
+            value = self._fingerprint(text)
+            if value is None:
+                return None
+            candidates = {c for key in self._band_keys(value) for c in self._buckets.get(key, [])}
+            candidates.discard(url)
+            best = min(candidates, key=lambda c: hamming_distance(value, self._hashes[c]), default=None)
+            if best and hamming_distance(value, self._hashes[best]) <= self.max_distance:
+                return best
+        return None
+
+    def add(self, url: str, text: str):
+        """
+        登记文档指纹（仅内存，文章保存成功后调用 commit 写入文件）
+
+        Args:
+            url: 文章 URL
+            text: 正文
+        """
+        value = self._fingerprint(text)
+        with self._lock:
+            self._register(url, value)
+
+    def commit(self, urls: Iterable[str]):
+        """将已登记的文档写入索引文件"""
+        with self._lock:
+            self._append({'url': url, 'simhash': self._hashes.get(url)} for url in urls)
+
+    def add_alias(self, url: str, original: str):
+        """记录重复 URL 指向的原始文章"""
+        with self._lock:
+            self._register_alias(url, original)
+            self._append([{'url': url, 'alias_of': original}])
+
+    def discard(self, url: str):
+        """移除仅登记在内存中的文档（例如保存失败）"""
+        with self._lock:
+            self._urls.pop(canonicalize_url(url), None)
+            value = self._hashes.pop(url, None)
+            if value is not None:
+                for key in self._band_keys(value):
+                    bucket = self._buckets.get(key, [])
+                    if url in bucket:
+                        bucket.remove(url)
@@ -1,23 +1,14 @@
 """辅助函数"""
 import re
-from typing import Optional
+from typing import Optional, Union
 from datetime import datetime
-from bs4 import BeautifulSoup
 
+from .document import ParsedDocument
 
-def clean_html(html: str) -> str:
-    """清理 HTML"""
-    soup = BeautifulSoup(html, 'lxml')
-    
-    for script in soup(['script', 'style', 'meta', 'link']):
-        script.decompose()
-        
-    text = soup.get_text()
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = '\n'.join(chunk for chunk in chunks if chunk)
-    
-    return text
+
+def clean_html(html: Union[str, bytes, ParsedDocument]) -> str:
+    """清理 HTML（可传入已解析的文档复用同一棵树；传入字节串时可在解析进程池中执行）"""
+    return ParsedDocument.ensure(html).text
 
 
 def extract_domain(url: str) -> str:
@@ -0,0 +1,197 @@
+"""HTML 归档 - 按内容寻址压缩保存抓取到的页面，支持不访问网络重新提取"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时使用 gzip
+    zstandard = None
+
+from config.settings import (
+    HTML_ARCHIVE_ENABLED,
+    HTML_ARCHIVE_DIR,
+    HTML_ARCHIVE_CODEC,
+)
+from .helpers import extract_domain
+
+# 压缩格式对应的文件扩展名
+CODEC_SUFFIXES = {'zstd': '.html.zst', 'gzip': '.html.gz'}
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    """压缩"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    """解压"""
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HTMLArchive:
+    """
+    HTML 归档
+
+    - objects/<前两位>/<sha256><扩展名>: 页面内容，按 SHA-256 寻址，相同内容只保存一份
+    - index.sqlite3: 每次抓取一条记录 (url, 域名, 抓取时间, 摘要, 格式, 原始大小, 压缩后大小)
+
+    同一 URL 可以有多个快照，重新处理时使用最新的一个。
+    """
+
+    def __init__(self, root: Path = HTML_ARCHIVE_DIR, codec: str = HTML_ARCHIVE_CODEC):
+        """
+        Args:
+            root: 归档目录
+            codec: 压缩格式（zstd / gzip；zstandard 未安装时使用 gzip）
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = codec if codec in CODEC_SUFFIXES and (codec != 'zstd' or zstandard) else 'gzip'
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_snapshots_url ON snapshots(url, fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_snapshots_domain ON snapshots(domain, id);
+        """)
+        self._conn.commit()
+
+    def _object_path(self, digest: str, codec: str) -> Path:
+        """内容文件路径"""
+        return self.objects_dir / digest[:2] / f"{digest}{CODEC_SUFFIXES[codec]}"
+
+    def _find_object(self, digest: str) -> Optional[Tuple[Path, str]]:
+        """查找已保存的内容文件（任意格式）"""
+        for codec in CODEC_SUFFIXES:
+            path = self._object_path(digest, codec)
+            if path.exists():
+                return path, codec
+        return None
+
+    def put(self, url: str, html: Union[str, bytes], fetched_at: Optional[float] = None) -> str:
+        """
+        保存一次抓取结果（内容已存在时只写索引）
+
+        Args:
+            url: 页面 URL
+            html: HTML 内容
+            fetched_at: 抓取时间（默认当前时间）
+
+        Returns:
+            str: 内容摘要（SHA-256）
+        """
+        data = html.encode('utf-8') if isinstance(html, str) else html
+        digest = hashlib.sha256(data).hexdigest()
+
+        found = self._find_object(digest)
+        if found:
+            path, codec = found
+            stored_size = path.stat().st_size
+        else:
+            codec = self.codec
+            compressed = _compress(data, codec)
+            path = self._object_path(digest, codec)
+            path.parent.mkdir(exist_ok=True)
+            # 先写临时文件再重命名，中断时不会留下不完整的内容
+            tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, path)
+            stored_size = len(compressed)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO snapshots (url, domain, fetched_at, digest, codec, size, stored_size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, extract_domain(url), fetched_at or time.time(), digest, codec, len(data), stored_size)
+            )
+            self._conn.commit()
+        return digest
+
+    def load(self, digest: str) -> Optional[str]:
+        """按摘要读取 HTML（不存在时返回 None）"""
+        found = self._find_object(digest)
+        if not found:
+            return None
+        path, codec = found
+        return _decompress(path.read_bytes(), codec).decode('utf-8', errors='replace')
+
+    def latest(self, url: str) -> Optional[Tuple[float, str]]:
+        """URL 最新快照的 (抓取时间, 摘要)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT fetched_at, digest FROM snapshots WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,)
+            ).fetchone()
+
+    def load_latest(self, url: str) -> Optional[str]:
+        """读取 URL 最新快照的 HTML"""
+        snapshot = self.latest(url)
+        return self.load(snapshot[1]) if snapshot else None
+
+    def urls(self, domain: str) -> List[str]:
+        """站点已归档的 URL（按首次抓取顺序）"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT url FROM snapshots WHERE domain = ? GROUP BY url ORDER BY MIN(id)",
+                (domain,)
+            )]
+
+    def stats(self) -> Dict:
+        """获取归档统计（大小按去重后的内容计算）"""
+        with self._lock:
+            snapshots, urls = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT url) FROM snapshots"
+            ).fetchone()
+            objects, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM "
+                "(SELECT digest, MAX(size) AS size, MAX(stored_size) AS stored_size FROM snapshots GROUP BY digest)"
+            ).fetchone()
+        return {
+            'snapshots': snapshots,
+            'urls': urls,
+            'objects': objects,
+            'size': f"{stored / 1024 / 1024:.2f} MB",
+            'ratio': f"{raw / stored:.1f}x" if stored else "-",
+        }
+
+    def close(self):
+        """关闭索引连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_archive: Optional[HTMLArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_html_archive() -> Optional[HTMLArchive]:
+    """获取全局共享的 HTML 归档（未启用时返回 None）"""
+    global _archive
+    if not HTML_ARCHIVE_ENABLED:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = HTMLArchive()
+        return _archive
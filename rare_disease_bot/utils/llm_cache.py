@@ -0,0 +1,208 @@
+"""LLM 响应缓存 - 基于 SQLite 的内容寻址持久化缓存"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+from rich.console import Console
+
+from config.settings import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_MB,
+)
+
+console = Console()
+
+
+class LLMCache:
+    """
+    LLM 响应缓存
+
+    键为 (模型, 温度, 提示词版本, 输入消息) 的哈希，
+    超过容量上限时按最近访问时间淘汰（LRU）。
+    """
+
+    def __init__(self, path: Path = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            path: SQLite 数据库路径
+            max_bytes: 缓存容量上限（字节）
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        # 多个线程（流水线 worker）共享同一连接，用锁串行化访问
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        self._total_bytes = row[0]
+
+        # 命中统计（按命名空间）
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(model: str, temperature: float, version: str, messages: List[BaseMessage]) -> str:
+        """根据模型参数、提示词版本和输入消息生成缓存键"""
+        payload = json.dumps({
+            'model': model,
+            'temperature': temperature,
+            'version': version,
+            'messages': [[m.type, m.content] for m in messages],
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, namespace: str = "default") -> Optional[str]:
+        """读取缓存（未命中返回 None）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits[namespace] = self.hits.get(namespace, 0) + 1
+            return row[0]
+
+    def put(self, key: str, response: str, namespace: str = "default"):
+        """写入缓存，超过容量时淘汰最久未访问的条目"""
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, namespace, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, response, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """淘汰最久未访问的条目，直到低于容量上限的 90%（调用方需持有锁）"""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY accessed_at ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+
+    def stats(self) -> Dict:
+        """获取命中统计"""
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': f"{hits / total:.1%}" if total else "0.0%",
+            'by_namespace': {
+                ns: {'hits': self.hits.get(ns, 0), 'misses': self.misses.get(ns, 0)}
+                for ns in sorted(set(self.hits) | set(self.misses))
+            },
+            'size': f"{self._total_bytes / 1024 / 1024:.2f} MB",
+        }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """获取全局共享的 LLM 缓存（未启用时返回 None）"""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+class CachedChatModel:
+    """带缓存的 Chat 模型包装器（接口与 ChatOpenAI 的 invoke/ainvoke 一致）"""
+
+    def __init__(self, llm, namespace: str, version: str, cache: Optional[LLMCache] = None):
+        """
+        Args:
+            llm: 提供 model_name、temperature 和 invoke/ainvoke 的模型（通常为 LLMGateway）
+            namespace: 命名空间（区分调用方，用于统计）
+            version: 提示词版本（修改提示词时递增，使旧缓存失效）
+            cache: 缓存实例，默认使用全局共享缓存
+        """
+        self.llm = llm
+        self.namespace = namespace
+        self.version = version
+        self.cache = cache or get_llm_cache()
+
+    def _key(self, messages: List[BaseMessage]) -> str:
+        """生成缓存键"""
+        return LLMCache.make_key(
+            self.llm.model_name,
+            self.llm.temperature,
+            f"{self.namespace}:{self.version}",
+            messages,
+        )
+
+    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """调用 LLM（优先读取缓存）"""
+        if not self.cache:
+            return self.llm.invoke(messages)
+
+        key = self._key(messages)
+        cached = self.cache.get(key, self.namespace)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+        response = self.llm.invoke(messages)
+        if response.content:
+            self.cache.put(key, response.content, self.namespace)
+        return response
+
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """调用 LLM（异步，优先读取缓存）"""
+        if not self.cache:
+            return await self.llm.ainvoke(messages)
+
+        key = self._key(messages)
+        cached = self.cache.get(key, self.namespace)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+        response = await self.llm.ainvoke(messages)
+        if response.content:
+            self.cache.put(key, response.content, self.namespace)
+        return response
@@ -0,0 +1,357 @@
+"""LLM 网关 - 共用客户端与连接池，全局并发上限、每分钟 token 限速和 429/5xx 指数退避"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_openai import ChatOpenAI
+from rich.console import Console
+
+from config.settings import (
+    OPENAI_API_BASE,
+    OPENAI_API_KEY,
+    MODEL_NAME,
+    LLM_TEMPERATURE,
+    LLM_MAX_CONCURRENCY,
+    LLM_TPM_LIMIT,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_TIMEOUT,
+)
+from .llm_cache import CachedChatModel
+from .scheduler import parse_retry_after
+
+console = Console()
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """粗略估算消息的 token 数（英文约 4 字符 1 个 token，中文约 1 字 1 个 token）"""
+    tokens = 0
+    for message in messages:
+        text = message.content if isinstance(message.content, str) else str(message.content)
+        ascii_chars = sum(1 for c in text if c.isascii())
+        tokens += ascii_chars // 4 + (len(text) - ascii_chars) + 4
+    return tokens
+
+
+class TokenRateLimiter:
+    """
+    每分钟 token 限速（令牌桶，线程安全，同步和异步调用共用）
+
+    调用前按估算值预留，调用后按实际用量修正（桶可以暂时为负，后续调用相应等待）。
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        """
+        Args:
+            tokens_per_minute: 每分钟 token 上限（0 表示不限）
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """尝试预留 token，返回需要等待的秒数（0 表示已预留）"""
+        if not self.capacity:
+            return 0.0
+        tokens = min(float(tokens), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    async def acquire(self, tokens: int):
+        """预留 token（异步等待）"""
+        while (wait := self._reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: int):
+        """预留 token（阻塞等待，用于工作线程）"""
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+
+    def adjust(self, reserved: int, actual: int):
+        """按实际用量修正预留值"""
+        if not self.capacity:
+            return
+        with self._lock:
+            self.tokens -= actual - reserved
+
+
+class ConcurrencyLimiter:
+    """
+    并发上限（线程安全，同步和异步调用共用同一组名额）
+
+    名额用完后按先来先得排队：工作线程阻塞等待，协程挂起等待（不阻塞事件循环）；
+    释放名额时直接交给队首的等待者。
+    """
+
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: 同时持有的名额上限
+        """
+        self.limit = max(1, limit)
+        self._available = self.limit
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, waiter) -> bool:
+        """有空闲名额时立即占用，否则登记为等待者（调用方需持有锁）"""
+        if self._available > 0 and not self._waiters:
+            self._available -= 1
+            return True
+        self._waiters.append(waiter)
+        return False
+
+    def release(self):
+        """释放名额（有等待者时直接交给队首）"""
+        with self._lock:
+            if not self._waiters:
+                self._available += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(self._wake, future)
+
+    def _wake(self, future: asyncio.Future):
+        """在等待者的事件循环中交付名额（等待者已取消时转交下一个）"""
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    @contextmanager
+    def slot_sync(self):
+        """占用一个名额（阻塞等待，用于工作线程）"""
+        event = threading.Event()
+        with self._lock:
+            acquired = self._try_acquire(event)
+        if not acquired:
+            event.wait()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个名额（异步等待）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            acquired = self._try_acquire((loop, future))
+        if not acquired:
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    waiting = (loop, future) in self._waiters
+                    if waiting:
+                        # 尚未分配到名额
+                        self._waiters.remove((loop, future))
+                if not waiting and future.done() and not future.cancelled():
+                    # 名额已交付但任务随即被取消
+                    self.release()
+                # 其余情况名额仍在交付途中，由 _wake 转交
+                raise
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LLMGateway:
+    """
+    LLM 网关
+
+    所有组件共用一个 ChatOpenAI 和 HTTP 连接池（同步、异步各一个客户端），并统一施加：
+    - 全局并发上限（同步和异步调用共用同一组名额，合计不超过 max_concurrency）
+    - 每分钟 token 限速（两种调用共用）
+    - 429 / 5xx / 连接错误时指数退避重试（优先遵守 Retry-After）
+    缓存命中的调用不经过网关（见 chat_model）。
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 tokens_per_minute: int = LLM_TPM_LIMIT,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX):
+        """
+        Args:
+            max_concurrency: 同时进行的 LLM 请求上限
+            tokens_per_minute: 每分钟 token 上限（0 表示不限）
+            max_retries: 最大重试次数
+            backoff_base: 首次重试等待秒数（之后每次翻倍）
+            backoff_max: 单次等待上限（秒）
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = TokenRateLimiter(tokens_per_minute)
+
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        self.http_client = httpx.Client(limits=limits, timeout=LLM_TIMEOUT)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT)
+        # 重试由网关处理，客户端自身不重试
+        self.llm = ChatOpenAI(
+            model=MODEL_NAME,
+            openai_api_base=OPENAI_API_BASE,
+            openai_api_key=OPENAI_API_KEY,
+            temperature=LLM_TEMPERATURE,
+            max_retries=0,
+            request_timeout=LLM_TIMEOUT,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+        )
+        self.model_name = self.llm.model_name
+        self.temperature = self.llm.temperature
+
+        # 同步和异步调用共用的并发名额（两个 HTTP 客户端各自的连接池不会叠加出更多并发）
+        self.concurrency = ConcurrencyLimiter(self.max_concurrency)
+
+        # 统计
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.tokens = 0
+
+    def chat_model(self, namespace: str, version: str) -> CachedChatModel:
+        """
+        获取带缓存的聊天模型（组件使用的入口）
+
+        Args:
+            namespace: 命名空间（区分调用方，用于缓存统计）
+            version: 提示词版本（修改提示词时递增，使旧缓存失效）
+        """
+        return CachedChatModel(self, namespace=namespace, version=version)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """可重试的错误返回等待秒数，否则返回 None"""
+        if isinstance(error, openai.APIStatusError):
+            status = error.status_code
+            if status != 429 and status < 500:
+                return None
+            retry_after = parse_retry_after(error.response.headers.get('retry-after'))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        elif not isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+            return None
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _record(self, response: AIMessage, reserved: int):
+        """记录用量并修正限速预留值"""
+        usage = getattr(response, 'usage_metadata', None) or {}
+        actual = usage.get('total_tokens') or reserved
+        self.limiter.adjust(reserved, actual)
+        with self._stats_lock:
+            self.calls += 1
+            self.tokens += actual
+
+    def _should_retry(self, error: Exception, attempt: int) -> Optional[float]:
+        """判断是否重试并记录统计"""
+        delay = self._retry_delay(error, attempt) if attempt < self.max_retries else None
+        with self._stats_lock:
+            if delay is None:
+                self.failures += 1
+            else:
+                self.retries += 1
+        if delay is not None:
+            console.log(f"[yellow]⚠️  LLM 请求失败（{type(error).__name__}），{delay:.1f} 秒后重试 "
+                        f"({attempt + 1}/{self.max_retries})[/yellow]")
+        return delay
+
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """调用 LLM（异步，受全局并发和 token 限速约束，失败时退避重试）"""
+        # 预留输入和大致相同长度的输出
+        reserved = estimate_tokens(messages) * 2
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(reserved)
+            try:
+                async with self.concurrency.slot():
+                    response = await self.llm.ainvoke(messages)
+            except Exception as e:
+                self.limiter.adjust(reserved, 0)
+                delay = self._should_retry(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._record(response, reserved)
+            return response
+
+    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """调用 LLM（同步，用于工作线程；与 ainvoke 共用并发名额和 token 限速）"""
+        reserved = estimate_tokens(messages) * 2
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire_sync(reserved)
+            try:
+                with self.concurrency.slot_sync():
+                    response = self.llm.invoke(messages)
+            except Exception as e:
+                self.limiter.adjust(reserved, 0)
+                delay = self._should_retry(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._record(response, reserved)
+            return response
+
+    def stats(self) -> Dict:
+        """获取调用统计"""
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'tokens': self.tokens,
+        }
+
+    async def aclose(self):
+        """关闭连接池"""
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """获取全局共享的 LLM 网关"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+
+async def close_llm_gateway():
+    """关闭全局 LLM 网关（爬取结束时调用）"""
+    global _gateway
+    with _gateway_lock:
+        gateway, _gateway = _gateway, None
+    if gateway is not None:
+        await gateway.aclose()
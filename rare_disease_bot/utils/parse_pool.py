@@ -0,0 +1,118 @@
+"""解析进程池 - 在子进程中执行 CPU 密集的 HTML 解析，避免阻塞事件循环"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Optional
+
+from rich.console import Console
+
+from config.settings import PARSE_WORKERS
+
+console = Console()
+
+
+class ParsePool:
+    """
+    解析执行器
+
+    任务函数必须是模块级函数，参数为 HTML 字节串等可序列化的数据，
+    返回紧凑的结果（正文、元数据字典等），不返回 lxml 树。
+    workers 为 0 时在线程中执行（与原来的 asyncio.to_thread 行为相同）。
+    子进程使用 spawn 启动，不继承父进程中的线程和数据库连接。
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS):
+        """
+        Args:
+            workers: 子进程数量（0 表示不使用进程池）
+        """
+        self.workers = max(0, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """获取（必要时创建）进程池"""
+        if not self.workers:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                console.log(f"[cyan]解析进程池已启动（{self.workers} 个进程）[/cyan]")
+            return self._executor
+
+    def _reset(self, error: Exception):
+        """子进程异常退出后丢弃进程池（下次使用时重建）"""
+        console.log(f"[yellow]⚠️  解析进程池异常，改为在当前进程解析: {error}[/yellow]")
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def run(self, func: Callable, *args):
+        """
+        异步执行解析任务
+
+        Args:
+            func: 模块级任务函数
+            *args: 任务参数（需可序列化）
+
+        Returns:
+            任务函数的返回值
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return await asyncio.to_thread(func, *args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            self._reset(e)
+            return await asyncio.to_thread(func, *args)
+
+    async def map(self, func: Callable, items: Iterable) -> List:
+        """对每个参数并发执行解析任务（保持顺序）"""
+        return list(await asyncio.gather(*(self.run(func, item) for item in items)))
+
+    def call(self, func: Callable, *args):
+        """在工作线程中同步执行解析任务（阻塞当前线程，不阻塞事件循环）"""
+        executor = self._get_executor()
+        if executor is None:
+            return func(*args)
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool as e:
+            self._reset(e)
+            return func(*args)
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+_pool: Optional[ParsePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    """获取全局共享的解析执行器"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParsePool()
+        return _pool
+
+
+def shutdown_parse_pool():
+    """关闭全局解析执行器（爬取结束时调用）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
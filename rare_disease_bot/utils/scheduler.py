@@ -0,0 +1,204 @@
+"""抓取调度器 - 按域名限速（令牌桶）与限并发，遵守 Retry-After 和 robots.txt Crawl-delay"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+from urllib.robotparser import RobotFileParser
+
+from rich.console import Console
+
+from config.settings import (
+    USER_AGENT,
+    HOST_RATE_LIMIT,
+    HOST_BURST,
+    HOST_MAX_CONCURRENCY,
+    GLOBAL_MAX_CONCURRENCY,
+    RESPECT_ROBOTS_TXT,
+)
+from utils.helpers import extract_domain
+
+console = Console()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头
+
+    Args:
+        value: 秒数或 HTTP 日期
+
+    Returns:
+        float: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _fetch_crawl_delay(url: str) -> Optional[float]:
+    """读取站点 robots.txt 中的 Crawl-delay（阻塞调用，在线程中执行）"""
+    parsed = urlparse(url)
+    robots_url = f"{parsed.scheme or 'https'}://{parsed.netloc}/robots.txt"
+    try:
+        request = Request(robots_url, headers={'User-Agent': USER_AGENT})
+        with urlopen(request, timeout=10) as resp:
+            if resp.getcode() != 200:
+                return None
+            lines = resp.read().decode('utf-8', errors='ignore').splitlines()
+    except Exception:
+        # robots.txt 不可访问（常见于 Cloudflare 拦截）时不施加额外限制
+        return None
+
+    parser = RobotFileParser()
+    parser.parse(lines)
+    delay = parser.crawl_delay(USER_AGENT)
+    return float(delay) if delay else None
+
+
+@dataclass
+class HostState:
+    """单个域名的调度状态"""
+    rate: float
+    burst: float
+    semaphore: asyncio.Semaphore
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class HostScheduler:
+    """
+    按域名的礼貌调度器
+
+    - 令牌桶限制每秒请求数（robots.txt 有 Crawl-delay 时取更慢者）
+    - 信号量限制同一域名的最大并发
+    - 全局信号量限制所有域名合计的并发（多站点时各站点按先来先得轮流占用）
+    - 收到 429/503 + Retry-After 时暂停该域名
+    浏览器（Playwright）和 HTTP（WordPress API）两条路径共用同一实例。
+    """
+
+    def __init__(self, rate: float = HOST_RATE_LIMIT, burst: float = HOST_BURST,
+                 max_concurrency: int = HOST_MAX_CONCURRENCY,
+                 global_concurrency: int = GLOBAL_MAX_CONCURRENCY,
+                 respect_robots: bool = RESPECT_ROBOTS_TXT):
+        """
+        Args:
+            rate: 每个域名每秒请求数（0 表示不限速）
+            burst: 令牌桶容量（允许的突发请求数）
+            max_concurrency: 每个域名最大并发
+            global_concurrency: 所有域名合计的最大并发
+            respect_robots: 是否读取 robots.txt 的 Crawl-delay
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.global_concurrency = max(1, global_concurrency)
+        self.respect_robots = respect_robots
+        self._hosts: Dict[str, HostState] = {}
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._global_semaphore = asyncio.Semaphore(self.global_concurrency)
+
+        # 统计：各域名累计请求数
+        self.requests: Dict[str, int] = {}
+
+    async def _host(self, url: str) -> HostState:
+        """获取（必要时初始化）域名状态"""
+        domain = extract_domain(url)
+        if domain in self._hosts:
+            return self._hosts[domain]
+
+        # 按域名加锁：读取某个站点的 robots.txt 时不阻塞其他站点
+        async with self._host_locks.setdefault(domain, asyncio.Lock()):
+            if domain not in self._hosts:
+                rate, burst = self.rate, self.burst
+                if self.respect_robots:
+                    crawl_delay = await asyncio.to_thread(_fetch_crawl_delay, url)
+                    if crawl_delay:
+                        console.log(f"[cyan]robots.txt Crawl-delay: {domain} = {crawl_delay}s[/cyan]")
+                        rate = min(rate, 1 / crawl_delay) if rate > 0 else 1 / crawl_delay
+                        burst = 1.0
+                self._hosts[domain] = HostState(
+                    rate=rate,
+                    burst=burst,
+                    tokens=burst,
+                    semaphore=asyncio.Semaphore(self.max_concurrency),
+                )
+            return self._hosts[domain]
+
+    async def wait_turn(self, url: str):
+        """等待该域名的下一个请求配额（令牌桶 + Retry-After 暂停）"""
+        state = await self._host(url)
+        async with state.lock:
+            while True:
+                now = time.monotonic()
+                if state.blocked_until > now:
+                    await asyncio.sleep(state.blocked_until - now)
+                    # 暂停期间不累积令牌
+                    state.tokens = 0
+                    state.updated_at = time.monotonic()
+                    continue
+
+                if state.rate <= 0:
+                    # 不限速
+                    return
+
+                # 补充令牌
+                state.tokens = min(state.burst, state.tokens + (now - state.updated_at) * state.rate)
+                state.updated_at = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    return
+                await asyncio.sleep((1 - state.tokens) / state.rate)
+
+    @asynccontextmanager
+    async def concurrency(self, url: str):
+        """
+        占用该域名的一个并发名额（同时占用一个全局名额）
+
+        先取域名名额再取全局名额：每个站点最多有 max_concurrency 个请求在全局队列中排队，
+        全局名额按等待顺序分配，单个站点无法占满所有名额。
+        """
+        state = await self._host(url)
+        domain = extract_domain(url)
+        async with state.semaphore:
+            async with self._global_semaphore:
+                self.requests[domain] = self.requests.get(domain, 0) + 1
+                yield
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """占用并发名额并等待请求配额（用于单次 HTTP 请求）"""
+        async with self.concurrency(url):
+            await self.wait_turn(url)
+            yield
+
+    def defer(self, url: str, seconds: Optional[float]):
+        """收到 429/503 时暂停该域名的请求"""
+        state = self._hosts.get(extract_domain(url))
+        if not state or not seconds:
+            return
+        console.log(f"[yellow]⚠️  {extract_domain(url)} 要求等待 {seconds:.1f} 秒（Retry-After）[/yellow]")
+        state.blocked_until = max(state.blocked_until, time.monotonic() + seconds)
+
+
+_scheduler: Optional[HostScheduler] = None
+
+
+def get_scheduler() -> HostScheduler:
+    """获取全局共享的调度器"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = HostScheduler()
+    return _scheduler
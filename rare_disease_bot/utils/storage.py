@@ -1,16 +1,44 @@
 """数据存储模块"""
+import hashlib
 import json
+import os
 import re
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
 from urllib.parse import urlparse
 from rich.console import Console
 
-from config.settings import DATA_DIR
+from config.settings import (
+    DATA_DIR,
+    CHECKPOINT_DIR,
+    SITE_STATE_DIR,
+    SITE_PROFILE_TTL_HOURS,
+    STORAGE_BACKEND,
+    SAVE_BATCH_SIZE,
+    SAVE_BATCH_INTERVAL,
+    DEDUP_ENABLED,
+)
+from .checkpoint import SAVED, FAILED
+from .fingerprint import FingerprintIndex
+from .helpers import parse_date
 
 console = Console()
 
+_ISO_DATE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+
+
+def _iso_date(value) -> Optional[str]:
+    """将日期规范为 YYYY-MM-DD，无法识别时返回 None（高水位只接受可比较的日期）"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    match = _ISO_DATE_RE.match(value) or _ISO_DATE_RE.match(parse_date(value) or '')
+    return match.group(1) if match else None
+
 
 class ArticleStorage:
     """文章存储管理器"""
@@ -35,16 +63,68 @@ class ArticleStorage:
         self.md_professional_dir.mkdir(exist_ok=True)
         self.md_simplified_dir.mkdir(exist_ok=True)
         
+        # 跨运行保留的站点状态（导出只移走 DATA_DIR）
+        self.state_dir = SITE_STATE_DIR / self.domain
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        
         # 文件路径
         self.articles_file = self.website_dir / "articles.jsonl"
-        self.history_file = self.website_dir / "history.txt"
-        self.metadata_file = self.website_dir / "metadata.json"
+        # 历史、高水位标记和提交记录放在站点状态目录：导出后增量模式仍能识别已抓取的文章
+        self.history_file = self._state_file("history.txt")
+        self.metadata_file = self._state_file("metadata.json")
+        self.site_profile_file = self._state_file("site_profile.json")
+        self.commit_file = self._state_file("commit.json")
+        
+        # 回滚上次中断时未提交的批次，保证 JSONL 与历史记录一致
+        self._recover_uncommitted()
         
         # 加载历史记录
         self.history = self._load_history()
         
+        # 增量抓取的高水位标记（已保存的最新文章）
+        self.high_water_mark: Optional[Dict] = self.load_metadata().get('high_water_mark')
+        if self.high_water_mark and not _iso_date(self.high_water_mark.get('date')):
+            # 旧版本可能记录了无法解析的日期
+            self.high_water_mark = None
+        
+        # 并发保存时保护文件写入与历史记录
+        self._lock = threading.Lock()
+        
+        # articles.jsonl 的行偏移索引（按需构建，用于随机访问）
+        self._offsets: List[int] = []
+        self._offsets_size = 0
+        
         console.log(f"[cyan]📁 存储目录: {self.website_dir}[/cyan]")
         
+    def _state_file(self, name: str) -> Path:
+        """站点状态文件路径（旧版本保存在站点目录中，存在时迁移，SQLite 的 WAL 文件一起迁移）"""
+        path = self.state_dir / name
+        legacy = self.website_dir / name
+        if legacy.exists() and not path.exists():
+            for suffix in ('', '-wal', '-shm'):
+                old = legacy.with_name(legacy.name + suffix)
+                if old.exists():
+                    os.replace(old, path.with_name(path.name + suffix))
+        return path
+        
+    def checkpoint_path(self, url: str) -> Path:
+        """
+        爬取检查点路径（按起始 URL 区分，同一域名的多个入口互不覆盖）
+        
+        位于 CHECKPOINT_DIR/<域名>/ 而不是站点目录：导出会移走站点目录，检查点需要保留。
+        """
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        path = CHECKPOINT_DIR / self.domain / f"checkpoint_{digest}.sqlite3"
+        legacy = self.website_dir / path.name
+        if legacy.exists() and not path.exists():
+            # 旧版本保存在站点目录中（连同 WAL 文件一起迁移）
+            path.parent.mkdir(parents=True, exist_ok=True)
+            for suffix in ('', '-wal', '-shm'):
+                old = legacy.with_name(legacy.name + suffix)
+                if old.exists():
+                    os.replace(old, path.with_name(path.name + suffix))
+        return path
+        
     def _extract_domain(self, url: str) -> str:
         """提取域名"""
         parsed = urlparse(url)
@@ -54,6 +134,59 @@ class ArticleStorage:
             domain = domain[4:]
         return domain
         
+    @staticmethod
+    def _atomic_write(path: Path, text: str):
+        """原子写入：先写临时文件并 fsync，再重命名覆盖目标文件"""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        
+    def _recover_uncommitted(self):
+        """
+        按提交记录（commit.json）截断 articles.jsonl 和 history.txt
+        
+        每个批次先追加到两个文件，再原子替换 commit.json 作为提交点；
+        中断后超出已提交长度的部分属于未完成的批次，直接丢弃。
+        """
+        files = {'articles': self.articles_file, 'history': self.history_file}
+        if not self.commit_file.exists():
+            # 旧版本数据没有提交记录，以当前文件长度为准
+            if any(path.exists() for path in files.values()):
+                self._write_commit_record()
+            return
+            
+        try:
+            with open(self.commit_file, 'r', encoding='utf-8') as f:
+                committed = json.load(f)
+        except Exception as e:
+            console.log(f"[yellow]⚠️  提交记录读取失败，跳过恢复: {e}[/yellow]")
+            return
+            
+        shrunk = False
+        for key, path in files.items():
+            size = committed.get(key, 0)
+            actual = path.stat().st_size if path.exists() else 0
+            if actual > size:
+                console.log(f"[yellow]⚠️  丢弃 {path.name} 中未提交的数据（{actual - size} 字节）[/yellow]")
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+            elif actual < size:
+                # 文章已被导出移走，或覆盖写入（重写文件）中断于替换文件之前
+                shrunk = True
+        if shrunk:
+            self._write_commit_record()
+                    
+    def _write_commit_record(self):
+        """记录当前已提交的文件长度（原子写入）"""
+        self._atomic_write(self.commit_file, json.dumps({
+            'articles': self.articles_file.stat().st_size if self.articles_file.exists() else 0,
+            'history': self.history_file.stat().st_size if self.history_file.exists() else 0,
+            'committed_at': datetime.now().isoformat(),
+        }))
+        
     def _load_history(self) -> set:
         """加载已爬取的 URL 历史"""
         if self.history_file.exists():
@@ -97,70 +230,271 @@ class ArticleStorage:
         Returns:
             bool: 是否成功
         """
-        url = article.get('url')
-        if not url:
-            console.log("[red]✗ 文章缺少 URL[/red]")
-            return False
+        return self.save_articles([(article, professional_md, simplified_md)])[0]
+        
+    def save_articles(self, items: List[Tuple[Dict, Optional[str], Optional[str]]],
+                      overwrite: bool = False) -> List[bool]:
+        """
+        批量保存文章（文章记录一次性提交）
+        
+        Args:
+            items: [(文章数据, 专业版 Markdown, 小白版 Markdown), ...]
+            overwrite: 覆盖已保存的同一 URL 的文章记录和 Markdown（用于重新处理）
             
-        # 检查去重
-        if self.is_scraped(url):
-            console.log(f"[yellow]⚠️  文章已存在: {url}[/yellow]")
-            return False
+        Returns:
+            List[bool]: 每篇文章是否保存成功
+        """
+        results: List[bool] = []
+        pending: List[Tuple[Dict, Optional[str], Optional[str]]] = []
+        pending_urls = set()
+        
+        with self._lock:
+            for article, professional_md, simplified_md in items:
+                url = article.get('url')
+                if not url:
+                    console.log("[red]✗ 文章缺少 URL[/red]")
+                    results.append(False)
+                    continue
+                    
+                # 检查去重
+                if (self.is_scraped(url) and not overwrite) or url in pending_urls:
+                    console.log(f"[yellow]⚠️  文章已存在: {url}[/yellow]")
+                    results.append(False)
+                    continue
+                    
+                self._prepare_article(article)
+                pending.append((article, professional_md, simplified_md))
+                pending_urls.add(url)
+                results.append(True)
             
-        try:
-            # 添加元数据
-            article['source_website'] = self.domain
-            article['scraped_at'] = datetime.now().isoformat()
-            article['content_length'] = len(article.get('content', ''))
-            
-            # 保存到 JSONL
-            with open(self.articles_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(article, ensure_ascii=False) + '\n')
-            
-            # 保存 Markdown 文件
-            if professional_md or simplified_md:
-                title = article.get('title', 'Untitled')
-                safe_filename = self._sanitize_filename(title)
-                date = article.get('date', 'unknown')
-                
-                # 文件名格式: YYYY-MM-DD_标题.md
-                filename = f"{date}_{safe_filename}.md"
-                
-                if professional_md:
-                    prof_path = self.md_professional_dir / filename
-                    with open(prof_path, 'w', encoding='utf-8') as f:
-                        f.write(professional_md)
-                    console.log(f"[green]  ✓ 专业版 MD: {filename}[/green]")
-                
-                if simplified_md:
-                    simp_path = self.md_simplified_dir / filename
-                    with open(simp_path, 'w', encoding='utf-8') as f:
-                        f.write(simplified_md)
-                    console.log(f"[green]  ✓ 小白版 MD: {filename}[/green]")
-                
-            # 更新历史
-            self.history.add(url)
-            with open(self.history_file, 'a', encoding='utf-8') as f:
-                f.write(url + '\n')
+            if pending:
+                try:
+                    # 文章记录先提交，作为保存完成的标记
+                    replaced = self._commit_articles([article for article, _, _ in pending], overwrite)
+                except Exception as e:
+                    console.log(f"[red]✗ 保存失败: {e}[/red]")
+                    # 记录未提交，本批次全部视为失败
+                    return [False] * len(results)
+                    
+                # Markdown 在提交之后写入：中断时不会留下没有文章记录的孤立文件，
+                # 已提交的文章缺少 Markdown 时记录错误（文章记录仍然有效）
+                for article, professional_md, simplified_md in pending:
+                    self._update_high_water_mark(article)
+                    try:
+                        if article['url'] in replaced:
+                            self._remove_stale_markdowns(replaced[article['url']], article)
+                        self._write_markdowns(article, professional_md, simplified_md)
+                    except Exception as e:
+                        console.log(f"[red]✗ Markdown 写入失败: {article.get('url')}: {e}[/red]")
+                    console.log(f"[green]✓ 已保存: {article.get('title', 'Untitled')}[/green]")
+                    
+        return results
+        
+    def _prepare_article(self, article: Dict):
+        """添加存储元数据"""
+        article['source_website'] = self.domain
+        article['scraped_at'] = datetime.now().isoformat()
+        article['content_length'] = len(article.get('content', ''))
+        
+    def _markdown_filename(self, article: Dict) -> str:
+        """Markdown 文件名，格式: YYYY-MM-DD_标题.md"""
+        safe_filename = self._sanitize_filename(article.get('title', 'Untitled'))
+        return f"{article.get('date', 'unknown')}_{safe_filename}.md"
+        
+    def _remove_stale_markdowns(self, old: Dict, article: Dict):
+        """覆盖文章时删除旧版本的 Markdown（标题或日期变化导致文件名不同）"""
+        old_filename = self._markdown_filename(old)
+        if old_filename == self._markdown_filename(article):
+            return
+        for directory in (self.md_professional_dir, self.md_simplified_dir):
+            (directory / old_filename).unlink(missing_ok=True)
+            
+    def _write_markdowns(self, article: Dict, professional_md: Optional[str],
+                         simplified_md: Optional[str]):
+        """保存 Markdown 文件"""
+        if not (professional_md or simplified_md):
+            return
+            
+        filename = self._markdown_filename(article)
+        
+        if professional_md:
+            self._atomic_write(self.md_professional_dir / filename, professional_md)
+            console.log(f"[green]  ✓ 专业版 MD: {filename}[/green]")
+        
+        if simplified_md:
+            self._atomic_write(self.md_simplified_dir / filename, simplified_md)
+            console.log(f"[green]  ✓ 小白版 MD: {filename}[/green]")
+            
+    def _commit_articles(self, articles: List[Dict], overwrite: bool = False) -> Dict[str, Dict]:
+        """
+        写入文章记录并更新历史（调用方需持有锁）
+        
+        整个批次一次性追加、每个文件只 fsync 一次，
+        然后原子更新 commit.json 作为提交点。
+        
+        Args:
+            articles: 文章列表
+            overwrite: 已保存的 URL 替换原有记录（否则调用方需保证 URL 未保存）
+            
+        Returns:
+            Dict[str, Dict]: 被替换的旧文章记录（URL → 文章）
+        """
+        existing = [article for article in articles if article['url'] in self.history] if overwrite else []
+        if existing:
+            existing_urls = {article['url'] for article in existing}
+            new_articles = [article for article in articles if article['url'] not in existing_urls]
+            if new_articles:
+                self._append_articles(new_articles)
+            return self._replace_articles(existing)
+        self._append_articles(articles)
+        return {}
+        
+    def _append_articles(self, articles: List[Dict]):
+        """追加新文章记录和历史 URL 并提交"""
+        lines = ''.join(json.dumps(article, ensure_ascii=False) + '\n' for article in articles)
+        urls = ''.join(article['url'] + '\n' for article in articles)
+        
+        for path, text in ((self.articles_file, lines), (self.history_file, urls)):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+        
+        self._write_commit_record()
+        self.history.update(article['url'] for article in articles)
+        
+    def _replace_articles(self, articles: List[Dict]) -> Dict[str, Dict]:
+        """
+        原地替换已保存的文章记录（重写 articles.jsonl，历史不变）
+        
+        新文件写入临时文件并 fsync 后再替换。新文件不短于已提交长度时先更新提交记录：
+        否则中断后恢复会按旧长度截断新文件；提交记录比旧文件长时恢复只会重新记录长度。
+        """
+        replacements = {article['url']: json.dumps(article, ensure_ascii=False) + '\n' for article in articles}
+        replaced: Dict[str, Dict] = {}
+        tmp_path = self.articles_file.with_name(f".{self.articles_file.name}.tmp")
+        self.articles_file.touch(exist_ok=True)
+        with open(self.articles_file, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                try:
+                    old = json.loads(line)
+                except json.JSONDecodeError:
+                    old = {}
+                url = old.get('url')
+                if url in replacements and url not in replaced:
+                    replaced[url] = old
+                    dst.write(replacements[url].encode('utf-8'))
+                else:
+                    dst.write(line if line.endswith(b'\n') else line + b'\n')
+            # 历史中有但记录缺失的 URL 追加到末尾
+            for url, line in replacements.items():
+                if url not in replaced:
+                    dst.write(line.encode('utf-8'))
+            dst.flush()
+            os.fsync(dst.fileno())
+            new_size = dst.tell()
+            
+        committed_size = self.articles_file.stat().st_size
+        if new_size >= committed_size:
+            self._atomic_write(self.commit_file, json.dumps({
+                'articles': new_size,
+                'history': self.history_file.stat().st_size if self.history_file.exists() else 0,
+                'committed_at': datetime.now().isoformat(),
+            }))
+            os.replace(tmp_path, self.articles_file)
+        else:
+            os.replace(tmp_path, self.articles_file)
+            self._write_commit_record()
+        # 行偏移已变化
+        self._offsets, self._offsets_size = [], 0
+        return replaced
                 
-            console.log(f"[green]✓ 已保存: {article.get('title', 'Untitled')}[/green]")
-            return True
+    def close(self):
+        """释放资源（JSONL 存储无需处理）"""
+        pass
             
+    def load_metadata(self) -> Dict:
+        """加载元数据"""
+        if not self.metadata_file.exists():
+            return {}
+        try:
+            with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
         except Exception as e:
-            console.log(f"[red]✗ 保存失败: {e}[/red]")
-            import traceback
-            console.log(f"[red]{traceback.format_exc()}[/red]")
-            return False
+            console.log(f"[yellow]⚠️  元数据读取失败: {e}[/yellow]")
+            return {}
             
     def save_metadata(self, metadata: Dict):
-        """保存元数据"""
+        """保存元数据（与已有内容合并）"""
         try:
+            merged = {**self.load_metadata(), **metadata}
             with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+                json.dump(merged, f, ensure_ascii=False, indent=2)
             console.log("[green]✓ 元数据已保存[/green]")
         except Exception as e:
             console.log(f"[red]✗ 元数据保存失败: {e}[/red]")
             
+    def _update_high_water_mark(self, article: Dict):
+        """如果文章比当前高水位更新，则更新高水位（仅内存，由 save_high_water_mark 持久化）"""
+        # 只比较规范化后的 ISO 日期，无法解析的日期（如 "unknown"）不参与
+        date = _iso_date(article.get('date'))
+        if not date:
+            return
+        current = self.high_water_mark or {}
+        if date >= (current.get('date') or ''):
+            self.high_water_mark = {'date': date, 'url': article.get('url')}
+            
+    def save_high_water_mark(self):
+        """持久化高水位标记到 metadata.json"""
+        if self.high_water_mark:
+            self.save_metadata({
+                'high_water_mark': {**self.high_water_mark, 'updated_at': datetime.now().isoformat()}
+            })
+            
+    def load_site_profile(self, url: str) -> Optional[Dict]:
+        """
+        读取缓存的页面结构
+        
+        Args:
+            url: 页面 URL
+            
+        Returns:
+            Dict: 页面结构，不存在或已过期时返回 None
+        """
+        if not self.site_profile_file.exists():
+            return None
+        try:
+            with open(self.site_profile_file, 'r', encoding='utf-8') as f:
+                profiles = json.load(f)
+            entry = profiles.get(url)
+            if not entry:
+                return None
+            saved_at = datetime.fromisoformat(entry['saved_at'])
+            if datetime.now() - saved_at > timedelta(hours=SITE_PROFILE_TTL_HOURS):
+                return None
+            return entry['structure']
+        except Exception as e:
+            console.log(f"[yellow]⚠️  站点结构缓存读取失败: {e}[/yellow]")
+            return None
+            
+    def save_site_profile(self, url: str, structure: Dict):
+        """缓存页面结构（按页面 URL 存储）"""
+        try:
+            profiles = {}
+            if self.site_profile_file.exists():
+                with open(self.site_profile_file, 'r', encoding='utf-8') as f:
+                    profiles = json.load(f)
+            profiles[url] = {
+                'saved_at': datetime.now().isoformat(),
+                'structure': structure,
+            }
+            with open(self.site_profile_file, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            console.log(f"[yellow]⚠️  站点结构缓存保存失败: {e}[/yellow]")
+            
     def get_stats(self) -> Dict:
         """获取统计信息"""
         total_articles = len(self.history)
@@ -178,36 +512,430 @@ class ArticleStorage:
         }
         
     def load_articles(self) -> List[Dict]:
-        """加载所有文章"""
-        articles = []
-        if self.articles_file.exists():
-            with open(self.articles_file, 'r', encoding='utf-8') as f:
+        """加载所有文章（大规模语料请使用 iter_articles）"""
+        return list(self.iter_articles())
+        
+    @staticmethod
+    def _matches(article: Dict, start_date: Optional[str], end_date: Optional[str],
+                 categories: Optional[Iterable[str]]) -> bool:
+        """检查文章是否满足日期范围和分类过滤"""
+        date = article.get('date') or ''
+        if start_date and date < start_date:
+            return False
+        if end_date and date > end_date:
+            return False
+        if categories and not set(categories) & set(article.get('categories') or []):
+            return False
+        return True
+        
+    @staticmethod
+    def _project(article: Dict, fields: Optional[Iterable[str]]) -> Dict:
+        """字段投影"""
+        if not fields:
+            return article
+        return {field: article.get(field) for field in fields}
+        
+    def _offset_index(self) -> List[int]:
+        """
+        获取 articles.jsonl 的行偏移索引（第 N 篇文章 → 字节偏移）
+        
+        文件增长时只扫描新增部分。
+        """
+        if not self.articles_file.exists():
+            return []
+        size = self.articles_file.stat().st_size
+        if size < self._offsets_size:
+            # 文件被替换，重新构建
+            self._offsets, self._offsets_size = [], 0
+        if size > self._offsets_size:
+            with open(self.articles_file, 'rb') as f:
+                f.seek(self._offsets_size)
+                offset = self._offsets_size
                 for line in f:
                     if line.strip():
-                        try:
-                            articles.append(json.loads(line))
-                        except:
-                            pass
-        return articles
+                        self._offsets.append(offset)
+                    offset += len(line)
+            self._offsets_size = size
+        return self._offsets
+        
+    def iter_articles(self, fields: Optional[Iterable[str]] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      categories: Optional[Iterable[str]] = None,
+                      start: int = 0) -> Iterator[Dict]:
+        """
+        流式遍历文章（常量内存）
+        
+        Args:
+            fields: 只返回指定字段，例如 ['url', 'title', 'date']
+            start_date: 起始日期（含，YYYY-MM-DD）
+            end_date: 结束日期（含，YYYY-MM-DD）
+            categories: 分类过滤（包含任一分类即可）
+            start: 跳过前 N 篇已保存的文章（按保存顺序计数，与 get_article 的序号一致，
+                先定位再过滤，即第 N 篇之后满足条件的文章；使用偏移索引直接定位）
+            
+        Yields:
+            Dict: 文章数据
+        """
+        if not self.articles_file.exists():
+            return
+            
+        offset = 0
+        if start:
+            offsets = self._offset_index()
+            if start >= len(offsets):
+                return
+            offset = offsets[start]
+            
+        with open(self.articles_file, 'rb') as f:
+            f.seek(offset)
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    article = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    console.log(f"[yellow]⚠️  跳过损坏的记录（偏移 {offset} 后第 {line_no} 行）: {e}[/yellow]")
+                    continue
+                if self._matches(article, start_date, end_date, categories):
+                    yield self._project(article, fields)
+                    
+    def get_article(self, index: int) -> Optional[Dict]:
+        """按序号随机访问文章（基于偏移索引）"""
+        offsets = self._offset_index()
+        if not 0 <= index < len(offsets):
+            return None
+        with open(self.articles_file, 'rb') as f:
+            f.seek(offsets[index])
+            try:
+                return json.loads(f.readline())
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                console.log(f"[yellow]⚠️  第 {index} 篇文章记录损坏: {e}[/yellow]")
+                return None
+
+
+class SQLiteArticleStorage(ArticleStorage):
+    """
+    基于 SQLite 的文章存储（接口与 ArticleStorage 相同）
+    
+    使用 WAL 模式，url 唯一索引 + date / domain 索引；
+    is_scraped 直接查询索引，不在启动时加载全部历史；
+    批量保存在同一个事务中提交。Markdown 文件仍按原目录结构写入；
+    数据库位于站点状态目录，导出只移走 Markdown，已有语料跨运行保留。
+    """
+    
+    def __init__(self, base_url: str):
+        """
+        初始化存储
+        
+        Args:
+            base_url: 网站 URL（用于提取域名）
+        """
+        super().__init__(base_url)
+        self.db_file = self._state_file("articles.sqlite3")
+        
+        # 流水线 worker 在不同线程中调用，共享连接并用锁串行化
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT,
+                date TEXT,
+                domain TEXT,
+                scraped_at TEXT,
+                data TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(date);
+            CREATE INDEX IF NOT EXISTS idx_articles_domain ON articles(domain);
+        """)
+        self._conn.commit()
+        self._migrate_from_jsonl()
+        
+    def _load_history(self) -> set:
+        """SQLite 存储不在内存中保存历史（is_scraped 直接查询索引）"""
+        return set()
+        
+    def _migrate_from_jsonl(self):
+        """首次使用时导入已有的 articles.jsonl 和 history.txt"""
+        if self._conn.execute("SELECT 1 FROM articles LIMIT 1").fetchone():
+            return
+        if not self.articles_file.exists() and not self.history_file.exists():
+            return
+            
+        console.log("[cyan]导入已有的 JSONL 数据到 SQLite...[/cyan]")
+        count = 0
+        rows: List[Tuple] = []
+        with self._db_lock, self._conn:
+            # 流式读取 JSONL，分块插入
+            for article in ArticleStorage.iter_articles(self):
+                if not article.get('url'):
+                    continue
+                rows.append(self._to_row(article))
+                if len(rows) >= 1000:
+                    self._insert_rows(rows)
+                    count += len(rows)
+                    rows = []
+            self._insert_rows(rows)
+            count += len(rows)
+            
+            # 只有 URL 的历史记录（无文章数据）
+            history_urls = ArticleStorage._load_history(self)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO articles (url, domain) VALUES (?, ?)",
+                [(url, self.domain) for url in history_urls]
+            )
+        console.log(f"[green]✓ 已导入 {count} 篇文章, {len(history_urls)} 条历史记录[/green]")
+        
+    def _insert_rows(self, rows: List[Tuple]):
+        """插入文章行（调用方负责事务）"""
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO articles (url, title, date, domain, scraped_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        
+    def _to_row(self, article: Dict) -> Tuple:
+        """文章 → 数据库行"""
+        return (
+            article['url'],
+            article.get('title'),
+            article.get('date'),
+            article.get('source_website') or self.domain,
+            article.get('scraped_at'),
+            json.dumps(article, ensure_ascii=False),
+        )
+        
+    def is_scraped(self, url: str) -> bool:
+        """检查 URL 是否已爬取（索引查询）"""
+        with self._db_lock:
+            row = self._conn.execute("SELECT 1 FROM articles WHERE url = ?", (url,)).fetchone()
+        return row is not None
+        
+    def _commit_articles(self, articles: List[Dict], overwrite: bool = False) -> Dict[str, Dict]:
+        """在一个事务中写入文章记录（调用方需持有锁，覆盖时返回被替换的旧记录）"""
+        replaced: Dict[str, Dict] = {}
+        with self._db_lock, self._conn:
+            rows = [self._to_row(article) for article in articles]
+            if not overwrite:
+                self._insert_rows(rows)
+                return replaced
+            for article in articles:
+                row = self._conn.execute(
+                    "SELECT data FROM articles WHERE url = ? AND data IS NOT NULL", (article['url'],)
+                ).fetchone()
+                if row:
+                    replaced[article['url']] = json.loads(row[0])
+            # 保留原有 id，文章顺序不变
+            self._conn.executemany(
+                "INSERT INTO articles (url, title, date, domain, scraped_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET title = excluded.title, date = excluded.date, "
+                "domain = excluded.domain, scraped_at = excluded.scraped_at, data = excluded.data",
+                rows
+            )
+        return replaced
+            
+    def query_articles(self, limit: int = 100, offset: int = 0,
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> List[Dict]:
+        """
+        分页查询文章（按日期倒序）
+        
+        Args:
+            limit: 每页数量
+            offset: 偏移量
+            start_date: 起始日期（含，YYYY-MM-DD）
+            end_date: 结束日期（含，YYYY-MM-DD）
+            
+        Returns:
+            List[Dict]: 文章列表
+        """
+        sql = "SELECT data FROM articles WHERE data IS NOT NULL"
+        params: List = []
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(end_date)
+        sql += " ORDER BY date DESC, id DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        
+        with self._db_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+        
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        with self._db_lock:
+            total_articles = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        total_size = self.db_file.stat().st_size if self.db_file.exists() else 0
+        return {
+            'domain': self.domain,
+            'total_articles': total_articles,
+            'storage_path': str(self.website_dir),
+            'file_size': f"{total_size / 1024:.2f} KB"
+        }
+        
+    def iter_articles(self, fields: Optional[Iterable[str]] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      categories: Optional[Iterable[str]] = None,
+                      start: int = 0) -> Iterator[Dict]:
+        """
+        流式遍历文章（常量内存，参数同 ArticleStorage.iter_articles）
+        
+        使用独立的只读连接逐批读取（WAL 模式下不阻塞写入）。
+        start 与 JSONL 后端含义相同：先跳过前 N 篇已保存的文章，再应用日期和分类过滤。
+        """
+        sql = "SELECT data FROM articles WHERE data IS NOT NULL"
+        params: List = []
+        if start:
+            # 第 N 篇文章的 id（超出范围时子查询为 NULL，不返回任何结果）
+            sql += (" AND id >= (SELECT id FROM articles WHERE data IS NOT NULL"
+                    " ORDER BY id LIMIT 1 OFFSET ?)")
+            params.append(start)
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(end_date)
+        sql += " ORDER BY id"
+        
+        conn = sqlite3.connect(str(self.db_file))
+        try:
+            cursor = conn.execute(sql, params)
+            while rows := cursor.fetchmany(500):
+                for (data,) in rows:
+                    article = json.loads(data)
+                    if self._matches(article, None, None, categories):
+                        yield self._project(article, fields)
+        finally:
+            conn.close()
+            
+    def get_article(self, index: int) -> Optional[Dict]:
+        """按序号随机访问文章"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM articles WHERE data IS NOT NULL ORDER BY id LIMIT 1 OFFSET ?",
+                (index,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+        
+    def close(self):
+        """关闭数据库连接"""
+        with self._db_lock:
+            self._conn.close()
+
+
+def create_storage(base_url: str) -> ArticleStorage:
+    """根据 STORAGE_BACKEND 配置创建文章存储（jsonl / sqlite）"""
+    if STORAGE_BACKEND == 'sqlite':
+        return SQLiteArticleStorage(base_url)
+    return ArticleStorage(base_url)
 
 
 class BatchArticleSaver:
-    """批量文章保存器"""
+    """
+    批量文章保存器
+    
+    文章先进入写入缓冲区，累计 batch_size 篇或最早一篇等待超过
+    batch_interval 秒后一次性写入存储（整批一次提交）。结束前需调用 flush()。
+    生成 Markdown 之前按内容指纹跳过重复文章（同一篇文章的不同 URL），
+    重复 URL 作为别名记录到指纹索引中。
+    覆盖模式（重新处理）不检查历史和近似重复，已保存的文章直接被替换。
+    """
     
-    def __init__(self, storage: ArticleStorage, md_generator=None):
+    def __init__(self, storage: ArticleStorage, md_generator=None,
+                 batch_size: int = SAVE_BATCH_SIZE, batch_interval: float = SAVE_BATCH_INTERVAL,
+                 dedup: bool = DEDUP_ENABLED, checkpoint=None, overwrite: bool = False):
+        """
+        Args:
+            storage: 文章存储
+            md_generator: Markdown 生成器
+            batch_size: 每批写入的文章数量
+            batch_interval: 缓冲区最长等待时间（秒）
+            dedup: 是否启用近似重复检测
+            checkpoint: 爬取检查点（整批提交后记录 URL 已保存）
+            overwrite: 覆盖模式，已保存的文章重新处理后替换原有记录
+        """
         self.storage = storage
         self.md_generator = md_generator
+        self.checkpoint = checkpoint
+        self.overwrite = overwrite
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
         self.success_count = 0
         self.fail_count = 0
         self.skipped_count = 0
+        self.duplicate_count = 0
+        self._lock = threading.Lock()
+        
+        self.fingerprints = self._load_fingerprints() if dedup and not overwrite else None
+        
+        # 写入缓冲区
+        self._buffer: List[Tuple[Dict, Optional[str], Optional[str]]] = []
+        self._callbacks: Dict[str, Callable[[bool], None]] = {}
+        self._buffer_urls = set()
+        self._buffer_started = 0.0
+        self._flush_lock = threading.Lock()
+        
+    def _load_fingerprints(self) -> FingerprintIndex:
+        """加载站点指纹索引（位于站点状态目录，导出后仍保留；首次使用时从已保存的文章构建）"""
+        index = FingerprintIndex(self.storage._state_file("fingerprints.jsonl"))
+        if not index.exists:
+            urls = []
+            for article in self.storage.iter_articles(fields=['url', 'content']):
+                if article.get('url'):
+                    index.add(article['url'], article.get('content', ''))
+                    urls.append(article['url'])
+            if urls:
+                index.commit(urls)
+                console.log(f"[cyan]指纹索引: 已从 {len(urls)} 篇文章构建[/cyan]")
+        return index
+        
+    def is_scraped(self, url: str) -> bool:
+        """URL 是否已保存、已在写入缓冲区中或是已知文章的别名（覆盖模式只检查缓冲区）"""
+        if self.overwrite:
+            return url in self._buffer_urls
+        if url in self._buffer_urls or self.storage.is_scraped(url):
+            return True
+        return bool(self.fingerprints) and self.fingerprints.is_known(url)
         
     def save(self, article: Dict) -> bool:
-        """保存单篇文章（包括生成 Markdown）"""
-        if self.storage.is_scraped(article.get('url', '')):
-            self.skipped_count += 1
+        """保存单篇文章（包括生成 Markdown，写入缓冲区）"""
+        if self.should_skip(article):
             return False
         
-        # 生成 Markdown 文档
+        professional_md, simplified_md = self.render(article)
+        return self.persist(article, professional_md, simplified_md)
+        
+    def should_skip(self, article: Dict) -> bool:
+        """检查文章是否已保存或与已有文章重复（计入跳过）"""
+        url = article.get('url', '')
+        if self.is_scraped(url):
+            with self._lock:
+                self.skipped_count += 1
+            return True
+        
+        if self.fingerprints:
+            original = self.fingerprints.find_duplicate(url, article.get('content', ''))
+            if original:
+                self.fingerprints.add_alias(url, original)
+                console.log(f"[yellow]⚠️  重复文章，跳过翻译: {url} → {original}[/yellow]")
+                with self._lock:
+                    self.duplicate_count += 1
+                return True
+            # 先在内存中登记，同时处理中的重复文章也能被识别
+            self.fingerprints.add(url, article.get('content', ''))
+        return False
+        
+    def render(self, article: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """生成 Markdown 文档（专业版，小白版）"""
         professional_md = None
         simplified_md = None
         
@@ -217,13 +945,105 @@ class BatchArticleSaver:
             except Exception as e:
                 console.log(f"[yellow]⚠️  Markdown 生成失败: {e}[/yellow]")
         
-        # 保存文章和 Markdown
-        success = self.storage.save_article(article, professional_md, simplified_md)
-        if success:
-            self.success_count += 1
-        else:
-            self.fail_count += 1
-        return success
+        return professional_md, simplified_md
+        
+    async def arender(self, article: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """生成 Markdown 文档（异步，LLM 调用并发执行）"""
+        if not self.md_generator:
+            return None, None
+        
+        try:
+            return await self.md_generator.agenerate_both_markdowns(article)
+        except Exception as e:
+            console.log(f"[yellow]⚠️  Markdown 生成失败: {e}[/yellow]")
+            return None, None
+        
+    def persist(self, article: Dict, professional_md: Optional[str] = None,
+                simplified_md: Optional[str] = None,
+                on_commit: Optional[Callable[[bool], None]] = None) -> bool:
+        """
+        将文章放入写入缓冲区，达到批次大小或等待超时后写入存储
+        
+        Args:
+            article: 文章数据
+            professional_md: 专业版 Markdown 内容
+            simplified_md: 小白版 Markdown 内容
+            on_commit: 所在批次写入后调用，参数为是否已保存（在执行 flush 的线程中调用）
+        
+        Returns:
+            bool: 是否已放入缓冲区（不代表已保存，实际结果在 flush 提交后才确定）
+        """
+        url = article.get('url')
+        with self._lock:
+            if not url or url in self._buffer_urls:
+                self.fail_count += 1
+                return False
+            if not self._buffer:
+                self._buffer_started = time.monotonic()
+            self._buffer.append((article, professional_md, simplified_md))
+            self._buffer_urls.add(url)
+            if on_commit:
+                self._callbacks[url] = on_commit
+            
+        self.flush_if_due()
+        return True
+        
+    def flush_if_due(self):
+        """缓冲区达到批次大小或等待超时时写入"""
+        with self._lock:
+            due = bool(self._buffer) and (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._buffer_started >= self.batch_interval
+            )
+        if due:
+            self.flush()
+            
+    def flush(self):
+        """将缓冲区中的文章一次性写入存储"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+                
+            try:
+                results = self.storage.save_articles(batch, overwrite=self.overwrite)
+            except Exception as e:
+                console.log(f"[red]✗ 批量写入失败: {e}[/red]")
+                results = [False] * len(batch)
+            saved_urls = []
+            failed_urls = []
+            callbacks = []
+            with self._lock:
+                for (article, _, _), success in zip(batch, results):
+                    self._buffer_urls.discard(article.get('url'))
+                    callback = self._callbacks.pop(article.get('url'), None)
+                    if callback:
+                        callbacks.append((callback, success))
+                    if success:
+                        self.success_count += 1
+                        saved_urls.append(article['url'])
+                    else:
+                        self.fail_count += 1
+                        failed_urls.append(article.get('url'))
+                        
+            if self.checkpoint:
+                self.checkpoint.mark_many(saved_urls, SAVED)
+                self.checkpoint.mark_many(failed_urls, FAILED)
+                        
+            if self.fingerprints:
+                for (article, _, _), success in zip(batch, results):
+                    if not success and not self.storage.is_scraped(article.get('url', '')):
+                        self.fingerprints.discard(article.get('url', ''))
+                self.fingerprints.commit(saved_urls)
+            console.log(f"[cyan]批量写入: {sum(results)}/{len(batch)} 篇[/cyan]")
+            
+            # 提交之后才通知调用方
+            for callback, success in callbacks:
+                try:
+                    callback(success)
+                except Exception as e:
+                    console.log(f"[red]✗ 保存回调出错: {e}[/red]")
         
     def get_summary(self) -> Dict:
         """获取保存摘要"""
@@ -231,7 +1051,8 @@ class BatchArticleSaver:
             'success': self.success_count,
             'failed': self.fail_count,
             'skipped': self.skipped_count,
-            'total': self.success_count + self.fail_count + self.skipped_count
+            'duplicates': self.duplicate_count,
+            'total': self.success_count + self.fail_count + self.skipped_count + self.duplicate_count
         }
         
     def print_summary(self):
@@ -241,4 +1062,5 @@ class BatchArticleSaver:
         console.print(f"  成功: [green]{summary['success']}[/green]")
         console.print(f"  失败: [red]{summary['failed']}[/red]")
         console.print(f"  跳过: [yellow]{summary['skipped']}[/yellow]")
+        console.print(f"  重复: [yellow]{summary['duplicates']}[/yellow]")
         console.print(f"  总计: {summary['total']}")
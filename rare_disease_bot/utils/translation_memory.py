@@ -0,0 +1,327 @@
+"""翻译记忆库 - 术语表与重复段落（标题、页脚等）的译文复用"""
+import difflib
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from config.settings import (
+    TM_ENABLED,
+    TM_PATH,
+    TM_FUZZY_THRESHOLD,
+    TM_BOILERPLATE_MIN_SEEN,
+    TM_MIN_PARAGRAPH_CHARS,
+)
+
+# 预置术语（首次创建时写入，之后以记忆库为准）
+SEED_TERMS = {
+    "NORD": "美国国家罕见病组织（NORD）",
+    "National Organization for Rare Disorders": "美国国家罕见病组织",
+    "FDA": "美国食品药品监督管理局（FDA）",
+    "EMA": "欧洲药品管理局（EMA）",
+    "NIH": "美国国立卫生研究院（NIH）",
+    "Orphan Drug Act": "《孤儿药法案》",
+    "orphan drug": "孤儿药",
+    "rare disease": "罕见病",
+    "Rare Disease Day": "国际罕见病日",
+    "Priority Review Voucher": "优先审评券",
+    "clinical trial": "临床试验",
+    "gene therapy": "基因疗法",
+}
+
+_SPACE_RE = re.compile(r'\s+')
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def normalize_segment(text: str) -> str:
+    """规范化片段（小写、合并空白），用于精确匹配"""
+    return _SPACE_RE.sub(' ', text).strip().lower()
+
+
+def _segment_hash(text: str) -> str:
+    """片段哈希"""
+    return hashlib.sha1(normalize_segment(text).encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    """
+    翻译记忆库（SQLite）
+
+    - segments: 片段 → 译文（按模式区分：title / professional / simplified）；
+      精确匹配直接复用，模糊匹配（相似度不低于阈值且数字完全一致）只作为参考译文提供给 LLM
+    - terms: 术语 → 译名，注入到翻译提示词中，保证不同文章的译名一致
+    - paragraph_articles: 段落出现在哪些文章中（按正文哈希区分文章），用于识别重复出现的样板段落
+    """
+
+    def __init__(self, path: Path = TM_PATH, fuzzy_threshold: float = TM_FUZZY_THRESHOLD,
+                 boilerplate_min_seen: int = TM_BOILERPLATE_MIN_SEEN,
+                 min_paragraph_chars: int = TM_MIN_PARAGRAPH_CHARS):
+        """
+        初始化记忆库
+
+        Args:
+            path: SQLite 数据库路径
+            fuzzy_threshold: 模糊匹配的最低相似度（0~1）
+            boilerplate_min_seen: 段落出现在多少篇文章中视为样板段落
+            min_paragraph_chars: 参与样板识别的最短段落长度
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.boilerplate_min_seen = boilerplate_min_seen
+        self.min_paragraph_chars = min_paragraph_chars
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS segments (
+                mode TEXT NOT NULL,
+                source_norm TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (mode, source_norm)
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term_norm TEXT PRIMARY KEY,
+                term TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS paragraph_articles (
+                hash TEXT NOT NULL,
+                article TEXT NOT NULL,
+                PRIMARY KEY (hash, article)
+            );
+            -- 旧版本按生成次数计数（同一文章重复生成也会累加），不再使用
+            DROP TABLE IF EXISTS paragraph_seen;
+        """)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO terms (term_norm, term, translation, origin, updated_at) "
+            "VALUES (?, ?, ?, 'seed', ?)",
+            [(normalize_segment(t), t, zh, time.time()) for t, zh in SEED_TERMS.items()]
+        )
+        self._conn.commit()
+
+        # 模糊匹配在内存中进行（段落记忆只包含重复出现的片段，数量有限）
+        self._segments: Dict[str, Dict[str, str]] = {}
+        for mode, source_norm, target in self._conn.execute(
+            "SELECT mode, source_norm, target FROM segments"
+        ):
+            self._segments.setdefault(mode, {})[source_norm] = target
+
+        self._terms: Dict[str, Tuple[str, str]] = {
+            term_norm: (term, translation)
+            for term_norm, term, translation in self._conn.execute(
+                "SELECT term_norm, term, translation FROM terms"
+            )
+        }
+        self._term_re: Optional[re.Pattern] = None
+
+        # 统计
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    # ---------- 片段 ----------
+
+    def lookup(self, text: str, mode: str) -> Optional[str]:
+        """
+        查找片段译文（精确匹配，可直接复用）
+
+        Args:
+            text: 原文片段
+            mode: 翻译模式（title / professional / simplified）
+
+        Returns:
+            str: 译文，未命中时返回 None
+        """
+        norm = normalize_segment(text)
+        with self._lock:
+            target = self._segments.get(mode, {}).get(norm)
+            if target is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(mode, norm)
+            return target
+
+    def reference(self, text: str, mode: str) -> Optional[Tuple[str, str]]:
+        """
+        查找相似片段的译文（模糊匹配，只作为翻译时的参考，不直接复用）
+
+        Args:
+            text: 原文片段
+            mode: 翻译模式
+
+        Returns:
+            Tuple[str, str]: (相似片段原文, 译文)，未找到时返回 None
+        """
+        norm = normalize_segment(text)
+        with self._lock:
+            matched = self._fuzzy_match(norm, self._segments.get(mode, {}))
+            if matched is None:
+                return None
+            self.fuzzy_hits += 1
+            self._touch(mode, matched)
+            row = self._conn.execute(
+                "SELECT source FROM segments WHERE mode = ? AND source_norm = ?", (mode, matched)
+            ).fetchone()
+            return (row[0] if row else matched), self._segments[mode][matched]
+
+    def _touch(self, mode: str, norm: str):
+        """记录片段被使用（调用方需持有锁）"""
+        self._conn.execute(
+            "UPDATE segments SET uses = uses + 1 WHERE mode = ? AND source_norm = ?",
+            (mode, norm)
+        )
+        self._conn.commit()
+
+    def _fuzzy_match(self, norm: str, segments: Dict[str, str]) -> Optional[str]:
+        """模糊匹配（数字必须完全一致，避免日期、剂量等被错误复用）"""
+        digits = _DIGITS_RE.findall(norm)
+        best, best_ratio = None, self.fuzzy_threshold
+        for candidate in segments:
+            if _DIGITS_RE.findall(candidate) != digits:
+                continue
+            matcher = difflib.SequenceMatcher(None, norm, candidate, autojunk=False)
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = candidate, ratio
+        return best
+
+    def store(self, text: str, translation: str, mode: str):
+        """保存片段译文"""
+        if not text.strip() or not translation.strip():
+            return
+        norm = normalize_segment(text)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segments (mode, source_norm, source, target, uses, updated_at) "
+                "VALUES (?, ?, ?, ?, COALESCE((SELECT uses FROM segments WHERE mode = ? AND source_norm = ?), 0), ?)",
+                (mode, norm, text, translation, mode, norm, time.time())
+            )
+            self._conn.commit()
+            self._segments.setdefault(mode, {})[norm] = translation
+
+    # ---------- 样板段落 ----------
+
+    @staticmethod
+    def article_key(content: str) -> str:
+        """文章标识（正文哈希，同一文章重复生成时不会重复计数）"""
+        return _segment_hash(content)
+
+    def record_paragraphs(self, article_key: str, paragraphs: Iterable[str]):
+        """
+        记录一篇文章中出现的段落（应在翻译成功后调用；同一文章重复记录不会增加计数）
+
+        Args:
+            article_key: 文章标识（见 article_key）
+            paragraphs: 文章段落
+        """
+        hashes = {
+            _segment_hash(p) for p in paragraphs
+            if len(p.strip()) >= self.min_paragraph_chars
+        }
+        if not hashes:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO paragraph_articles (hash, article) VALUES (?, ?)",
+                [(h, article_key) for h in hashes]
+            )
+            self._conn.commit()
+
+    def is_boilerplate(self, paragraph: str, article_key: str) -> bool:
+        """段落是否已在足够多的其他文章中出现过（视为样板段落，单独翻译并记忆）"""
+        if len(paragraph.strip()) < self.min_paragraph_chars:
+            return False
+        with self._lock:
+            seen = self._conn.execute(
+                "SELECT COUNT(*) FROM paragraph_articles WHERE hash = ? AND article != ?",
+                (_segment_hash(paragraph), article_key)
+            ).fetchone()[0]
+        # 加上当前文章
+        return seen + 1 >= self.boilerplate_min_seen
+
+    # ---------- 术语 ----------
+
+    def add_terms(self, glossary: Dict[str, str], origin: str = "glossary"):
+        """
+        添加术语（已有术语保持不变，保证译名前后一致）
+
+        Args:
+            glossary: {英文术语: 中文译名}
+            origin: 来源（seed / glossary）
+        """
+        rows = [
+            (normalize_segment(term), term.strip(), translation.strip(), origin, time.time())
+            for term, translation in glossary.items()
+            if term.strip() and translation.strip() and normalize_segment(term) not in self._terms
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO terms (term_norm, term, translation, origin, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            for term_norm, term, translation, _, _ in rows:
+                self._terms[term_norm] = (term, translation)
+            self._term_re = None
+
+    def match_terms(self, text: str) -> Dict[str, str]:
+        """
+        查找文本中出现的已知术语
+
+        Returns:
+            Dict[str, str]: {术语: 译名}
+        """
+        with self._lock:
+            if self._term_re is None and self._terms:
+                # 长术语优先，避免 "rare disease" 被 "rare disease day" 之外的短词抢先匹配
+                alternatives = sorted((re.escape(t) for t, _ in self._terms.values()), key=len, reverse=True)
+                self._term_re = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b', re.IGNORECASE)
+            if self._term_re is None:
+                return {}
+            matched: Dict[str, str] = {}
+            for found in self._term_re.findall(text):
+                term, translation = self._terms[normalize_segment(found)]
+                matched[term] = translation
+            return matched
+
+    def stats(self) -> Dict:
+        """获取命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'fuzzy_hits': self.fuzzy_hits,
+            'misses': self.misses,
+            'hit_rate': f"{self.hits / total:.1%}" if total else "0.0%",
+            'segments': sum(len(s) for s in self._segments.values()),
+            'terms': len(self._terms),
+        }
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """获取全局共享的翻译记忆库（未启用时返回 None）"""
+    global _memory
+    if not TM_ENABLED:
+        return None
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
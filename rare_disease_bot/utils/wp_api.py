@@ -1,20 +1,31 @@
 """WordPress API Fallback Utilities"""
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
-import json
-
-try:
-    # Python 3
-    from urllib.request import urlopen
-except ImportError:
-    # Fallback for very old environments
-    from urllib2 import urlopen  # type: ignore
+import asyncio
+import math
 
+import httpx
 from rich.console import Console
+
+from config.settings import (
+    MAX_RETRIES,
+    USER_AGENT,
+    PROXY_SERVER,
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+)
 from .helpers import clean_html
+from .parse_pool import get_parse_pool
+from .scheduler import get_scheduler, parse_retry_after
 
 console = Console()
 
+# WordPress caps per_page at 100
+WP_MAX_PER_PAGE = 100
+
+# Posts fetched when the caller sets no explicit limit and no date bound
+WP_DEFAULT_LIMIT = 20
+
 
 def _site_root(base_url: str) -> str:
     """Derive site root (scheme + host) from any URL."""
@@ -24,76 +35,171 @@ def _site_root(base_url: str) -> str:
     return f"{scheme}://{netloc}"
 
 
-def _fetch_json(url: str) -> Optional[object]:
-    """Fetch JSON from a URL using stdlib."""
-    try:
-        with urlopen(url) as resp:
-            if resp.getcode() != 200:
-                console.log(f"[yellow]⚠️  WP API 非 200 响应: {resp.getcode()}[/yellow]")
-                return None
-            data = resp.read()
-            return json.loads(data.decode("utf-8"))
-    except Exception as e:
-        console.log(f"[yellow]⚠️  WP API 请求失败: {e}[/yellow]")
-        return None
-
-
-def fetch_wp_posts(base_url: str, per_page: int = 20) -> List[Dict]:
-    """Fetch recent WordPress posts via REST API.
+async def _fetch_json(client: httpx.AsyncClient, url: str,
+                      params: Optional[Dict] = None) -> Tuple[Optional[object], Optional[httpx.Headers]]:
+    """Fetch JSON through the shared per-host scheduler, honouring Retry-After.
 
-    Returns a simplified list of dicts with keys:
-    - link, title_html, date, content_html, categories_ids, author_id
+    Returns (data, headers); data is None on failure.
     """
-    root = _site_root(base_url)
-    api_url = f"{root}/wp-json/wp/v2/posts?per_page={per_page}"
-    posts = _fetch_json(api_url)
-    if not isinstance(posts, list):
-        return []
-
-    simplified: List[Dict] = []
-    for p in posts:
+    scheduler = get_scheduler()
+    for attempt in range(MAX_RETRIES + 1):
         try:
-            simplified.append({
-                "link": p.get("link"),
-                "title_html": (p.get("title") or {}).get("rendered", ""),
-                "date": (p.get("date") or "").split("T")[0],
-                "content_html": (p.get("content") or {}).get("rendered", ""),
-                "categories_ids": p.get("categories") or [],
-                "author_id": p.get("author"),
-            })
-        except Exception:
-            # Skip malformed posts
+            async with scheduler.slot(url):
+                resp = await client.get(url, params=params)
+        except httpx.HTTPError as e:
+            console.log(f"[yellow]⚠️  WP API 请求失败: {e}[/yellow]")
+            return None, None
+
+        if resp.status_code in (429, 503) and attempt < MAX_RETRIES:
+            retry_after = parse_retry_after(resp.headers.get("retry-after"))
+            scheduler.defer(url, retry_after or 2 ** (attempt + 1))
             continue
+        if resp.status_code != 200:
+            console.log(f"[yellow]⚠️  WP API 非 200 响应: {resp.status_code}[/yellow]")
+            return None, resp.headers
+        try:
+            return resp.json(), resp.headers
+        except ValueError as e:
+            console.log(f"[yellow]⚠️  WP API 响应不是 JSON: {e}[/yellow]")
+            return None, resp.headers
+    return None, None
+
+
+def _rendered(post: Dict, key: str) -> str:
+    """`post[key]["rendered"]` as a string ("" when missing or malformed)."""
+    value = post.get(key)
+    rendered = value.get("rendered") if isinstance(value, dict) else None
+    return rendered if isinstance(rendered, str) else ""
+
+
+def _embedded_author(post: Dict) -> Optional[str]:
+    """Author display name from `_embedded.author`."""
+    authors = (post.get("_embedded") or {}).get("author") or []
+    names = [a.get("name") for a in authors if isinstance(a, dict) and a.get("name")]
+    return ", ".join(names) or None
+
+
+def _embedded_categories(post: Dict) -> Optional[List[str]]:
+    """Category names from `_embedded["wp:term"]`; None if terms were not embedded."""
+    term_groups = (post.get("_embedded") or {}).get("wp:term")
+    if term_groups is None:
+        return None
+    names = []
+    for group in term_groups:
+        for term in group or []:
+            if isinstance(term, dict) and term.get("taxonomy") == "category" and term.get("name"):
+                names.append(term["name"])
+    return names
+
 
-    # Optionally resolve category names
-    ids = sorted({cid for p in simplified for cid in (p.get("categories_ids") or [])})
+async def _resolve_category_names(client: httpx.AsyncClient, root: str, ids: List[int]) -> Dict[int, str]:
+    """Resolve category ids to names (only needed when `_embed` is stripped by the site)."""
     names_map: Dict[int, str] = {}
-    if ids:
-        # /wp-json/wp/v2/categories?include=1,2,3
-        include = ",".join(str(i) for i in ids)
-        cat_url = f"{root}/wp-json/wp/v2/categories?include={include}&per_page={len(ids)}"
-        cats = _fetch_json(cat_url)
+    for start in range(0, len(ids), WP_MAX_PER_PAGE):
+        chunk = ids[start:start + WP_MAX_PER_PAGE]
+        cats, _ = await _fetch_json(client, f"{root}/wp-json/wp/v2/categories", {
+            "include": ",".join(str(i) for i in chunk),
+            "per_page": len(chunk),
+        })
         if isinstance(cats, list):
             for c in cats:
                 cid = c.get("id")
                 name = c.get("name")
                 if isinstance(cid, int) and isinstance(name, str):
                     names_map[cid] = name
+    return names_map
+
+
+async def fetch_wp_posts(base_url: str, limit: Optional[int] = WP_DEFAULT_LIMIT,
+                         after: Optional[str] = None,
+                         modified_after: Optional[str] = None) -> List[Dict]:
+    """Fetch WordPress posts via REST API.
+
+    Walks `/wp-json/wp/v2/posts` page by page: the first request reads
+    `X-WP-TotalPages`, the remaining pages are requested concurrently over one
+    keep-alive connection pool (the host scheduler still caps concurrency).
+    Authors and categories come inline via `_embed`.
+
+    Args:
+        base_url: Any URL on the site.
+        limit: Maximum number of posts (None fetches the whole archive).
+        after: Only posts published after this ISO 8601 datetime.
+        modified_after: Only posts modified after this ISO 8601 datetime.
+
+    Returns a list of article dicts with keys:
+    - url, title, date, author, categories, content
+    """
+    root = _site_root(base_url)
+    api_url = f"{root}/wp-json/wp/v2/posts"
+    per_page = min(WP_MAX_PER_PAGE, limit) if limit else WP_MAX_PER_PAGE
+
+    params: Dict = {"per_page": per_page, "_embed": "author,wp:term"}
+    if after:
+        params["after"] = after
+    if modified_after:
+        params["modified_after"] = modified_after
+
+    async with httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+        follow_redirects=True,
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+        proxy=PROXY_SERVER,
+    ) as client:
+        first, headers = await _fetch_json(client, api_url, {**params, "page": 1})
+        if not isinstance(first, list):
+            return []
+
+        total_pages = 1
+        try:
+            total_pages = int((headers or {}).get("x-wp-totalpages", "1"))
+        except ValueError:
+            pass
+        if limit:
+            total_pages = min(total_pages, math.ceil(limit / per_page))
+
+        posts = list(first)
+        if total_pages > 1:
+            console.log(f"[cyan]WP API: 共 {total_pages} 页，并发获取...[/cyan]")
+            pages = await asyncio.gather(*(
+                _fetch_json(client, api_url, {**params, "page": page})
+                for page in range(2, total_pages + 1)
+            ))
+            for data, _ in pages:
+                if isinstance(data, list):
+                    posts.extend(data)
+        if limit:
+            posts = posts[:limit]
+
+        # Sites that strip `_embed` still return category ids
+        missing_ids = sorted({
+            cid for p in posts if _embedded_categories(p) is None
+            for cid in (p.get("categories") or [])
+        })
+        names_map = await _resolve_category_names(client, root, missing_ids) if missing_ids else {}
+
+    # Strip HTML from titles and bodies in the parse pool, off the event loop
+    rendered = [_rendered(p, key).encode("utf-8") for p in posts for key in ("title", "content")]
+    texts = await get_parse_pool().map(clean_html, rendered)
 
     # Build final objects with cleaned text
     final: List[Dict] = []
-    for p in simplified:
-        link = p.get("link") or ""
-        title_text = clean_html(p.get("title_html") or "").strip()
-        content_text = clean_html(p.get("content_html") or "").strip()
-        cats = [names_map.get(cid) for cid in (p.get("categories_ids") or []) if names_map.get(cid)]
-        final.append({
-            "url": link,
-            "title": title_text,
-            "date": p.get("date") or "",
-            "author": None,  # Author name requires extra call; optional
-            "categories": cats,
-            "content": content_text,
-        })
+    for i, p in enumerate(posts):
+        try:
+            categories = _embedded_categories(p)
+            if categories is None:
+                categories = [names_map[cid] for cid in (p.get("categories") or []) if cid in names_map]
+            final.append({
+                "url": p.get("link") or "",
+                "title": texts[2 * i].strip(),
+                "date": (p.get("date") or "").split("T")[0],
+                "author": _embedded_author(p),
+                "categories": categories,
+                "content": texts[2 * i + 1].strip(),
+            })
+        except Exception:
+            # Skip malformed posts
+            continue
 
     return final